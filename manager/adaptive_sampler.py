@@ -0,0 +1,88 @@
+import time
+from collections import deque
+from typing import Callable, Optional
+
+class AdaptiveSampler:
+    """
+    Picks the delay before the next status collection.
+
+    Idle and stable: the interval grows towards `maximum`. Falling TPS, rising
+    tick time or fast memory growth: it drops straight to `minimum`. Otherwise it
+    settles back on `base`. Whatever the policy asks for, the RCON commands issued
+    in any 60 second window stay within `rcon_budget`.
+    """
+
+    BACKOFF = 1.5        # Growth factor per idle sample
+    STABLE_TPS = 19.5    # TPS at or above this counts as healthy
+    TPS_DROP = 0.5       # TPS loss between samples treated as falling
+
+    def __init__(self, base: float, minimum: float, maximum: float, rcon_budget: int,
+                 mspt_rise: float = 5.0, memory_rate: float = 20.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.base = base
+        self.minimum = min(minimum, base)
+        self.maximum = max(maximum, base)
+        self.rcon_budget = rcon_budget
+        self.mspt_rise = mspt_rise
+        self.memory_rate = memory_rate
+        self.clock = clock
+        self.interval = base
+        self.reason = 'base'
+        self._commands: deque = deque()
+        self._per_sample = 1.0
+        self._previous = None  # (monotonic time, status)
+
+    def record_commands(self, count: int):
+        """Account RCON commands issued for one sample"""
+        now = self.clock()
+        self._commands.extend([now] * count)
+        self._per_sample = 0.8 * self._per_sample + 0.2 * count
+
+    def _trim(self, now: float):
+        while self._commands and now - self._commands[0] >= 60:
+            self._commands.popleft()
+
+    def _budget_floor(self, now: float) -> float:
+        """Shortest delay that keeps the next sample inside the budget"""
+        if self.rcon_budget <= 0:
+            return 0.0
+        self._trim(now)
+        floor = 60.0 * self._per_sample / self.rcon_budget
+        excess = len(self._commands) + self._per_sample - self.rcon_budget
+        if excess > 0:
+            index = min(int(excess), len(self._commands)) - 1
+            if index >= 0:
+                floor = max(floor, self._commands[index] + 60 - now)
+        return floor
+
+    def _wanted(self, status, now: float) -> float:
+        previous = self._previous
+        if not status.is_online or previous is None or not previous[1].is_online:
+            self.reason = 'base'
+            return self.base
+
+        elapsed = max(now - previous[0], 1e-3)
+        last = previous[1]
+        tps_falling = status.tps < self.STABLE_TPS and last.tps - status.tps >= self.TPS_DROP
+        mspt_rising = status.mspt - last.mspt >= self.mspt_rise
+        memory_climbing = (status.memory_used - last.memory_used) / elapsed >= self.memory_rate
+
+        if tps_falling or mspt_rising or memory_climbing:
+            self.reason = 'tps falling' if tps_falling else 'mspt rising' if mspt_rising else 'memory climbing'
+            return self.minimum
+        if not status.players and status.tps >= self.STABLE_TPS:
+            self.reason = 'idle'
+            return min(max(self.interval, self.base) * self.BACKOFF, self.maximum)
+        self.reason = 'base'
+        # Step back up gradually after an incident so a relapse is still caught
+        return min(self.interval * 2, self.base) if self.interval < self.base else self.base
+
+    def next_interval(self, status, now: Optional[float] = None) -> float:
+        now = self.clock() if now is None else now
+        wanted = self._wanted(status, now)
+        self._previous = (now, status)
+        floor = self._budget_floor(now)
+        if floor > wanted:
+            self.reason = 'rcon budget'
+        self.interval = min(max(wanted, floor, self.minimum), max(self.maximum, floor))
+        return self.interval
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+
+from log_tailer import LogTailer, WORLD_SAVED
+
+SAVE = 'save'
+WAIT = 'wait'
+DEFER = 'defer'
+SKIP = 'skip'
+
+class AutosavePolicy:
+    """
+    Decides when a save is due from dirty time rather than the wall clock.
+
+    The world counts as dirty from the first player activity after the last
+    save. A save is due once it has been dirty for `interval` seconds; while TPS
+    is below `min_tps` it is held back for at most `max_defer` more seconds.
+    """
+
+    def __init__(self, interval: float, max_defer: float, min_tps: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self.max_defer = max_defer
+        self.min_tps = min_tps
+        self.clock = clock
+        self.dirty_since: Optional[float] = None
+        self.last_save: Optional[float] = None
+
+    def note_activity(self, now: Optional[float] = None):
+        if self.dirty_since is None:
+            self.dirty_since = self.clock() if now is None else now
+
+    def mark_clean(self, now: Optional[float] = None):
+        self.dirty_since = None
+        self.last_save = self.clock() if now is None else now
+
+    def decide(self, tps: float, now: Optional[float] = None) -> Tuple[str, str]:
+        """(SAVE | WAIT | DEFER | SKIP, reason)"""
+        now = self.clock() if now is None else now
+        if self.dirty_since is None:
+            return SKIP, 'nobody online since the last save'
+        dirty = now - self.dirty_since
+        if dirty < self.interval:
+            return WAIT, f"dirty for {dirty / 60:.0f} of {self.interval / 60:.0f} minutes"
+        if tps < self.min_tps:
+            if dirty < self.interval + self.max_defer:
+                return DEFER, f"TPS {tps:.1f} below {self.min_tps}"
+            return SAVE, f"deferred for {(dirty - self.interval) / 60:.0f} minutes, saving anyway"
+        return SAVE, f"dirty for {dirty / 60:.0f} minutes"
+
+class SaveError(Exception):
+    pass
+
+class WorldSaver:
+    """
+    save-off / save-all flush / save-on cycle with real completion detection.
+
+    Completion is taken from the `save-all flush` response when the server
+    reports it there, otherwise from the "Saved the game" log line. Automatic
+    saving stays off while the hooks run, so they see a consistent world on disk.
+    """
+
+    def __init__(self, rcon, log_tailer: Optional[LogTailer], logger, timeout: float = 300):
+        self.rcon = rcon
+        self.log_tailer = log_tailer
+        self.logger = logger
+        self.timeout = timeout
+
+    async def save(self, hooks: Iterable[Callable[[], Awaitable]] = ()) -> float:
+        """Flush the world to disk; returns the save duration in seconds"""
+        loop = asyncio.get_running_loop()
+        saved = asyncio.Event()
+        unsubscribe = None
+        if self.log_tailer is not None:
+            unsubscribe = self.log_tailer.subscribe(lambda event: saved.set(), [WORLD_SAVED])
+
+        try:
+            if await self.rcon.send_command("save-off") is None:
+                raise SaveError("save-off failed")
+            started = loop.time()
+            response = await self.rcon.send_command("save-all flush", timeout=self.timeout)
+            if not (response and 'Saved the' in response):
+                if self.log_tailer is None:
+                    raise SaveError(f"No save confirmation in response: {response!r}")
+                remaining = self.timeout - (loop.time() - started)
+                try:
+                    await asyncio.wait_for(saved.wait(), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    raise SaveError(f"Save not confirmed within {self.timeout}s")
+            duration = loop.time() - started
+
+            for hook in hooks:
+                try:
+                    await hook()
+                except Exception as e:
+                    self.logger.error(f"Post-save hook failed: {e}")
+            return duration
+        finally:
+            if unsubscribe:
+                unsubscribe()
+            if await self.rcon.send_command("save-on") is None:
+                self.logger.error("save-on failed; automatic saving may still be disabled")
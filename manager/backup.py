@@ -0,0 +1,294 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+SNAPSHOT_FORMAT = '%Y%m%d-%H%M%S'
+# Held open by the running server and meaningless in a backup
+EXCLUDED_FILES = {'session.lock'}
+
+def _digest(path: str) -> str:
+    """SHA-256 of a file, read through mmap (runs in pool workers)"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+    return h.hexdigest()
+
+@dataclass
+class BackupResult:
+    name: str
+    files: int
+    changed: int
+    new_bytes: int
+    seconds: float
+
+class BackupEngine:
+    """
+    Incremental, content-addressed world snapshots.
+
+    Files whose size and mtime match the previous manifest reuse its digest
+    without being read. Changed files are hashed across a process pool and
+    stored once under objects/<digest>; every snapshot is a tree of hardlinks
+    into that store plus a JSON manifest, so backup time and space grow with
+    what changed, not with the world size.
+
+    A snapshot is linked into `<name>.partial` and only renamed into place
+    once complete, and snapshot() and prune() never run at the same time, so
+    pruning cannot drop objects of a snapshot still being written.
+    """
+
+    INLINE_BYTES = 16 * 1024 * 1024  # Below this much changed data a pool is not worth starting
+
+    def __init__(self, world_dir: str, backup_dir: str, workers: int = 0,
+                 keep_hourly: int = 24, keep_daily: int = 7, keep_weekly: int = 4):
+        self.world_dir = os.path.abspath(world_dir)
+        self.backup_dir = os.path.abspath(backup_dir)
+        self.objects_dir = os.path.join(self.backup_dir, 'objects')
+        self.snapshots_dir = os.path.join(self.backup_dir, 'snapshots')
+        self.workers = workers or os.cpu_count() or 1
+        self.keep_hourly = keep_hourly
+        self.keep_daily = keep_daily
+        self.keep_weekly = keep_weekly
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _manifest_path(self, name: str) -> str:
+        return os.path.join(self.snapshots_dir, f"{name}.json")
+
+    def snapshots(self) -> List[str]:
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(entry[:-5] for entry in os.listdir(self.snapshots_dir) if entry.endswith('.json'))
+
+    def load_manifest(self, name: str) -> dict:
+        with open(self._manifest_path(name), encoding='utf-8') as f:
+            return json.load(f)
+
+    def _scan(self) -> Dict[str, tuple]:
+        """Relative path -> (size, mtime_ns) for every file in the world"""
+        files = {}
+        for root, _, names in os.walk(self.world_dir):
+            for name in names:
+                if name in EXCLUDED_FILES:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                rel = os.path.relpath(path, self.world_dir).replace(os.sep, '/')
+                files[rel] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def _hash_all(self, paths: List[str], total_bytes: int) -> List[str]:
+        if len(paths) < 2 or total_bytes < self.INLINE_BYTES or self.workers < 2:
+            return [_digest(path) for path in paths]
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(paths))) as pool:
+            return list(pool.map(_digest, paths, chunksize=max(1, len(paths) // (self.workers * 4))))
+
+    def _store(self, source: str, digest: str) -> int:
+        """Copy a file into the object store unless it is already there; returns bytes written
+
+        The copy is re-hashed before it is committed, so every object in the
+        store is known to match its name.
+        """
+        target = self._object_path(digest)
+        if os.path.exists(target):
+            return 0
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp = f"{target}.tmp"
+        shutil.copyfile(source, temp)
+        if _digest(temp) != digest:
+            os.remove(temp)
+            raise IOError(f"{source} changed while being backed up")
+        os.replace(temp, target)
+        return os.path.getsize(target)
+
+    @staticmethod
+    def _link(source: str, target: str):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            # File systems without hardlinks get a plain copy
+            shutil.copyfile(source, target)
+
+    def snapshot(self, now: Optional[datetime] = None) -> BackupResult:
+        """Back up the world as it is on disk; call with automatic saving turned off"""
+        with self._lock:
+            return self._snapshot(now)
+
+    def _snapshot(self, now: Optional[datetime]) -> BackupResult:
+        started = time.monotonic()
+        if not os.path.isdir(self.world_dir):
+            raise FileNotFoundError(f"World directory not found: {self.world_dir}")
+        name = (now or datetime.now()).strftime(SNAPSHOT_FORMAT)
+        snapshot_dir = os.path.join(self.snapshots_dir, name)
+        if os.path.exists(self._manifest_path(name)):
+            raise FileExistsError(f"Snapshot {name} already exists")
+
+        existing = self.snapshots()
+        previous = self.load_manifest(existing[-1])['files'] if existing else {}
+        current = self._scan()
+
+        entries: Dict[str, list] = {}
+        changed = []
+        for rel, (size, mtime_ns) in current.items():
+            old = previous.get(rel)
+            if old is not None and old[0] == size and old[1] == mtime_ns:
+                entries[rel] = [size, mtime_ns, old[2]]
+            else:
+                changed.append(rel)
+
+        paths = [os.path.join(self.world_dir, rel) for rel in changed]
+        digests = self._hash_all(paths, sum(current[rel][0] for rel in changed))
+        new_bytes = 0
+        for rel, path, digest in zip(changed, paths, digests):
+            new_bytes += self._store(path, digest)
+            size, mtime_ns = current[rel]
+            entries[rel] = [size, mtime_ns, digest]
+
+        partial = f"{snapshot_dir}.partial"
+        try:
+            shutil.rmtree(partial, ignore_errors=True)
+            for rel, (_, _, digest) in entries.items():
+                self._link(self._object_path(digest), os.path.join(partial, *rel.split('/')))
+            os.makedirs(partial, exist_ok=True)
+            os.replace(partial, snapshot_dir)
+
+            manifest = {'created': time.time(), 'world': self.world_dir, 'files': entries}
+            temp = f"{self._manifest_path(name)}.tmp"
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, separators=(',', ':'))
+            os.replace(temp, self._manifest_path(name))
+        except BaseException:
+            shutil.rmtree(partial, ignore_errors=True)
+            if not os.path.exists(self._manifest_path(name)):
+                shutil.rmtree(snapshot_dir, ignore_errors=True)
+            raise
+
+        return BackupResult(name, len(entries), len(changed), new_bytes, time.monotonic() - started)
+
+    def _keep(self, names: List[str], now: datetime) -> set:
+        """Newest snapshot of each recent hour, day and ISO week"""
+        keep = set(names[-1:])
+        tiers = (
+            (self.keep_hourly, lambda d: d.strftime('%Y%m%d%H'), 3600),
+            (self.keep_daily, lambda d: d.strftime('%Y%m%d'), 86400),
+            (self.keep_weekly, lambda d: '%d-%02d' % d.isocalendar()[:2], 7 * 86400),
+        )
+        for count, bucket_of, span in tiers:
+            seen = set()
+            for name in reversed(names):
+                when = datetime.strptime(name, SNAPSHOT_FORMAT)
+                if (now - when).total_seconds() > count * span:
+                    break
+                bucket = bucket_of(when)
+                if bucket not in seen:
+                    seen.add(bucket)
+                    keep.add(name)
+        return keep
+
+    def prune(self, now: Optional[datetime] = None) -> List[str]:
+        """Apply the retention tiers and drop objects no snapshot refers to"""
+        with self._lock:
+            return self._prune(now)
+
+    def _prune(self, now: Optional[datetime]) -> List[str]:
+        names = self.snapshots()
+        keep = self._keep(names, now or datetime.now())
+        removed = [name for name in names if name not in keep]
+        for name in removed:
+            os.remove(self._manifest_path(name))
+            shutil.rmtree(os.path.join(self.snapshots_dir, name), ignore_errors=True)
+        # Trees without a manifest are left over from a snapshot that died (e.g. the process was killed)
+        for entry in os.listdir(self.snapshots_dir) if os.path.isdir(self.snapshots_dir) else ():
+            path = os.path.join(self.snapshots_dir, entry)
+            if os.path.isdir(path) and not os.path.exists(self._manifest_path(entry)):
+                shutil.rmtree(path, ignore_errors=True)
+
+        if removed and os.path.isdir(self.objects_dir):
+            referenced = set()
+            for name in keep:
+                referenced.update(entry[2] for entry in self.load_manifest(name)['files'].values())
+            for root, _, files in os.walk(self.objects_dir):
+                for digest in files:
+                    if digest not in referenced:
+                        os.remove(os.path.join(root, digest))
+        return removed
+
+    def verify(self, name: str) -> List[str]:
+        """Re-hash a snapshot's files; returns the paths that do not match the manifest"""
+        snapshot_dir = os.path.join(self.snapshots_dir, name)
+        bad = []
+        for rel, (size, _, digest) in self.load_manifest(name)['files'].items():
+            path = os.path.join(snapshot_dir, *rel.split('/'))
+            if not os.path.exists(path) or os.path.getsize(path) != size or _digest(path) != digest:
+                bad.append(rel)
+        return bad
+
+    def restore(self, name: str, target: str) -> int:
+        """Copy a snapshot into an empty directory and verify every restored file"""
+        if os.path.exists(target) and os.listdir(target):
+            raise FileExistsError(f"Restore target is not empty: {target}")
+        files = self.load_manifest(name)['files']
+        snapshot_dir = os.path.join(self.snapshots_dir, name)
+        for rel, (_, mtime_ns, digest) in files.items():
+            destination = os.path.join(target, *rel.split('/'))
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copyfile(os.path.join(snapshot_dir, *rel.split('/')), destination)
+            os.utime(destination, ns=(mtime_ns, mtime_ns))
+            if _digest(destination) != digest:
+                raise IOError(f"Restored file does not match the backup: {rel}")
+        return len(files)
+
+def main():
+    from config import ServerConfig
+
+    parser = argparse.ArgumentParser(description='World backup snapshots')
+    parser.add_argument('--server', help='Server name when several are configured')
+    sub = parser.add_subparsers(dest='action', required=True)
+    sub.add_parser('list')
+    sub.add_parser('snapshot', help='Back up now (stop the server or run save-off first)')
+    verify = sub.add_parser('verify')
+    verify.add_argument('name')
+    restore = sub.add_parser('restore')
+    restore.add_argument('name')
+    restore.add_argument('target')
+    args = parser.parse_args()
+
+    config = ServerConfig.find(args.server) if args.server else ServerConfig.servers()[0]
+    engine = BackupEngine(
+        config.world_path(), config.backup_path(), config.BACKUP_WORKERS,
+        config.BACKUP_KEEP_HOURLY, config.BACKUP_KEEP_DAILY, config.BACKUP_KEEP_WEEKLY
+    )
+    if args.action == 'list':
+        for name in engine.snapshots():
+            print(name)
+    elif args.action == 'snapshot':
+        result = engine.snapshot()
+        print(f"{result.name}: {result.changed}/{result.files} files changed, "
+              f"{result.new_bytes / 1024 / 1024:.1f} MB stored in {result.seconds:.1f}s")
+    elif args.action == 'verify':
+        bad = engine.verify(args.name)
+        for rel in bad:
+            print(f"MISMATCH {rel}")
+        sys.exit(1 if bad else 0)
+    elif args.action == 'restore':
+        print(f"Restored {engine.restore(args.name, args.target)} files to {args.target}")
+
+if __name__ == "__main__":
+    main()
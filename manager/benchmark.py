@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import psutil
+
+from config import ServerConfig
+from discord_dispatcher import DiscordDispatcher
+from fake_server import FakeRconServer, FakeWebhookServer
+from server_scheduler import MinecraftServerScheduler
+from simulation import simulate_schedule, check_schedule, restart_count
+from utils import LoggerSetup
+
+class LoopLagProbe:
+    """
+    Measures event-loop blocking from inside the loop.
+
+    A task sleeps `interval` over and over; how much later than requested it
+    wakes up is time some other callback held the loop.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - started - self.interval))
+
+    def start(self):
+        self.lags = []
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> List[float]:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return self.lags
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Count and millisecond statistics of a list of durations in seconds"""
+    if not samples:
+        return {'n': 0}
+    ordered = sorted(samples)
+    return {
+        'n': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        'max_ms': ordered[-1] * 1000
+    }
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def bench_config(work_dir: str, port: int, password: str) -> ServerConfig:
+    """The first configured server's schedule, pointed at throwaway state and a local fake server"""
+    config = copy.copy(ServerConfig.servers()[0])
+    overrides = {
+        'SERVER_NAME': 'bench',
+        'SERVER_DIR': work_dir,
+        'HOST': '127.0.0.1',
+        'PORT': port,
+        'RCON_PASSWORD': password,
+        'DISCORD_ENABLED': False,
+        'METRICS_ENABLED': False,
+        'BACKUP_ENABLED': False,
+        'IDLE_SUSPEND_ENABLED': False,
+        'PREGEN_ENABLED': False,
+        'JAVA_PROCESS_NAMES': [psutil.Process().name()],
+        'SERVER_CMDLINE_PATTERN': 'fake_server.py',
+        'STATUS_BUS_NAME': f"mc_bench_{os.getpid()}",
+        'HISTORY_DIR': os.path.join(work_dir, 'history'),
+        'HISTORY_RAW_DAYS': 1,
+        'HISTORY_MINUTE_DAYS': 1,
+        'HISTORY_HOUR_DAYS': 1,
+    }
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    # Routine INFO lines would dominate both the output and the timings
+    for component in ('scheduler', 'monitor', 'process'):
+        LoggerSetup.setup(config.log_name(component)).setLevel(logging.WARNING)
+    return config
+
+async def bench_countdown(work_dir: str, seconds: float, latency: float, style: str = 'chat') -> dict:
+    """Drift of each countdown announcement from its ideal send time, against an RCON server with latency"""
+    server = FakeRconServer(password='bench', latency=latency)
+    port = await server.start()
+    config = bench_config(work_dir, port, 'bench')
+    config.STATUS_BUS_NAME += '_countdown'
+    config.COUNTDOWN_STYLE = style
+    scheduler = MinecraftServerScheduler(config)
+    loop = asyncio.get_running_loop()
+    try:
+        await scheduler.rcon.send_command('list')
+        plan = scheduler._countdown_plan([seconds / 60, seconds / 120], "warn {minutes}", "count {seconds}")
+        server.commands.clear()
+        started = loop.time()
+        await scheduler._run_countdown(plan, 'shutdown')
+
+        # Each announcement counts from the arrival of its first command
+        drifts = []
+        position = 0
+        for remaining, announcement in plan.announcements():
+            for index in range(position, len(server.commands)):
+                at, command = server.commands[index]
+                if command == announcement[0]:
+                    drifts.append(at - started - (plan.length - remaining))
+                    position = index + 1
+                    break
+        result = summarize([abs(drift) for drift in drifts])
+        result['dropped'] = len(plan.announcements()) - len(drifts)
+        result['final_drift_ms'] = drifts[-1] * 1000 if drifts else None
+        result['rcon_latency_ms'] = latency * 1000
+        result['commands'] = len(server.commands)
+        result['style'] = style
+        return result
+    finally:
+        scheduler.status_bus.close()
+        scheduler.history.close()
+        if scheduler.sessions is not None:
+            scheduler.sessions.close()
+        await server.close()
+
+async def bench_process(work_dir: str, reps: int, latency: float) -> dict:
+    """Discovery, health-check and status-collection cost against a dummy server process"""
+    port = _free_port()
+    config = bench_config(work_dir, port, 'bench')
+    dummy = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_server.py'),
+         '--port', str(port), '--password', 'bench', '--startup', '0.5', '--latency', str(latency)],
+        cwd=work_dir
+    )
+    scheduler = MinecraftServerScheduler(config)
+    probe = LoopLagProbe()
+    results = {}
+    try:
+        deadline = time.monotonic() + 15
+        while not await scheduler.rcon.probe():
+            if time.monotonic() > deadline:
+                raise RuntimeError("Dummy server did not open RCON")
+            await asyncio.sleep(0.2)
+
+        async def measure(name: str, action):
+            probe.start()
+            durations = []
+            for _ in range(reps):
+                started = time.perf_counter()
+                await action()
+                durations.append(time.perf_counter() - started)
+                # Give the probe a chance to wake up late if the action blocked the loop
+                await asyncio.sleep(probe.interval * 2)
+            results[name] = summarize(durations)
+            results[f"{name}_loop_lag"] = summarize(await probe.stop())
+
+        async def scan():
+            if scheduler.tracker._scan() is None:
+                raise RuntimeError("Dummy server process not found by the process scan")
+
+        async def cached():
+            scheduler.tracker.get_process()
+
+        await measure('discovery_scan', scan)
+        await measure('discovery_cached', cached)
+        await measure('health_check', scheduler.health_check)
+        await measure('collect_status', scheduler.monitor.collect_status)
+        return results
+    finally:
+        # Not a crash: keep the exit listener from restarting it
+        scheduler.shutdown_flag = True
+        dummy.terminate()
+        dummy.wait(10)
+        scheduler.status_bus.close()
+        scheduler.history.close()
+        if scheduler.sessions is not None:
+            scheduler.sessions.close()
+
+async def bench_schedule(work_dir: str, days: float) -> dict:
+    config = bench_config(work_dir, _free_port(), 'bench')
+    config.STATUS_BUS_NAME += '_schedule'
+    before = restart_count(config.SERVER_NAME)
+    started = time.perf_counter()
+    events = await simulate_schedule(config, days)
+    elapsed = time.perf_counter() - started
+    return {
+        'days': days,
+        'wall_seconds': elapsed,
+        'events': [f"{event.at:%a %Y-%m-%d %H:%M} {event.action}" for event in events],
+        'problems': check_schedule(events, before, restart_count(config.SERVER_NAME))
+    }
+
+async def bench_discord(bursts: int, burst_size: int, gap: float) -> dict:
+    """Coalescing and rate-limit handling of the Discord dispatcher against a local webhook that pushes back"""
+    server = FakeWebhookServer(rate_limit_every=4, retry_after=0.3, bucket_size=2, bucket_reset=1.0)
+    await server.start()
+    logger = LoggerSetup.setup('discord')
+    logger.setLevel(logging.ERROR)
+    dispatcher = DiscordDispatcher(server.url, logger, queue_size=bursts * burst_size,
+                                   coalesce_window=0.2, timeout=5)
+    sent = []
+    started = time.perf_counter()
+    try:
+        for burst in range(bursts):
+            for index in range(burst_size):
+                sent.append(f"burst {burst} message {index}")
+                dispatcher.submit(sent[-1])
+            await asyncio.sleep(gap)
+        delivered = await dispatcher.flush(60)
+        stats = dispatcher.stats()
+    finally:
+        await dispatcher.close()
+        await server.close()
+
+    problems = []
+    received = [line for _, content in server.posts for line in content.split('\n')]
+    if not delivered or received != sent:
+        order = 'in order' if received == sent[:len(received)] else 'out of order'
+        problems.append(f"{len(received)} of {len(sent)} messages arrived, {order}")
+    if len(server.posts) > bursts:
+        problems.append(f"{len(server.posts)} posts for {bursts} bursts: bursts were not coalesced")
+    arrivals = sorted([at for at, _ in server.posts] + [at for at, _ in server.rejected])
+    for at, wait in server.rejected:
+        retry = next((t for t in arrivals if t > at), None)
+        # Small slack for the rounding of Retry-After and X-RateLimit-Reset-After
+        if retry is not None and retry - at < wait - 0.01:
+            problems.append(f"Retried {retry - at:.2f}s after a 429 asking for {wait:.2f}s")
+    return {
+        'messages': len(sent),
+        'posts': len(server.posts),
+        'rate_limited': len(server.rejected),
+        'wall_seconds': time.perf_counter() - started,
+        'avg_latency_ms': stats['avg_latency'] * 1000,
+        'max_latency_ms': stats['max_latency'] * 1000,
+        'problems': problems
+    }
+
+def _print(name: str, result: dict):
+    if 'n' in result:
+        if result['n'] == 0:
+            print(f"  {name:<28} no samples")
+            return
+        print(f"  {name:<28} n={result['n']:<5} mean {result['mean_ms']:8.2f} ms  p50 {result['p50_ms']:8.2f} ms  "
+              f"p99 {result['p99_ms']:8.2f} ms  max {result['max_ms']:8.2f} ms")
+    else:
+        print(f"  {name:<28} {result}")
+
+async def run(args) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='mc-bench-') as work_dir:
+        if 'schedule' in args.only:
+            results['schedule'] = await bench_schedule(work_dir, args.days)
+        if 'process' in args.only:
+            results['process'] = await bench_process(work_dir, args.reps, args.latency)
+        if 'countdown' in args.only:
+            results['countdown'] = await bench_countdown(work_dir, args.countdown, args.latency, args.style)
+    if 'discord' in args.only:
+        results['discord'] = await bench_discord(args.bursts, args.burst_size, args.burst_gap)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Manager hot-path benchmarks against local fakes')
+    parser.add_argument('--only', nargs='+', default=['schedule', 'process', 'countdown', 'discord'],
+                        choices=['schedule', 'process', 'countdown', 'discord'])
+    parser.add_argument('--reps', type=int, default=50, help='Repetitions per process benchmark')
+    parser.add_argument('--latency', type=float, default=0.02, help='Fake RCON reply latency in seconds')
+    parser.add_argument('--countdown', type=float, default=30, help='Simulated countdown length in seconds (>= 10)')
+    parser.add_argument('--style', default='chat', choices=['chat', 'title', 'actionbar'],
+                        help='Final countdown style')
+    parser.add_argument('--days', type=float, default=7, help='Virtual days of schedule to simulate')
+    parser.add_argument('--bursts', type=int, default=6, help='Bursts of Discord messages to send')
+    parser.add_argument('--burst-size', type=int, default=5, help='Messages per burst')
+    parser.add_argument('--burst-gap', type=float, default=0.5, help='Seconds between bursts')
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    schedule = results.get('schedule')
+    if schedule:
+        print(f"Schedule: {schedule['days']} days simulated in {schedule['wall_seconds']:.2f}s, "
+              f"{len(schedule['events'])} events")
+        for line in schedule['events']:
+            print(f"  {line}")
+        for problem in schedule['problems']:
+            print(f"  PROBLEM: {problem}")
+    if 'process' in results:
+        print("Process / health check / monitor:")
+        for name, result in results['process'].items():
+            _print(name, result)
+    if 'countdown' in results:
+        countdown = results['countdown']
+        print(f"Countdown drift at {countdown['rcon_latency_ms']:.0f} ms RCON latency "
+              f"({countdown['style']}, {countdown['commands']} RCON commands, "
+              f"{countdown['dropped']} announcements superseded):")
+        _print('abs drift per message', countdown)
+        if countdown['final_drift_ms'] is not None:
+            print(f"  {'final message drift':<28} {countdown['final_drift_ms']:.1f} ms")
+    if 'discord' in results:
+        discord = results['discord']
+        print(f"Discord: {discord['messages']} messages in {discord['posts']} posts, "
+              f"{discord['rate_limited']} rate limited, {discord['wall_seconds']:.2f}s")
+        print(f"  {'delivery latency':<28} mean {discord['avg_latency_ms']:8.2f} ms  max {discord['max_latency_ms']:8.2f} ms")
+        for problem in discord['problems']:
+            print(f"  PROBLEM: {problem}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional, Tuple
+
+from tick_stats import parse_forge_tps, TickReport
+
+DONE = 'done'
+STOPPED = 'stopped'
+FAILED = 'failed'
+
+# forceload accepts at most 256 chunks per command
+MAX_BATCH = 16
+
+def spiral_offset(index: int) -> Tuple[int, int]:
+    """Grid offset of the index-th square when walking rings outwards from (0, 0)
+
+    Ring k holds indexes (2k-1)^2 .. (2k+1)^2 - 1, so growing the area only
+    appends squares and a checkpointed index stays valid.
+    """
+    if index == 0:
+        return 0, 0
+    ring = (math.isqrt(index) + 1) // 2
+    side, step = divmod(index - (2 * ring - 1) ** 2, 2 * ring)
+    if side == 0:
+        return -ring + step, -ring
+    if side == 1:
+        return ring, -ring + step
+    if side == 2:
+        return ring - step, ring
+    return -ring, ring - step
+
+@dataclass
+class PregenArea:
+    dimension: str
+    center_x: int   # Chunk coordinates
+    center_z: int
+    radius: int     # Chunks from the center to the edge of the square
+    batch: int = 8  # Side of the chunk square loaded per step
+
+    @property
+    def rings(self) -> int:
+        return max(0, math.ceil((self.radius - self.batch // 2) / self.batch))
+
+    @property
+    def total(self) -> int:
+        return (2 * self.rings + 1) ** 2
+
+    def square(self, index: int) -> Tuple[int, int, int, int]:
+        """Chunk bounds (x1, z1, x2, z2) of the index-th square of the spiral"""
+        i, j = spiral_offset(index)
+        x1 = self.center_x + i * self.batch - self.batch // 2
+        z1 = self.center_z + j * self.batch - self.batch // 2
+        return x1, z1, x1 + self.batch - 1, z1 + self.batch - 1
+
+    def covers(self, other: 'PregenArea') -> bool:
+        """Same spiral, so progress made on other carries over"""
+        return (self.dimension, self.center_x, self.center_z, self.batch) == \
+               (other.dimension, other.center_x, other.center_z, other.batch)
+
+class ChunkPregenerator:
+    """
+    Generates a square of chunks around a center through RCON, one batch at a time.
+
+    Each batch is force-loaded, given time to generate (confirmed with
+    `execute if loaded` where the server supports it) and released again. The
+    pause between batches follows the measured load: it doubles while TPS or
+    MSPT are outside the limits and shrinks back while they are healthy.
+    Progress is checkpointed to a JSON file after every batch, so a stopped run
+    resumes with the next batch, including across server restarts.
+    """
+
+    LOAD_COMMAND = "execute in {dimension} run forceload add {x1} {z1} {x2} {z2}"
+    UNLOAD_COMMAND = "execute in {dimension} run forceload remove {x1} {z1} {x2} {z2}"
+    LOADED_COMMAND = "execute in {dimension} if loaded {x} 0 {z}"
+
+    def __init__(self, rcon, state_path: str, logger,
+                 min_tps: float = 18, max_mspt: float = 40,
+                 min_delay: float = 0.5, max_delay: float = 30, batch_timeout: float = 60,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rcon = rcon
+        self.state_path = state_path
+        self.logger = logger
+        self.min_tps = min_tps
+        self.max_mspt = max_mspt
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.batch_timeout = batch_timeout
+        self.clock = clock
+        self.area: Optional[PregenArea] = None
+        self.next_index = 0
+        self.active: Optional[Tuple[int, int, int, int]] = None  # Batch still force-loaded
+        self.delay = min_delay
+        self.last_report: Optional[TickReport] = None
+        self._can_check_loaded = True
+        self._stop = asyncio.Event()
+        self._load()
+
+    @property
+    def done(self) -> bool:
+        return self.area is not None and self.next_index >= self.area.total
+
+    @property
+    def progress(self) -> float:
+        if self.area is None:
+            return 0.0
+        return min(1.0, self.next_index / self.area.total)
+
+    def _load(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.area = PregenArea(**state['area'])
+            self.next_index = state['next']
+            self.active = tuple(state['active']) if state.get('active') else None
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.error(f"Ignoring unreadable pregeneration checkpoint: {e}")
+
+    def _save(self):
+        state = {
+            'area': asdict(self.area),
+            'next': self.next_index,
+            'active': list(self.active) if self.active else None,
+            'updated': time.time()
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        temp = f"{self.state_path}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp, self.state_path)
+
+    def plan(self, area: PregenArea):
+        """Set the target area; progress is kept when only the radius changed"""
+        if self.area is None or not self.area.covers(area):
+            if self.area is not None:
+                self.logger.info("Pregeneration area moved, starting over")
+            self.next_index = 0
+        self.area = area
+
+    def stop(self):
+        self._stop.set()
+
+    def _format(self, template: str, bounds: Tuple[int, int, int, int]) -> str:
+        x1, z1, x2, z2 = bounds
+        return template.format(dimension=self.area.dimension, x1=x1 * 16, z1=z1 * 16, x2=x2 * 16, z2=z2 * 16)
+
+    async def _release(self):
+        if self.active is None:
+            return
+        if await self.rcon.send_command(self._format(self.UNLOAD_COMMAND, self.active)) is None:
+            raise ConnectionError("Failed to release force-loaded chunks")
+        self.active = None
+        self._save()
+
+    async def _all_loaded(self, bounds: Tuple[int, int, int, int]) -> Optional[bool]:
+        """True once every corner chunk is fully loaded, None if the server cannot tell"""
+        x1, z1, x2, z2 = bounds
+        for x, z in ((x1, z1), (x1, z2), (x2, z1), (x2, z2)):
+            response = await self.rcon.send_command(
+                self.LOADED_COMMAND.format(dimension=self.area.dimension, x=x * 16, z=z * 16)
+            )
+            if response is None or 'Test' not in response:
+                return None
+            if 'passed' not in response:
+                return False
+        return True
+
+    async def _wait_generated(self, bounds: Tuple[int, int, int, int]) -> bool:
+        """Wait until the batch is generated; False if stopped first"""
+        deadline = self.clock() + self.batch_timeout
+        while self.clock() < deadline:
+            if await self._sleep(self.min_delay):
+                return False
+            if not self._can_check_loaded:
+                # Older servers: give the batch the current pause as generation time
+                return not await self._sleep(self.delay)
+            loaded = await self._all_loaded(bounds)
+            if loaded is None:
+                self._can_check_loaded = False
+            elif loaded:
+                return True
+        self.logger.warning(f"Chunks {bounds} not loaded within {self.batch_timeout}s, moving on")
+        return True
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleep unless stopped; True if stop() was called"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _measure(self) -> Optional[TickReport]:
+        report = parse_forge_tps(await self.rcon.send_command("forge tps"))
+        if report is not None:
+            self.last_report = report
+        return report
+
+    def _healthy(self, report: Optional[TickReport]) -> bool:
+        if report is None:
+            return True
+        mspt = report.dimensions.get(self.area.dimension, report.mspt)
+        return report.tps >= self.min_tps and max(report.mspt, mspt) <= self.max_mspt
+
+    async def run(self, should_continue: Callable[[], bool] = lambda: True,
+                  on_batch: Optional[Callable[[int], None]] = None) -> str:
+        """Generate until done, stopped or should_continue() turns false; returns DONE, STOPPED or FAILED"""
+        if self.area is None:
+            raise ValueError("No pregeneration area planned")
+        self._stop.clear()
+        chunks = self.area.batch * self.area.batch
+        try:
+            # A run that ended abruptly may have left its batch force-loaded
+            await self._release()
+            while not self.done:
+                if self._stop.is_set() or not should_continue():
+                    return STOPPED
+
+                report = await self._measure()
+                if not self._healthy(report):
+                    self.delay = min(self.max_delay, self.delay * 2)
+                    if await self._sleep(self.delay):
+                        return STOPPED
+                    continue
+                self.delay = max(self.min_delay, self.delay * 0.75)
+
+                bounds = self.area.square(self.next_index)
+                response = await self.rcon.send_command(self._format(self.LOAD_COMMAND, bounds))
+                if response is None:
+                    self.logger.error("Pregeneration stopped: RCON unavailable")
+                    return FAILED
+                # Already force-loaded by someone else: loaded, and not ours to release
+                if 'No chunks' not in response:
+                    self.active = bounds
+                    self._save()
+                    finished = await self._wait_generated(bounds)
+                    await self._release()
+                    if not finished:
+                        return STOPPED
+
+                self.next_index += 1
+                self._save()
+                if on_batch:
+                    on_batch(chunks)
+                if await self._sleep(self.delay):
+                    return STOPPED
+            return DONE
+        except ConnectionError as e:
+            self.logger.error(f"Pregeneration stopped: {e}")
+            return FAILED
+        finally:
+            if self.active is not None:
+                try:
+                    await asyncio.shield(self._release())
+                except Exception as e:
+                    self.logger.error(f"Could not release chunks {self.active}: {e}")
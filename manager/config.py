@@ -1,15 +1,47 @@
+import os
 from datetime import time
+from typing import List
 
 class ServerConfig:
+    # Multi-Server Settings
+    SERVER_NAME = 'default'
+    # One dict per managed server. Keys override any setting in this class for
+    # that server only, e.g.
+    #   {'SERVER_NAME': 'atm9', 'SERVER_DIR': r'D:\servers\atm9', 'PORT': 25576,
+    #    'GAME_PORT': 25566, 'RCON_PASSWORD': '...', 'START_TIME': time(18, 0)}
+    # Leave empty to manage the single server described by this class.
+    SERVERS = []
+    MAX_CONCURRENT_STARTS = 1  # Servers allowed to cold-load at the same time
+
     # Server Settings
     HOST = '127.0.0.1'
     PORT = 25575
     RCON_PASSWORD = 'your_rcon_password'
+    RCON_TIMEOUT = 5  # Per-command timeout in seconds
+    GAME_PORT = 25565  # server-port from server.properties, used by the wake listener
+
+    # Server Files
+    SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    SERVER_SCRIPT = 'server.bat'  # Launch script, relative to SERVER_DIR
+    SERVER_LOG = os.path.join('logs', 'latest.log')  # Relative to SERVER_DIR
+    LOG_POLL_INTERVAL = 0.5  # Log tail interval when inotify is unavailable
+
+    # Process Detection
+    JAVA_PROCESS_NAMES = ['java.exe', 'javaw.exe', 'java']
+    SERVER_CMDLINE_PATTERN = 'forge'  # Fallback match when the tracked PID is lost
 
     # Schedule Settings
     START_TIME = time(17, 0)  # Server start time
     END_TIME = time(2, 0)    # Server end time
     SHUTDOWN_WARNINGS = [30, 15, 10, 5, 3, 1]  # Warning intervals in minutes
+    SHUTDOWN_GRACE = 120      # Seconds to wait for the JVM to exit after `stop`
+    SHUTDOWN_KILL_GRACE = 15  # Seconds between terminating and killing the process tree
+    RESTART_TIMES = []        # Daily planned restarts while running, e.g. [time(6, 0)]
+    RESTART_WARNINGS = [5, 1]  # Countdown before a planned restart, in minutes
+    RESTART_PREWARM_MB = 256  # Server jars read into the OS cache during the restart countdown
+    COUNTDOWN_SECONDS = 10    # Final countdown after the last minute warning
+    COUNTDOWN_STYLE = 'chat'  # Final countdown as 'chat' messages, a held 'title' or the 'actionbar'
+    COUNTDOWN_MARKS = []      # Final seconds announced, e.g. [10, 5, 3, 2, 1]; empty = every second (fewer for titles)
     
     # 24/7 Operation Days Configuration
     # Monday = 0, Tuesday = 1, Wednesday = 2, Thursday = 3
@@ -17,29 +49,219 @@ class ServerConfig:
     TWENTYFOUR_HOUR_DAYS = [5, 6]  # Default: Saturday and Sunday
 
     # Monitoring Settings
-    MONITOR_REFRESH = 5    # Status check interval
+    MONITOR_REFRESH = 5    # Status check interval under normal load
+    MONITOR_MIN_INTERVAL = 0.5   # Fastest sampling while TPS/MSPT or memory is deteriorating
+    MONITOR_MAX_INTERVAL = 60    # Slowest sampling while empty and stable
+    MONITOR_RCON_BUDGET = 120    # Max RCON commands per minute spent on sampling
+    MONITOR_MSPT_RISE = 5        # Tick time increase (ms) between samples that tightens sampling
+    MONITOR_MEMORY_RATE = 20     # Memory growth (MB/s) that tightens sampling
     DISPLAY_REFRESH = 1    # Display update interval
+    STATUS_BUS_NAME = 'mc_server_status'  # Shared-memory region the monitor window reads
+
+    # Lag Spike Detection (per-dimension mean tick time from `forge tps`)
+    LAG_SPIKE_MSPT = 50        # A spike must reach this many ms per tick (50 ms = below 20 TPS)
+    LAG_SPIKE_RATIO = 1.5      # ...and exceed the dimension's moving average by this factor
+    LAG_EWMA_ALPHA = 0.2       # Weight of the newest sample in the moving average
+    LAG_SPIKE_COOLDOWN = 300   # Seconds before the same dimension is reported again
+
+    # Thread Profiling (per-thread JVM CPU, taken when TPS drops)
+    THREAD_PROFILE_ENABLED = True
+    THREAD_PROFILE_TPS = 15            # TPS below this triggers a report (as do lag spikes and "Can't keep up!")
+    THREAD_PROFILE_SECONDS = 2         # Window over which thread CPU is measured
+    THREAD_PROFILE_TOP = 8             # Busiest threads listed in a report
+    THREAD_PROFILE_COOLDOWN = 300      # Seconds between reports
+    THREAD_PROFILE_MAX_THREADS = 1024  # Threads read per sample at most
+
+    # Metrics Endpoint (OpenMetrics, GET /metrics)
+    METRICS_ENABLED = True
+    METRICS_HOST = '127.0.0.1'
+    METRICS_PORT = 9225
+
+    # Manager Logs (shared by every server; written by a background thread)
+    LOG_DIR = 'logs'
+    LOG_LEVEL = 'INFO'
+    LOG_MAX_BYTES = 20 * 1024 * 1024  # Continue in {name}_{date}.1.log and so on beyond this size
+    LOG_RETENTION_DAYS = 30           # Older log files are deleted
+    LOG_COMPRESS = True               # Gzip log files once they are finished
+    LOG_JSON = False                  # Also write {name}_{date}.jsonl with structured event fields
+    LOG_QUEUE_SIZE = 10000            # Records held for the writer thread before they are dropped
+    MONITOR_WINDOW_LOG_PREFIX = 'window_'  # The monitor window process writes window_monitor_{date}.log etc.
+
+    # Resource Governor (placement of the server JVM and reaction to memory/CPU pressure)
+    GOVERNOR_ENABLED = True
+    SERVER_HEAP_MB = 0                  # Max heap (-Xmx) in MB; 0 reads it from the JVM command line
+    GOVERNOR_CPU_AFFINITY = []          # Logical CPUs the JVM may use, e.g. [2, 3, 4, 5]; empty leaves it alone
+    GOVERNOR_PRIORITY = ''              # 'below_normal', 'normal', 'above_normal' or 'high'; empty leaves it alone
+    GOVERNOR_IO_PRIORITY = ''           # 'low', 'normal' or 'high'; empty leaves it alone
+    GOVERNOR_RSS_WARN = 1.25            # Resident memory, as a multiple of the heap, that is elevated
+    GOVERNOR_RSS_CRITICAL = 1.5         # ...and that is critical
+    GOVERNOR_CPU_BUSY = 70              # Percent of the usable cores shown as busy
+    GOVERNOR_CPU_SATURATED = 90         # Percent of the usable cores that counts as saturated
+    GOVERNOR_WINDOW = 600               # Seconds of samples behind the memory and CPU trends
+    GOVERNOR_HORIZON = 30               # Minutes within which projected memory may reach the critical level
+    GOVERNOR_SUSTAINED = 0.8            # Share of the window spent saturated that counts as sustained
+    GOVERNOR_MIN_TPS = 15               # Saturated CPU with TPS below this is critical
+    GOVERNOR_ESCALATE_MINUTES = 10      # Critical pressure this long after a step takes the next step
+    GOVERNOR_RESTART_MAX_PLAYERS = 1    # A pressure restart waits until at most this many players are online...
+    GOVERNOR_RESTART_WAIT = 30          # ...but no longer than this many minutes
+
+    # Status History Settings
+    HISTORY_DIR = 'history'
+    HISTORY_RAW_DAYS = 14      # Retention at MONITOR_REFRESH resolution
+    HISTORY_MINUTE_DAYS = 30   # Retention of 1-minute min/mean/max rollups
+    HISTORY_HOUR_DAYS = 730    # Retention of 1-hour min/mean/max rollups
     HEALTH_CHECK_INTERVAL = 60  # Health check interval
+    STARTUP_TIMEOUT = 300  # Seconds to wait for the server to accept RCON after launch
+
+    # Player Sessions (join/leave history in HISTORY_DIR, `python player_sessions.py` for the report)
+    SESSIONS_ENABLED = True
+    SESSIONS_FILE = 'sessions.sqlite3'
+    SESSIONS_FLUSH_SECONDS = 60   # Session changes are written in one batch this often
+    SCHEDULE_COVERAGE = 0.95      # Share of player-hours a recommended schedule must cover
 
     # Autosave Settings
-    AUTOSAVE_WARNINGS = [5, 3, 1]  # Warning intervals in minutes
+    AUTOSAVE_INTERVAL = 30        # Minutes of player activity before a save is due
+    AUTOSAVE_MAX_DEFER = 15       # Minutes a due save may wait for TPS to recover
+    AUTOSAVE_MIN_TPS = 18         # Due saves are deferred below this TPS
+    AUTOSAVE_CHECK_INTERVAL = 60  # Seconds between autosave checks
+    AUTOSAVE_TIMEOUT = 300        # Seconds to wait for the server to confirm a save
+    AUTOSAVE_WARNINGS = []        # Optional countdown before each save, in minutes (e.g. [5, 3, 1])
+
+    # Backup Settings
+    BACKUP_ENABLED = True
+    WORLD_DIR = 'world'        # Relative to SERVER_DIR
+    BACKUP_DIR = 'backups'     # Relative to SERVER_DIR unless absolute
+    BACKUP_INTERVAL = 60       # Minimum minutes between backups taken after autosaves
+    BACKUP_BEFORE_STOP = True  # Save and back up right before a scheduled shutdown
+    BACKUP_WORKERS = 0         # Hashing processes, 0 = one per CPU
+    BACKUP_KEEP_HOURLY = 24    # Newest snapshot of each of the last N hours
+    BACKUP_KEEP_DAILY = 7      # ...of each of the last N days
+    BACKUP_KEEP_WEEKLY = 4     # ...of each of the last N weeks
+
+    # Idle Suspend (stop an empty server and start it again on the first login)
+    IDLE_SUSPEND_ENABLED = False
+    IDLE_SUSPEND_MINUTES = 15         # Minutes without players before suspending
+    IDLE_SUSPEND_24H_DAYS = True      # Also suspend on TWENTYFOUR_HOUR_DAYS
+    WAKE_LISTEN_HOST = '0.0.0.0'      # Address the wake listener binds to while suspended
+
+    # World Maintenance (region analysis and chunk pruning, only while the server is stopped)
+    WORLD_MAINTENANCE_ENABLED = False  # Off-hours region report
+    WORLD_MAINTENANCE_INTERVAL = 24    # Hours between runs
+    ANALYZER_WORKERS = 0               # Region scanning processes, 0 = one per CPU
+    CHUNK_PRUNE_ENABLED = False        # Also prune chunks below the thresholds below
+    CHUNK_PRUNE_DRY_RUN = True         # Only report what pruning would remove
+    CHUNK_PRUNE_MIN_INHABITED = 1200   # Keep chunks players spent at least this many ticks near (1200 = 1 min)
+    CHUNK_PRUNE_MIN_AGE_HOURS = 24     # ...or that were updated within this much game time
+    CHUNK_PRUNE_KEEP_RADIUS = 64       # Chunks around spawn that are never pruned (the pregen area is always kept)
+
+    # Chunk Pre-generation (while nobody is online)
+    PREGEN_ENABLED = False
+    PREGEN_CENTER = 'spawn'            # 'spawn', 'border' (world border center and size) or (x, z) in blocks
+    PREGEN_RADIUS = 2000               # Blocks from the center; also caps the world border radius
+    PREGEN_DIMENSION = 'minecraft:overworld'
+    PREGEN_BATCH = 8                   # Side of each force-loaded chunk square (max 16)
+    PREGEN_MIN_TPS = 18                # Back off below this TPS
+    PREGEN_MAX_MSPT = 40               # ...or above this tick time
+    PREGEN_MAX_DELAY = 30              # Longest pause between batches in seconds
+    PREGEN_IDLE_MINUTES = 10           # Minutes without players before starting
+    PREGEN_STOP_LEAD = 5               # Stop this many minutes before the shutdown sequence
+    PREGEN_OFF_HOURS = False           # Start the server outside operating hours to pre-generate
+    PREGEN_STATE_FILE = 'pregen.json'  # Progress checkpoint, relative to SERVER_DIR
 
     # Discord Webhook Settings
     DISCORD_ENABLED = True
     WEBHOOK_ID = 'your_webhook_id'
     WEBHOOK_TOKEN = 'your_webhook_token'
     THREAD_ID = ''  # Optional, leave empty if not using threads
+    WEBHOOK_URL = ''  # Optional full URL override (e.g. a local test endpoint)
+    DISCORD_TIMEOUT = 10  # HTTP timeout in seconds
+    DISCORD_COALESCE_SECONDS = 2  # Messages within this window are sent as one post
+    DISCORD_QUEUE_SIZE = 50  # Oldest messages are dropped beyond this while Discord is unreachable
 
     # Message Templates
     SERVER_START_MSG = "§a[Notice] §fServer is now running!"
     SHUTDOWN_WARNING_MSG = "§e[Notice] §fServer will shutdown in {minutes} minutes"
     SHUTDOWN_COUNTDOWN_MSG = "§e[Notice] §fShutdown in {seconds} seconds!"
+    RESTART_WARNING_MSG = "§e[Notice] §fServer will restart in {minutes} minutes"
+    RESTART_COUNTDOWN_MSG = "§e[Notice] §fRestarting in {seconds} seconds!"
+    SHUTDOWN_CANCELLED_MSG = "§a[Notice] §fShutdown cancelled"
+    RESTART_CANCELLED_MSG = "§a[Notice] §fRestart cancelled"
+    NOTHING_TO_CANCEL_MSG = "§7[Notice] §fNo shutdown, restart or save is pending"
+    POSTPONE_DEFAULT_MINUTES = 10  # "say !postpone" without minutes
     AUTOSAVE_WARNING_MSG = "§7[Notice] §fServer will save in {minutes} minutes"
     AUTOSAVE_COUNTDOWN_MSG = "§7[Notice] §fSaving in {seconds} seconds!"
     AUTOSAVE_START_MSG = "§7[Notice] §fSaving server..."
-    AUTOSAVE_COMPLETE_MSG = "§7[Notice] §fServer save complete!"
+    AUTOSAVE_COMPLETE_MSG = "§7[Notice] §fServer save complete! ({seconds:.1f}s)"
+
+    SLEEPING_MOTD = "§7Server is sleeping - join to wake it up"
+    WAKE_KICK_MSG = "Server is starting, please reconnect in a minute"
 
     # Discord Message Templates
     DISCORD_SERVER_START = "🟢 Server has started"
     DISCORD_SERVER_STOP = "🔴 Server has stopped"
+    DISCORD_SHUTDOWN_CANCELLED = "⏸️ Shutdown cancelled by {source}, running until {until:%Y-%m-%d %H:%M}"
+    DISCORD_SERVER_RESTART = "🔄 Server restarted ({downtime:.1f}s downtime)"
+    DISCORD_SERVER_SUSPEND = "💤 Server suspended after {minutes} idle minutes"
+    DISCORD_SERVER_WAKE = "⏰ {player} is waking the server up"
     DISCORD_SERVER_CRASH = "⚠️ Server crashed unexpectedly. Attempting restart..."
+    DISCORD_SERVER_ERROR = "⚠️ Server reported a crash: {message}"
+    DISCORD_BACKUP_FAILED = "⚠️ World backup failed: {error}"
+    DISCORD_PREGEN_DONE = "🗺️ Chunk pre-generation finished ({chunks} chunks)"
+    DISCORD_RESOURCE_WARNING = "🧠 Server under resource pressure: {reason}"
+    DISCORD_RESOURCE_RESTART = "🔄 Restarting to relieve resource pressure: {reason}"
+    DISCORD_LAG_SPIKE = "🐢 Lag spike in {dimension}: {mspt:.1f} ms/tick (usual {baseline:.1f} ms, TPS {tps:.1f})"
+
+    def world_path(self) -> str:
+        return os.path.join(self.SERVER_DIR, self.WORLD_DIR)
+
+    def backup_path(self) -> str:
+        return os.path.join(self.SERVER_DIR, self.BACKUP_DIR)
+
+    def pregen_state_path(self) -> str:
+        return os.path.join(self.SERVER_DIR, self.PREGEN_STATE_FILE)
+
+    def log_name(self, component: str) -> str:
+        """Logger name for a component, suffixed with the server name when it is not the default"""
+        if self.SERVER_NAME == ServerConfig.SERVER_NAME:
+            return component
+        return f"{component}_{self.SERVER_NAME}"
+
+    @classmethod
+    def for_server(cls, definition: dict) -> 'ServerConfig':
+        """Config instance with one server definition applied on top of the class defaults"""
+        name = definition.get('SERVER_NAME')
+        if not name:
+            raise ValueError(f"Server definition without SERVER_NAME: {definition}")
+        config = cls()
+        for key, value in definition.items():
+            if not hasattr(cls, key) or key in ('SERVERS', 'MAX_CONCURRENT_STARTS'):
+                raise ValueError(f"Unknown setting {key} for server {name}")
+            setattr(config, key, value)
+        # Per-server state must not collide between instances
+        if 'STATUS_BUS_NAME' not in definition:
+            config.STATUS_BUS_NAME = f"{cls.STATUS_BUS_NAME}_{name}"
+        if 'HISTORY_DIR' not in definition:
+            config.HISTORY_DIR = os.path.join(cls.HISTORY_DIR, name)
+        return config
+
+    @classmethod
+    def servers(cls) -> List['ServerConfig']:
+        if not cls.SERVERS:
+            return [cls()]
+        configs = [cls.for_server(definition) for definition in cls.SERVERS]
+        # Each server's game port is also where its wake listener binds while it is suspended
+        for attribute in ('SERVER_NAME', 'SERVER_DIR', 'STATUS_BUS_NAME', 'GAME_PORT'):
+            values = [getattr(config, attribute) for config in configs]
+            if len(set(values)) != len(values):
+                raise ValueError(f"{attribute} must be unique per server")
+        endpoints = [(config.HOST, config.PORT) for config in configs]
+        if len(set(endpoints)) != len(endpoints):
+            raise ValueError("Each server needs its own RCON endpoint")
+        return configs
+
+    @classmethod
+    def find(cls, name: str) -> 'ServerConfig':
+        for config in cls.servers():
+            if config.SERVER_NAME == name:
+                return config
+        raise ValueError(f"Unknown server: {name}")
@@ -0,0 +1,180 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from timer_scheduler import Clock
+
+# Final countdown styles
+CHAT = 'chat'
+TITLE = 'title'
+ACTIONBAR = 'actionbar'
+
+# Announcement: seconds before the end, and the commands that make it
+Announcement = Tuple[float, List[str]]
+# A held title needs far fewer updates than chat lines
+_TITLE_MARKS = (30, 20, 10, 5, 3, 2, 1)
+
+def _text(message: str) -> str:
+    return json.dumps({'text': message}, ensure_ascii=False)
+
+@dataclass
+class CountdownPlan:
+    """What a countdown announces: minute warnings in chat, then a final countdown in the given style"""
+    warnings: List[float]          # Minutes before the end
+    warning_msg: str               # Formatted with {minutes}
+    countdown_msg: str             # Formatted with {seconds}
+    final_seconds: int = 10
+    style: str = CHAT
+    marks: List[int] = field(default_factory=list)  # Final seconds to announce; empty means a default per style
+    cancel_msg: str = ''
+
+    @property
+    def length(self) -> float:
+        return max(self.warnings, default=0) * 60
+
+    def warning(self, minutes: float) -> List[str]:
+        return [f"say {self.warning_msg.format(minutes=minutes)}"]
+
+    def final(self, seconds: int, hold: float, timing: bool = True) -> List[str]:
+        """Commands for `seconds` left, shown for `hold` seconds until the next mark replaces it"""
+        message = self.countdown_msg.format(seconds=seconds)
+        if self.style == TITLE:
+            # A title stays up for its own duration, so one command covers the gap to the next mark;
+            # the display time persists on the client and is only sent when it changes
+            title = [f"title @a title {_text(message)}"]
+            return ([f"title @a times 0 {max(1, round(hold * 20))} 10"] if timing else []) + title
+        if self.style == ACTIONBAR:
+            return [f"title @a actionbar {_text(message)}"]
+        return [f"say {message}"]
+
+    def announcements(self) -> List[Announcement]:
+        """Everything to send, latest deadline first"""
+        length = self.length
+        result = [(minutes * 60, self.warning(minutes)) for minutes in sorted(set(self.warnings), reverse=True)]
+        marks = self.marks or (_TITLE_MARKS if self.style == TITLE else range(1, self.final_seconds + 1))
+        marks = sorted({s for s in marks if 0 < s <= self.final_seconds and s < length}, reverse=True)
+        held = None
+        for index, seconds in enumerate(marks):
+            hold = seconds - (marks[index + 1] if index + 1 < len(marks) else 0)
+            result.append((seconds, self.final(seconds, hold, hold != held)))
+            held = hold
+        return result
+
+class Countdown:
+    """
+    Announcements against one absolute deadline on the monotonic clock.
+
+    Every announcement is due at `deadline - remaining`, worked out afresh
+    from the clock on each wakeup, so neither RCON latency nor a late
+    wakeup accumulates over the countdown. Sends never hold up the timing:
+    they go to a one-slot outbox drained by a sender task, and an
+    announcement that is still waiting when the next one falls due is
+    replaced by it, so a stalled connection shows players the current time
+    left instead of a burst of stale ones once it recovers. cancel() ends
+    the countdown early and reschedule() moves the deadline, announcing the
+    new time left at once.
+    """
+
+    DRAIN_TIMEOUT = 2.0
+
+    def __init__(self, plan: CountdownPlan, send: Callable[[str], Awaitable],
+                 clock: Optional[Clock] = None, logger=None):
+        self.plan = plan
+        self.send = send
+        self.clock = clock or Clock()
+        self.logger = logger
+        self.deadline: Optional[float] = None
+        self.cancelled = False
+        self.dropped = 0
+        self._pending = plan.announcements()
+        self._changed = asyncio.Event()
+        self._outbox: Optional[List[str]] = None
+        self._outbox_due = 0.0
+        self._outbox_ready = asyncio.Event()
+        self._closing = False
+
+    def remaining(self) -> float:
+        if self.deadline is None:
+            return self.plan.length
+        return max(0.0, self.deadline - self.clock.monotonic())
+
+    def cancel(self):
+        """End the countdown; run() returns False"""
+        self.cancelled = True
+        self._changed.set()
+
+    def reschedule(self, seconds: float):
+        """Move the end to `seconds` from now"""
+        if self.deadline is None:
+            return
+        seconds = max(0.0, seconds)
+        self.deadline = self.clock.monotonic() + seconds
+        self._pending = [item for item in self.plan.announcements() if item[0] <= seconds]
+        # Tell players the new time unless a planned announcement is due right away anyway
+        if seconds >= self.plan.final_seconds and not (self._pending and self._pending[0][0] >= seconds - 1):
+            self._post(self.plan.warning(max(1, round(seconds / 60))), seconds)
+        self._changed.set()
+
+    def _post(self, commands: List[str], due: float):
+        if self._outbox is not None:
+            if abs(self._outbox_due - due) < 0.5:
+                # Due together (a minute warning on a countdown mark): send both
+                self._outbox = self._outbox + commands
+                self._outbox_ready.set()
+                return
+            self.dropped += 1
+            if self.logger:
+                self.logger.debug(f"Countdown announcement superseded: {self._outbox[-1]}")
+        self._outbox = commands
+        self._outbox_due = due
+        self._outbox_ready.set()
+
+    async def _sender(self):
+        while True:
+            await self._outbox_ready.wait()
+            self._outbox_ready.clear()
+            commands, self._outbox = self._outbox, None
+            for command in commands or ():
+                try:
+                    await self.send(command)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"Countdown announcement failed: {e}")
+            if self._closing and self._outbox is None:
+                return
+
+    async def _drain(self, sender: asyncio.Task):
+        self._closing = True
+        self._outbox_ready.set()
+        done, _ = await asyncio.wait({sender}, timeout=self.DRAIN_TIMEOUT)
+        if not done:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+
+    async def run(self) -> bool:
+        """Announce until the deadline; True once it is reached, False when cancelled"""
+        self.deadline = self.clock.monotonic() + self.plan.length
+        sender = asyncio.get_running_loop().create_task(self._sender())
+        try:
+            while not self.cancelled:
+                remaining = self.deadline - self.clock.monotonic()
+                if self._pending and self._pending[0][0] >= remaining:
+                    due, commands = self._pending.pop(0)
+                    self._post(commands, due)
+                    continue
+                if remaining <= 0:
+                    return True
+                due = self._pending[0][0] if self._pending else 0.0
+                self._changed.clear()
+                await self.clock.wait(self._changed, remaining - due)
+            return False
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        finally:
+            if self.cancelled:
+                self._outbox = None
+                if self.plan.cancel_msg:
+                    self._post([f"say {self.plan.cancel_msg}"], 0.0)
+            await asyncio.shield(self._drain(sender))
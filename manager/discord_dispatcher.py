@@ -0,0 +1,200 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, List, Optional, Tuple
+import requests
+
+DISCORD_CONTENT_LIMIT = 2000
+
+class DiscordDispatcher:
+    """
+    Background webhook sender.
+
+    Messages are queued without waiting on the network. A single worker drains
+    the queue, merges everything that arrives within the coalesce window into one
+    post, and honours Discord's 429 Retry-After and per-bucket rate-limit headers.
+    When Discord is unreachable the queue is bounded and the oldest messages are
+    dropped first.
+    """
+
+    def __init__(self, url: str, logger,
+                 queue_size: int = 50,
+                 coalesce_window: float = 2.0,
+                 timeout: float = 10.0,
+                 max_retries: int = 5):
+        self.url = url
+        self.logger = logger
+        self.queue_size = queue_size
+        self.coalesce_window = coalesce_window
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self._queue: Deque[Tuple[float, str]] = deque()
+        self._event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._session = requests.Session()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='discord')
+        self._bucket_reset = 0.0
+        self._posting = False
+
+        self.sent_messages = 0
+        self.sent_posts = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._latency_total = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> dict:
+        return {
+            'queue_depth': self.queue_depth,
+            'sent_messages': self.sent_messages,
+            'sent_posts': self.sent_posts,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'last_latency': self.last_latency,
+            'max_latency': self.max_latency,
+            'avg_latency': self._latency_total / self.sent_messages if self.sent_messages else 0.0,
+        }
+
+    def _ensure_started(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._event = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, message: str):
+        """Queue a message; must be called from the event loop thread"""
+        self._ensure_started()
+        if len(self._queue) >= self.queue_size:
+            self._queue.popleft()
+            self.dropped += 1
+            self.logger.warning("Discord queue full, dropping oldest message")
+        self._queue.append((time.monotonic(), message))
+        self._event.set()
+
+    async def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far has been delivered or dropped"""
+        deadline = time.monotonic() + timeout
+        while self._queue or self._posting:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.1)
+        return True
+
+    async def close(self, timeout: float = 10.0):
+        await self.flush(timeout)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+        self._session.close()
+
+    def _take_batch(self) -> List[Tuple[float, str]]:
+        batch = []
+        length = 0
+        while self._queue:
+            queued_at, message = self._queue[0]
+            extra = len(message) + (1 if batch else 0)
+            if batch and length + extra > DISCORD_CONTENT_LIMIT:
+                break
+            self._queue.popleft()
+            batch.append((queued_at, message[:DISCORD_CONTENT_LIMIT]))
+            length += extra
+        return batch
+
+    async def _run(self):
+        while True:
+            if not self._queue:
+                self._event.clear()
+                await self._event.wait()
+
+            # Let a burst (e.g. crash followed by start) settle into one post
+            await asyncio.sleep(self.coalesce_window)
+
+            while self._queue:
+                batch = self._take_batch()
+                self._posting = True
+                try:
+                    delivered = await self._deliver('\n'.join(message for _, message in batch))
+                finally:
+                    self._posting = False
+
+                now = time.monotonic()
+                if delivered:
+                    self.sent_posts += 1
+                    for queued_at, _ in batch:
+                        latency = now - queued_at
+                        self.sent_messages += 1
+                        self._latency_total += latency
+                        self.last_latency = latency
+                        self.max_latency = max(self.max_latency, latency)
+                else:
+                    self.failed += len(batch)
+
+    async def _deliver(self, content: str) -> bool:
+        loop = asyncio.get_running_loop()
+        backoff = 1.0
+
+        for attempt in range(self.max_retries):
+            wait = self._bucket_reset - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            try:
+                response = await loop.run_in_executor(
+                    self._executor, self._post, content
+                )
+            except requests.RequestException as e:
+                self.logger.error(f"Error sending Discord webhook: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+
+            self._update_bucket(response)
+
+            if response.status_code == 429:
+                retry_after = self._retry_after(response)
+                self.logger.warning(f"Discord rate limited, retrying in {retry_after:.1f}s")
+                await asyncio.sleep(retry_after)
+                continue
+
+            if response.status_code in (200, 204):
+                self.logger.info(f"Discord webhook sent: {content}")
+                return True
+
+            self.logger.error(f"Discord webhook send failed: {response.status_code}")
+            if response.status_code < 500:
+                return False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+        return False
+
+    def _post(self, content: str) -> requests.Response:
+        return self._session.post(self.url, json={"content": content}, timeout=self.timeout)
+
+    def _update_bucket(self, response: requests.Response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset_after = response.headers.get('X-RateLimit-Reset-After')
+        if remaining == '0' and reset_after:
+            try:
+                self._bucket_reset = time.monotonic() + float(reset_after)
+            except ValueError:
+                pass
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float:
+        try:
+            return max(float(response.json().get('retry_after', 0)), 0.0) or 1.0
+        except (ValueError, AttributeError):
+            pass
+        try:
+            return max(float(response.headers.get('Retry-After', 1)), 0.0)
+        except ValueError:
+            return 1.0
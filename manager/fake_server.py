@@ -0,0 +1,311 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from rcon_client import read_packet, encode_packet, PACKET_RESPONSE, PACKET_COMMAND, PACKET_LOGIN
+
+class LogWriter:
+    """Appends Minecraft-style console lines to a latest.log"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, message: str, thread: str = 'Server thread', level: str = 'INFO'):
+        self._file.write(f"[{time.strftime('%H:%M:%S')}] [{thread}/{level}] [minecraft/DedicatedServer]: {message}\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class FakeRconServer:
+    """
+    Local stand-in for a Minecraft server's RCON port.
+
+    Answers the commands the manager sends with canned vanilla/Forge
+    responses. Every reply is delayed by latency (plus up to jitter), every
+    stall_every-th command hangs for stall_seconds and every
+    disconnect_every-th command drops the connection instead of answering.
+    Received commands are kept with their loop-clock arrival time.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, password: str = '',
+                 latency: float = 0.0, jitter: float = 0.0,
+                 stall_every: int = 0, stall_seconds: float = 0.0, disconnect_every: int = 0,
+                 log: Optional[LogWriter] = None, on_stop: Optional[Callable[[], None]] = None):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.stall_every = stall_every
+        self.stall_seconds = stall_seconds
+        self.disconnect_every = disconnect_every
+        self.log = log
+        self.on_stop = on_stop
+        self.players: List[str] = []
+        self.max_players = 20
+        self.mspt = 12.0
+        self.save_seconds = 0.5
+        self.commands: List[Tuple[float, str]] = []
+        self._count = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._sessions: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # Let open sessions see EOF and finish instead of being cancelled at loop shutdown
+            sessions = dict(self._sessions)
+            for writer in sessions.values():
+                writer.close()
+            await asyncio.gather(*sessions, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def _tps(self) -> str:
+        tps = min(20.0, 1000 / self.mspt)
+        lines = [f"Dim minecraft:{name} (minecraft:{name}): Mean tick time: {self.mspt * share:.3f} ms. "
+                 f"Mean TPS: {min(20.0, 1000 / (self.mspt * share)):.3f}"
+                 for name, share in (('overworld', 0.6), ('the_nether', 0.25), ('the_end', 0.15))]
+        lines.append(f"Overall: Mean tick time: {self.mspt:.3f} ms. Mean TPS: {tps:.3f}")
+        return '\n'.join(lines)
+
+    async def respond(self, command: str) -> str:
+        if command == 'list':
+            return (f"There are {len(self.players)} of a max of {self.max_players} players online: "
+                    f"{', '.join(self.players)}")
+        if command == 'forge tps':
+            return self._tps()
+        if command in ('save-off', 'save-on'):
+            state = 'disabled' if command == 'save-off' else 'enabled'
+            return f"Automatic saving is now {state}"
+        if command.startswith('save-all'):
+            await asyncio.sleep(self.save_seconds)
+            if self.log:
+                self.log.write("Saved the game")
+            return "Saving the game (this may take a moment!)Saved the game"
+        if command.startswith('say ') or command.startswith('title ') or command.startswith('tellraw '):
+            if self.log and command.startswith('say '):
+                self.log.write(f"[Rcon] {command[4:]}")
+            return ''
+        if ' forceload ' in command:
+            return "Marked 64 chunks in minecraft:overworld to be force loaded"
+        if ' if loaded ' in command:
+            return "Test passed"
+        if command == 'stop':
+            if self.log:
+                self.log.write("Stopping the server")
+            if self.on_stop:
+                asyncio.get_running_loop().call_later(0.1, self.on_stop)
+            return "Stopping the server"
+        return "Unknown or incomplete command, see below for error"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        authenticated = False
+        self._sessions[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_id, packet_type, body = await read_packet(reader)
+                if packet_type == PACKET_LOGIN:
+                    authenticated = body == self.password
+                    writer.write(encode_packet(request_id if authenticated else -1, PACKET_COMMAND, ''))
+                elif not authenticated:
+                    return
+                elif packet_type == PACKET_COMMAND:
+                    self._count += 1
+                    self.commands.append((loop.time(), body))
+                    if self.disconnect_every and self._count % self.disconnect_every == 0:
+                        return
+                    delay = self.latency + random.uniform(0, self.jitter)
+                    if self.stall_every and self._count % self.stall_every == 0:
+                        delay += self.stall_seconds
+                    if delay:
+                        await asyncio.sleep(delay)
+                    writer.write(encode_packet(request_id, PACKET_RESPONSE, await self.respond(body)))
+                else:
+                    # The client's end-of-response sentinel is echoed back as is
+                    writer.write(encode_packet(request_id, PACKET_RESPONSE, ''))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._sessions.pop(asyncio.current_task(), None)
+            writer.close()
+
+class FakeWebhookServer:
+    """
+    Local stand-in for a Discord webhook endpoint.
+
+    Accepts JSON posts over HTTP/1.1 keep-alive and keeps their content with
+    the loop-clock arrival time. Every rate_limit_every-th post is refused
+    with 429 and retry_after seconds, in the body and the Retry-After header.
+    With bucket_size set, posts are counted per bucket_reset window like a
+    Discord route bucket: the last allowed one carries X-RateLimit-Remaining: 0
+    and anything beyond it is refused until the window ends.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 rate_limit_every: int = 0, retry_after: float = 1.0,
+                 bucket_size: int = 0, bucket_reset: float = 1.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.bucket_size = bucket_size
+        self.bucket_reset = bucket_reset
+        self.posts: List[Tuple[float, str]] = []
+        self.rejected: List[Tuple[float, float]] = []  # Arrival time, seconds the client was told to wait
+        self._count = 0
+        self._bucket_start = 0.0
+        self._bucket_used = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._sessions: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/webhooks/0/fake"
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            sessions = dict(self._sessions)
+            for writer in sessions.values():
+                writer.close()
+            await asyncio.gather(*sessions, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def respond(self, now: float, content: str) -> Tuple[int, dict, dict]:
+        """Status, headers and JSON body for a post arriving at loop time `now`"""
+        self._count += 1
+        if self.rate_limit_every and self._count % self.rate_limit_every == 0:
+            self.rejected.append((now, self.retry_after))
+            return 429, {'Retry-After': f"{self.retry_after:g}"}, {
+                'message': 'You are being rate limited.', 'retry_after': self.retry_after, 'global': False
+            }
+        headers = {}
+        if self.bucket_size:
+            if now - self._bucket_start >= self.bucket_reset:
+                self._bucket_start = now
+                self._bucket_used = 0
+            reset_after = max(0.0, self._bucket_start + self.bucket_reset - now)
+            if self._bucket_used >= self.bucket_size:
+                self.rejected.append((now, reset_after))
+                return 429, {'Retry-After': f"{reset_after:.3f}"}, {
+                    'message': 'You are being rate limited.', 'retry_after': reset_after, 'global': False
+                }
+            self._bucket_used += 1
+            headers = {
+                'X-RateLimit-Limit': str(self.bucket_size),
+                'X-RateLimit-Remaining': str(self.bucket_size - self._bucket_used),
+                'X-RateLimit-Reset-After': f"{reset_after:.3f}",
+            }
+        self.posts.append((now, content))
+        return 204, headers, {}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        self._sessions[asyncio.current_task()] = writer
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                try:
+                    content = json.loads(body or b'{}').get('content', '')
+                except ValueError:
+                    content = ''
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, extra, payload = self.respond(loop.time(), content)
+                data = json.dumps(payload).encode() if payload else b''
+                reason = {204: 'No Content', 429: 'Too Many Requests'}[status]
+                response = [f"HTTP/1.1 {status} {reason}", f"Content-Length: {len(data)}"]
+                if data:
+                    response.append('Content-Type: application/json')
+                response += [f"{name}: {value}" for name, value in extra.items()]
+                writer.write(('\r\n'.join(response) + '\r\n\r\n').encode('latin-1') + data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            self._sessions.pop(asyncio.current_task(), None)
+            writer.close()
+
+async def run_dummy_server(args):
+    """A process that looks enough like a Minecraft server to be started, tracked and stopped"""
+    log = LogWriter(os.path.join('logs', 'latest.log'))
+    log.write("Starting minecraft server version 1.20.1")
+    stopped = asyncio.Event()
+    rcon = FakeRconServer(
+        port=args.port, password=args.password, latency=args.latency, jitter=args.jitter,
+        stall_every=args.stall_every, stall_seconds=args.stall_seconds,
+        disconnect_every=args.disconnect_every, log=log, on_stop=stopped.set
+    )
+    rcon.mspt = args.mspt
+    await asyncio.sleep(args.startup)
+    await rcon.start()
+    log.write(f'Done ({args.startup:.3f}s)! For help, type "help"')
+
+    async def activity():
+        names = [f"Player{i}" for i in range(args.players)]
+        while True:
+            await asyncio.sleep(args.event_interval)
+            if names and random.random() < 0.5:
+                name = random.choice(names)
+                if name in rcon.players:
+                    rcon.players.remove(name)
+                    log.write(f"{name} left the game")
+                else:
+                    rcon.players.append(name)
+                    log.write(f"{name} joined the game")
+            if random.random() < args.lag_chance:
+                behind = random.randint(2000, 8000)
+                log.write(f"Can't keep up! Is the server overloaded? Running {behind}ms or {behind // 50} ticks behind",
+                          level='WARN')
+
+    task = asyncio.get_running_loop().create_task(activity())
+    await stopped.wait()
+    task.cancel()
+    await rcon.close()
+    log.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Dummy Minecraft server process for the manager to drive')
+    parser.add_argument('--port', type=int, default=25575, help='RCON port')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--startup', type=float, default=2.0, help='Seconds until RCON opens and Done is logged')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every RCON reply')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--stall-every', type=int, default=0, help='Every Nth command stalls')
+    parser.add_argument('--stall-seconds', type=float, default=0.0)
+    parser.add_argument('--disconnect-every', type=int, default=0, help='Every Nth command drops the connection')
+    parser.add_argument('--mspt', type=float, default=12.0)
+    parser.add_argument('--players', type=int, default=0, help='Simulated players joining and leaving')
+    parser.add_argument('--event-interval', type=float, default=5.0, help='Seconds between simulated log events')
+    parser.add_argument('--lag-chance', type=float, default=0.0, help="Chance of a Can't keep up! line per event")
+    asyncio.run(run_dummy_server(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import copy
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler
+from queue import Full
+from typing import Callable, Dict, Optional
+
+# Attributes every LogRecord has; anything else on a record came in through `extra`
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class DailyRotatingFileHandler(logging.Handler):
+    """
+    Appends to `{prefix}_{YYYYMMDD}{suffix}` and moves to a new file per day.
+
+    Within a day a file that grows past max_bytes is followed by
+    `{prefix}_{YYYYMMDD}.1{suffix}`, `.2` and so on. Closed files are
+    gzipped when compress is set, and files older than retention_days are
+    deleted. Each file must have a single writing process (see
+    LoggerSetup.set_file_prefix); one still held open elsewhere on Windows
+    is left uncompressed.
+    """
+
+    def __init__(self, directory: str, prefix: str, suffix: str = '.log',
+                 max_bytes: int = 0, retention_days: int = 0, compress: bool = True,
+                 clock: Callable[[], float] = time.time):
+        super().__init__()
+        self.directory = directory
+        self.prefix = prefix
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.compress = compress
+        self.clock = clock
+        self.path: Optional[str] = None
+        self._day: Optional[str] = None
+        self._index = 0
+        self._stream = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _file_name(self, day: str, index: int) -> str:
+        part = f".{index}" if index else ''
+        return os.path.join(self.directory, f"{self.prefix}_{day}{part}{self.suffix}")
+
+    def _open(self, day: str, index: Optional[int] = None):
+        if index is None:
+            # Resume the newest part of the day; a compressed part is a full one
+            index = 0
+            while any(os.path.exists(self._file_name(day, index + 1) + ext) for ext in ('', '.gz')):
+                index += 1
+            path = self._file_name(day, index)
+            if os.path.exists(path + '.gz') or (
+                    self.max_bytes and os.path.exists(path) and os.path.getsize(path) >= self.max_bytes):
+                index += 1
+        self._day = day
+        self._index = index
+        self.path = self._file_name(day, index)
+        self._stream = open(self.path, 'a', encoding='utf-8')
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _rollover(self, day: str):
+        closed = self.path
+        self._close_stream()
+        if self.compress:
+            self._compress(closed)
+        if self.retention_days:
+            self._prune()
+        self._open(day, self._index + 1 if day == self._day else None)
+
+    @staticmethod
+    def _compress(path: str):
+        target = path + '.gz'
+        temp = target + '.tmp'
+        try:
+            with open(path, 'rb') as source, gzip.open(temp, 'wb') as dest:
+                shutil.copyfileobj(source, dest)
+            # Still held open elsewhere (Windows): keep the plain file instead
+            os.remove(path)
+            os.replace(temp, target)
+        except OSError:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    def _prune(self):
+        cutoff = self.clock() - self.retention_days * 86400
+        # The date right after the prefix keeps other loggers sharing it (monitor_atm9) out
+        pattern = f"{glob.escape(self.prefix)}_{'[0-9]' * 8}*"
+        for path in glob.glob(os.path.join(glob.escape(self.directory), pattern)):
+            try:
+                if path != self.path and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            day = datetime.fromtimestamp(self.clock()).strftime('%Y%m%d')
+            if self._stream is None:
+                self._open(day)
+            elif day != self._day or (self.max_bytes and self._stream.tell() >= self.max_bytes):
+                self._rollover(day)
+            self._stream.write(self.format(record) + '\n')
+            self._stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            self._close_stream()
+        finally:
+            self.release()
+        super().close()
+
+class PerLoggerHandler(logging.Handler):
+    """Routes each record to a handler of its own logger, created on first use by factory(name)"""
+
+    def __init__(self, factory: Callable[[str], logging.Handler]):
+        super().__init__()
+        self.factory = factory
+        self._handlers: Dict[str, logging.Handler] = {}
+
+    def emit(self, record: logging.LogRecord):
+        handler = self._handlers.get(record.name)
+        if handler is None:
+            handler = self._handlers[record.name] = self.factory(record.name)
+        handler.handle(record)
+
+    def close(self):
+        for handler in self._handlers.values():
+            handler.close()
+        self._handlers.clear()
+        super().close()
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking or raising when the queue is full"""
+
+    def __init__(self, queue, on_drop: Optional[Callable[[], None]] = None):
+        super().__init__(queue)
+        self.on_drop = on_drop
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message now, as the arguments may change later, but keep the
+        # traceback in exc_text so the JSON output can carry it as its own field
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            if self.on_drop:
+                self.on_drop()
@@ -0,0 +1,244 @@
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+# Event kinds
+SERVER_STARTING = 'starting'
+SERVER_DONE = 'done'
+SERVER_STOPPING = 'stopping'
+PLAYER_JOIN = 'join'
+PLAYER_LEAVE = 'leave'
+WORLD_SAVED = 'saved'
+LAG_WARNING = 'lag'
+SERVER_ERROR = 'error'
+SERVER_CRASH = 'crash'
+OPERATOR_COMMAND = 'command'
+
+@dataclass
+class LogEvent:
+    kind: str
+    line: str
+    data: dict = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+# "[12:34:56] [Server thread/INFO] [minecraft/DedicatedServer]: message"
+_LINE_RE = re.compile(r'^\[[^\]]*\] \[(?P<thread>[^\]/]*)/(?P<level>[A-Z]+)\](?: \[[^\]]*\])?: (?P<message>.*)$')
+
+_MATCHERS = [
+    (SERVER_DONE, re.compile(r'^Done \((?P<seconds>\d+(?:\.\d+)?)s\)!')),
+    (PLAYER_JOIN, re.compile(r'^(?P<player>[A-Za-z0-9_]{1,16}) joined the game')),
+    (PLAYER_LEAVE, re.compile(r'^(?P<player>[A-Za-z0-9_]{1,16}) left the game')),
+    # RCON-issued commands are echoed to the console as "[Rcon: Saved the game]"
+    (WORLD_SAVED, re.compile(r'^(?:\[Rcon: )?Saved the (?:game|world)')),
+    (LAG_WARNING, re.compile(
+        r"^Can't keep up! Is the server overloaded\? Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind"
+    )),
+    (SERVER_STARTING, re.compile(r'^Starting minecraft server version (?P<version>\S+)')),
+    (SERVER_STOPPING, re.compile(r'^Stopping (?:the )?server')),
+    # "say !cancel" / "say !postpone 10" from the server console, RCON or an op in game;
+    # /say needs permission level 2, so regular players cannot issue these
+    (OPERATOR_COMMAND, re.compile(
+        r'^(?:\[Not Secure\] )?\[(?P<source>[A-Za-z0-9_]{1,16})\] !(?P<command>cancel|postpone)(?: (?P<minutes>\d+))?\s*$'
+    )),
+]
+
+_CRASH_RE = re.compile(
+    r'This crash report has been saved to|Encountered an unexpected exception|'
+    r'Considering it to be crashed|Exception stopping the server|Preparing crash report'
+)
+
+class LogParser:
+    """Turns raw log lines into LogEvents; stack traces are folded into the error that precedes them"""
+
+    def __init__(self):
+        self._error: Optional[LogEvent] = None
+
+    def feed(self, line: str) -> List[LogEvent]:
+        events = []
+        match = _LINE_RE.match(line)
+
+        if match is None:
+            # Continuation line (stack trace, multi-line message)
+            if self._error is not None and line.strip():
+                self._error.data['trace'].append(line.rstrip())
+                if _CRASH_RE.search(line):
+                    self._error.kind = SERVER_CRASH
+            return events
+
+        events.extend(self.flush())
+
+        level = match.group('level')
+        message = match.group('message')
+
+        if level in ('ERROR', 'FATAL') or _CRASH_RE.search(message):
+            kind = SERVER_CRASH if level == 'FATAL' or _CRASH_RE.search(message) else SERVER_ERROR
+            self._error = LogEvent(kind, line, {'message': message, 'thread': match.group('thread'), 'trace': []})
+            return events
+
+        for kind, pattern in _MATCHERS:
+            found = pattern.match(message)
+            if found:
+                events.append(LogEvent(kind, line, found.groupdict()))
+                break
+        return events
+
+    def flush(self) -> List[LogEvent]:
+        if self._error is None:
+            return []
+        event, self._error = self._error, None
+        return [event]
+
+class _Inotify:
+    """Minimal inotify binding; unavailable on Windows"""
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_NONBLOCK = 0o4000
+
+    def __init__(self, directory: str):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name or not hasattr(os, 'read'):
+            raise OSError("libc not available")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify not available")
+
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def drain(self):
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+class LogTailer:
+    """
+    Incremental, rotation-aware tail of the server's latest.log.
+
+    Only bytes past the saved offset are read. When the file is replaced
+    (new inode) or truncated, reading restarts from the top of the new file.
+    The file is not kept open between reads so log4j can still rename it on
+    Windows. On Linux inotify wakes the reader; elsewhere the file is stat'ed
+    every poll_interval seconds.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.5, logger=None, from_start: bool = False):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.logger = logger
+        self.parser = LogParser()
+        self._inode = None
+        self._offset = 0
+        self._partial = b''
+        self._from_start = from_start
+        self._subscribers: List[tuple] = []
+        self._stopped = False
+
+    def subscribe(self, callback: Callable[[LogEvent], None],
+                  kinds: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """Register a handler; returns a function that removes it again"""
+        entry = (callback, set(kinds) if kinds else None)
+        self._subscribers.append(entry)
+
+        def unsubscribe():
+            if entry in self._subscribers:
+                self._subscribers.remove(entry)
+        return unsubscribe
+
+    def _dispatch(self, event: LogEvent):
+        for callback, kinds in list(self._subscribers):
+            if kinds is None or event.kind in kinds:
+                try:
+                    callback(event)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"Log event handler failed: {e}")
+
+    def poll(self) -> int:
+        """Read whatever was appended since the last call and dispatch events"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Whatever appears later is new output, read it from the top
+            self._from_start = True
+            return 0
+
+        inode = (stat.st_dev, stat.st_ino)
+        if self._inode is None:
+            self._offset = 0 if self._from_start else stat.st_size
+        elif inode != self._inode or stat.st_size < self._offset:
+            self._offset = 0
+            self._partial = b''
+        self._inode = inode
+
+        if stat.st_size == self._offset:
+            # Quiet file: a pending stack trace is complete
+            for event in self.parser.flush():
+                self._dispatch(event)
+            return 0
+        return self._read_available()
+
+    def _read_available(self) -> int:
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        if not data:
+            return 0
+        self._offset += len(data)
+
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        for raw in lines:
+            line = raw.decode('utf-8', errors='replace').rstrip('\r')
+            for event in self.parser.feed(line):
+                self._dispatch(event)
+        return len(lines)
+
+    async def run(self):
+        self._stopped = False
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        notify = None
+        try:
+            notify = _Inotify(os.path.dirname(os.path.abspath(self.path)))
+            loop.add_reader(notify.fd, wakeup.set)
+        except (OSError, AttributeError, NotImplementedError):
+            notify = None
+
+        try:
+            while not self._stopped:
+                self.poll()
+                wakeup.clear()
+                # With inotify the timeout is only a safety net (and flushes pending traces)
+                timeout = self.poll_interval * 4 if notify else self.poll_interval
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                if notify:
+                    notify.drain()
+        finally:
+            if notify:
+                loop.remove_reader(notify.fd)
+                notify.close()
+
+    def stop(self):
+        self._stopped = True
@@ -3,40 +3,39 @@ import os
 import asyncio
 from typing import Optional
 
-from server_scheduler import MinecraftServerScheduler
-from server_monitor import MinecraftServerMonitor
+from config import ServerConfig
+from orchestrator import ServerOrchestrator
 from utils import LoggerSetup
 
 class Application:
     def __init__(self):
         self.logger = LoggerSetup.setup('main')
-        self.server_scheduler: Optional[MinecraftServerScheduler] = None
-        self.monitor: Optional[MinecraftServerMonitor] = None
+        self.orchestrator: Optional[ServerOrchestrator] = None
 
     async def start(self):
         try:
             # Initialize components
-            self.server_scheduler = MinecraftServerScheduler()
-            self.monitor = MinecraftServerMonitor()
+            self.orchestrator = ServerOrchestrator()
             
-            # Start monitor display in separate window
-            self._start_monitor_window()
+            # Start one monitor display per server in separate windows
+            for config in self.orchestrator.configs:
+                self._start_monitor_window(config)
             
-            # Start server scheduler
-            await self.server_scheduler.run()
+            # Start server schedulers
+            await self.orchestrator.run()
             
         except Exception as e:
             self.logger.error(f"Application error: {e}")
             raise
         
-    def _start_monitor_window(self):
+    def _start_monitor_window(self, config: ServerConfig):
         """Start monitor in a new console window"""
         try:
             base_dir = os.path.dirname(os.path.dirname(__file__))
             monitor_script = os.path.join(os.path.dirname(__file__), "monitor_window.py")
             python_exe = os.path.join(base_dir, "venv", "Scripts", "python.exe")
         
-            command = f'start cmd /k {python_exe} {monitor_script}'
+            command = f'start cmd /k {python_exe} {monitor_script} {config.SERVER_NAME}'
             os.system(command)
         
         except Exception as e:
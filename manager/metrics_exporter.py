@@ -0,0 +1,67 @@
+import asyncio
+from typing import Optional
+
+from metrics import Registry, REGISTRY
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+class MetricsExporter:
+    """
+    Minimal asyncio HTTP endpoint serving the registry on GET /metrics.
+
+    Scrapes only format values that are already in memory, so any number of
+    scrapers adds no RCON or psutil work.
+    """
+
+    def __init__(self, host: str, port: int, registry: Registry = REGISTRY, logger=None):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.logger = logger
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        if self.logger:
+            self.logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            # Drain headers; nothing in them changes the response
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 5)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+
+            parts = request.decode('latin-1').split()
+            if len(parts) < 2 or parts[0] not in ('GET', 'HEAD'):
+                self._respond(writer, 405, 'Method Not Allowed', b'', 'text/plain')
+            elif parts[1].split('?')[0] != '/metrics':
+                self._respond(writer, 404, 'Not Found', b'Not found\n', 'text/plain')
+            else:
+                body = self.registry.render().encode('utf-8')
+                self._respond(writer, 200, 'OK', b'' if parts[0] == 'HEAD' else body, CONTENT_TYPE,
+                              content_length=len(body))
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, code: int, reason: str, body: bytes,
+                 content_type: str, content_length: Optional[int] = None):
+        headers = (
+            f"HTTP/1.1 {code} {reason}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body) if content_length is None else content_length}\r\n"
+            f"Connection: close\r\n\r\n"
+        )
+        writer.write(headers.encode('latin-1') + body)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
@@ -1,12 +1,26 @@
 import os
+import sys
+from config import ServerConfig
+from utils import LoggerSetup
 from server_monitor import MinecraftServerMonitor
+from status_bus import StatusSubscriber
 
 def main():
-    os.system('title Minecraft Server Monitor')
+    config = ServerConfig.find(sys.argv[1]) if len(sys.argv) > 1 else ServerConfig.servers()[0]
+    if config.SERVER_NAME == ServerConfig.SERVER_NAME:
+        os.system('title Minecraft Server Monitor')
+    else:
+        os.system(f'title Minecraft Server Monitor - {config.SERVER_NAME}')
     os.system('mode con: cols=40 lines=30')
+    # The scheduler process already writes monitor_, process_ and rcon_ logs for this server
+    LoggerSetup.set_file_prefix(config.MONITOR_WINDOW_LOG_PREFIX)
 
-    monitor = MinecraftServerMonitor()
-    monitor.display_status()
+    subscriber = StatusSubscriber(config.STATUS_BUS_NAME, stale_after=2 * config.MONITOR_MAX_INTERVAL)
+    monitor = MinecraftServerMonitor(config=config)
+    try:
+        monitor.display_status(subscriber)
+    finally:
+        subscriber.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+@dataclass(frozen=True)
+class OperatingWindow:
+    start: datetime
+    end: datetime
+    open_ended: bool = False  # End lies beyond the precomputed horizon
+
+    def contains(self, when: datetime) -> bool:
+        return self.start <= when < self.end
+
+class OperatingCalendar:
+    """
+    Rolling calendar of merged operating windows.
+
+    A regular day runs START_TIME -> END_TIME (crossing midnight when END_TIME is
+    earlier). A 24/7 day runs from its END_TIME to the next day's END_TIME, the
+    same convention the scheduler has always used. Overlapping windows are merged,
+    so a weekend of 24/7 days becomes one long window.
+    """
+
+    HORIZON_DAYS = 14
+    LOOKBACK_DAYS = 7
+
+    def __init__(self, config):
+        self.config = config
+        self._windows: List[OperatingWindow] = []
+        self._first_day: Optional[date] = None
+
+    def _day_windows(self, day: date) -> List[tuple]:
+        start_time = self.config.START_TIME
+        end_time = self.config.END_TIME
+        windows = []
+
+        start_dt = datetime.combine(day, start_time)
+        end_dt = datetime.combine(day, end_time)
+        if end_time < start_time:
+            end_dt += timedelta(days=1)
+        if end_dt > start_dt:
+            windows.append((start_dt, end_dt))
+
+        if day.weekday() in self.config.TWENTYFOUR_HOUR_DAYS:
+            full_start = datetime.combine(day, end_time)
+            windows.append((full_start, full_start + timedelta(days=1)))
+
+        return windows
+
+    def _build(self, first_day: date):
+        raw = []
+        for offset in range(self.LOOKBACK_DAYS + self.HORIZON_DAYS + 1):
+            raw.extend(self._day_windows(first_day + timedelta(days=offset)))
+        raw.sort()
+
+        horizon_end = datetime.combine(
+            first_day + timedelta(days=self.LOOKBACK_DAYS + self.HORIZON_DAYS),
+            self.config.END_TIME
+        )
+        merged: List[list] = []
+        for start, end in raw:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        self._windows = [
+            OperatingWindow(start, end, open_ended=end > horizon_end)
+            for start, end in merged
+        ]
+        self._first_day = first_day
+
+    def windows(self, now: datetime) -> List[OperatingWindow]:
+        """Windows overlapping or following now, rebuilt as the horizon rolls forward"""
+        first_day = now.date() - timedelta(days=self.LOOKBACK_DAYS)
+        if self._first_day != first_day:
+            self._build(first_day)
+        return [window for window in self._windows if window.end > now]
+
+    def window_at(self, when: datetime) -> Optional[OperatingWindow]:
+        for window in self.windows(when):
+            if window.contains(when):
+                return window
+        return None
+
+    def next_window(self, after: datetime) -> Optional[OperatingWindow]:
+        for window in self.windows(after):
+            if window.start >= after:
+                return window
+        return None
+
+    def is_operating(self, when: datetime) -> bool:
+        return self.window_at(when) is not None
+
+    def is_24h_day(self, when: datetime) -> bool:
+        if when.time() < self.config.END_TIME:
+            return (when - timedelta(days=1)).weekday() in self.config.TWENTYFOUR_HOUR_DAYS
+        return when.weekday() in self.config.TWENTYFOUR_HOUR_DAYS
@@ -0,0 +1,64 @@
+import asyncio
+import os
+from typing import List, Optional
+
+from config import ServerConfig
+from utils import LoggerSetup, DiscordWebhook
+from server_scheduler import MinecraftServerScheduler
+from metrics_exporter import MetricsExporter
+
+class ServerOrchestrator:
+    """
+    Runs one MinecraftServerScheduler per configured server on a single event loop.
+
+    Health checks, status collection and countdowns of every server are
+    independent tasks; only cold starts are serialised through a shared
+    semaphore of MAX_CONCURRENT_STARTS slots.
+    """
+
+    def __init__(self, configs: Optional[List[ServerConfig]] = None):
+        self.logger = LoggerSetup.setup('orchestrator')
+        self.configs = configs or ServerConfig.servers()
+        self.schedulers: List[MinecraftServerScheduler] = []
+        self.metrics_exporter = MetricsExporter(
+            ServerConfig.METRICS_HOST, ServerConfig.METRICS_PORT, logger=self.logger
+        ) if ServerConfig.METRICS_ENABLED else None
+
+    def _set_title(self):
+        if len(self.configs) == 1:
+            config = self.configs[0]
+            os.system(f'title Minecraft Server Scheduler ({config.START_TIME} - {config.END_TIME})')
+        else:
+            os.system(f'title Minecraft Server Scheduler ({len(self.configs)} servers)')
+
+    async def run(self):
+        self._set_title()
+        start_limiter = asyncio.Semaphore(max(1, ServerConfig.MAX_CONCURRENT_STARTS))
+        self.schedulers = [MinecraftServerScheduler(config, start_limiter) for config in self.configs]
+        self.logger.info(
+            f"Managing {len(self.schedulers)} server(s): {', '.join(s.name for s in self.schedulers)} "
+            f"(max {ServerConfig.MAX_CONCURRENT_STARTS} concurrent starts)"
+        )
+
+        if self.metrics_exporter:
+            try:
+                await self.metrics_exporter.start()
+            except OSError as e:
+                self.logger.error(f"Failed to start metrics endpoint: {e}")
+
+        loop = asyncio.get_running_loop()
+        tasks = [loop.create_task(scheduler.run(), name=f"scheduler-{scheduler.name}")
+                 for scheduler in self.schedulers]
+        try:
+            # One server failing must not take the others down
+            for scheduler, result in zip(self.schedulers, await asyncio.gather(*tasks, return_exceptions=True)):
+                if isinstance(result, Exception):
+                    self.logger.error(f"Scheduler for {scheduler.name} stopped: {result}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for webhook in DiscordWebhook.instances():
+                await webhook.close()
+            if self.metrics_exporter:
+                await self.metrics_exporter.close()
@@ -0,0 +1,455 @@
+import argparse
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from operating_calendar import OperatingCalendar
+from server_monitor import ServerStatus
+from terminal_renderer import sparkline
+
+HOURS_PER_WEEK = 168
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+# Any Monday serves as the reference week for schedule masks
+_REFERENCE_MONDAY = datetime(2024, 1, 1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER,
+    last_seen INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_start ON sessions(start);
+CREATE INDEX IF NOT EXISTS sessions_player ON sessions(player, start);
+CREATE TABLE IF NOT EXISTS hourly (
+    hour INTEGER PRIMARY KEY,
+    how INTEGER NOT NULL,
+    player_seconds REAL NOT NULL,
+    online_seconds REAL NOT NULL,
+    observed_seconds REAL NOT NULL,
+    peak INTEGER NOT NULL
+);
+"""
+
+_UPSERT_HOUR = """
+INSERT INTO hourly (hour, how, player_seconds, online_seconds, observed_seconds, peak)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(hour) DO UPDATE SET
+    player_seconds = player_seconds + excluded.player_seconds,
+    online_seconds = online_seconds + excluded.online_seconds,
+    observed_seconds = observed_seconds + excluded.observed_seconds,
+    peak = MAX(peak, excluded.peak)
+"""
+
+def hour_of_week(timestamp: float) -> int:
+    """Local hour of the week, 0 = Monday 00:00"""
+    local = time.localtime(timestamp)
+    return local.tm_wday * 24 + local.tm_hour
+
+@dataclass
+class _Session:
+    id: int
+    player: str
+    start: int
+    last_seen: int
+    end: Optional[int] = None
+    stored: bool = False
+
+class PlayerSessionStore:
+    """
+    Join/leave sessions derived from successive ServerStatus player lists.
+
+    record() only enqueues; a writer thread diffs each player list against the
+    previous one and keeps the changes in memory until the next flush, when
+    they are written in a single transaction. A player joins at the first
+    snapshot that lists them and leaves at the first one that does not. Next
+    to the sessions an `hourly` table accumulates player-seconds, online and
+    observed seconds and the peak player count per clock hour, which is what
+    the concurrency and schedule queries read, so those never scan sessions.
+    Snapshots further apart than max_gap (the manager was not running) end
+    every open session at the last snapshot and add nothing to the hours in
+    between; sessions left open by a crash are closed at their last_seen on
+    the next start.
+    """
+
+    def __init__(self, path: str, flush_seconds: float = 60, max_gap: float = 600, logger=None):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.max_gap = max_gap
+        self.logger = logger
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._open: Dict[str, _Session] = {}
+        self._changed: Dict[int, _Session] = {}
+        self._hours: Dict[int, list] = {}
+        self._last: Optional[Tuple[int, bool, int]] = None
+        self._next_id = 1
+        self._thread = threading.Thread(target=self._writer, name='player-sessions', daemon=True)
+        self._thread.start()
+
+    def record(self, status: ServerStatus, timestamp: Optional[float] = None):
+        players = tuple(status.players) if status.is_online else ()
+        self._queue.put((int(timestamp if timestamp is not None else time.time()), status.is_online, players))
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.executescript(_SCHEMA)
+        with db:
+            # Sessions still open here were cut short by a crash
+            db.execute('UPDATE sessions SET end = last_seen WHERE end IS NULL')
+        self._next_id = db.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM sessions').fetchone()[0]
+        return db
+
+    def _writer(self):
+        try:
+            db = self._connect()
+        except sqlite3.Error as e:
+            if self.logger:
+                self.logger.error(f"Session store unavailable: {e}")
+            return
+        next_flush = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                snapshot = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except queue.Empty:
+                snapshot = False
+            if snapshot is None:
+                break
+            try:
+                if snapshot:
+                    self._apply(*snapshot)
+                if time.monotonic() >= next_flush:
+                    self._flush(db)
+                    next_flush = time.monotonic() + self.flush_seconds
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Session write failed: {e}")
+        try:
+            self._flush(db)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Session write failed: {e}")
+        db.close()
+
+    def _hour(self, bucket: int) -> list:
+        row = self._hours.get(bucket)
+        if row is None:
+            # how, player seconds, online seconds, observed seconds, peak
+            row = self._hours[bucket] = [hour_of_week(bucket), 0.0, 0.0, 0.0, 0]
+        return row
+
+    def _accrue(self, start: int, end: int, online: bool, players: int):
+        """Spread the time between two snapshots over the clock hours it spans"""
+        while start < end:
+            bucket = start - start % 3600
+            part = min(end, bucket + 3600) - start
+            row = self._hour(bucket)
+            row[3] += part
+            if online:
+                row[2] += part
+                row[1] += part * players
+            start += part
+
+    def _end(self, session: _Session, at: int):
+        session.end = at
+        self._changed[session.id] = session
+
+    def _apply(self, ts: int, online: bool, players: tuple):
+        if self._last is not None:
+            last_ts, last_online, last_count = self._last
+            if ts < last_ts:
+                return  # Clock stepped back; wait for it to catch up
+            if ts - last_ts > self.max_gap:
+                for session in self._open.values():
+                    self._end(session, last_ts)
+                self._open.clear()
+            else:
+                self._accrue(last_ts, ts, last_online, last_count)
+
+        current = dict.fromkeys(players)
+        for name in [name for name in self._open if name not in current]:
+            self._end(self._open.pop(name), ts)
+        for name in current:
+            session = self._open.get(name)
+            if session is None:
+                session = self._open[name] = _Session(self._next_id, name, ts, ts)
+                self._next_id += 1
+            session.last_seen = ts
+            self._changed[session.id] = session
+        if online:
+            row = self._hour(ts - ts % 3600)
+            row[4] = max(row[4], len(current))
+        self._last = (ts, online, len(current))
+
+    def _flush(self, db: sqlite3.Connection):
+        if not self._changed and not self._hours:
+            return
+        new = [s for s in self._changed.values() if not s.stored]
+        known = [s for s in self._changed.values() if s.stored]
+        with db:
+            db.executemany(
+                'INSERT INTO sessions (id, player, start, end, last_seen) VALUES (?, ?, ?, ?, ?)',
+                [(s.id, s.player, s.start, s.end, s.last_seen) for s in new]
+            )
+            db.executemany(
+                'UPDATE sessions SET end = ?, last_seen = ? WHERE id = ?',
+                [(s.end, s.last_seen, s.id) for s in known]
+            )
+            db.executemany(_UPSERT_HOUR, [(bucket, *row) for bucket, row in self._hours.items()])
+        for session in new:
+            session.stored = True
+        self._changed.clear()
+        self._hours.clear()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+@dataclass
+class HourOfWeek:
+    hour: int                 # 0 = Monday 00:00
+    mean_players: float       # While the server was up
+    peak: int
+    player_hours: float
+    online_hours: float
+    observed_hours: float
+
+    @property
+    def label(self) -> str:
+        return f"{WEEKDAYS[self.hour // 24]} {self.hour % 24:02d}:00"
+
+@dataclass
+class PeakHour:
+    start: datetime
+    peak: int
+    mean_players: float
+
+@dataclass
+class PlayerTotal:
+    player: str
+    sessions: int
+    seconds: float
+    last_seen: datetime
+
+@dataclass
+class ScheduleRecommendation:
+    start_hour: int
+    end_hour: int
+    twentyfour_hour_days: List[int]
+    weekly_hours: int
+    coverage: float             # Share of observed player-hours inside the schedule
+    current_hours: int
+    current_coverage: float
+    unobserved: List[int] = field(default_factory=list)  # Hours of week the server was never up
+
+    def summary(self) -> List[str]:
+        days = ', '.join(WEEKDAYS[day] for day in self.twentyfour_hour_days) or 'none'
+        saved = self.current_hours - self.weekly_hours
+        lines = [
+            f"Recommended: START_TIME {self.start_hour:02d}:00, END_TIME {self.end_hour:02d}:00, "
+            f"24h days {days}",
+            f"  {self.weekly_hours} h/week covering {self.coverage:.0%} of player-hours",
+            f"  Current schedule: {self.current_hours} h/week covering {self.current_coverage:.0%}"
+            + (f", {abs(saved)} h/week {'more' if saved > 0 else 'less'} than recommended" if saved else ''),
+        ]
+        if self.unobserved:
+            lines.append(f"  {len(self.unobserved)} hours of the week were never online; "
+                         f"demand there is unknown and not counted")
+        return lines
+
+def _window_mask(day: int, start: int, hours: int) -> int:
+    mask = 0
+    for offset in range(hours):
+        mask |= 1 << ((day * 24 + start + offset) % HOURS_PER_WEEK)
+    return mask
+
+def schedule_mask(config) -> int:
+    """Hours of the week the configured schedule keeps the server up, as a bitmask"""
+    calendar = OperatingCalendar(config)
+    mask = 0
+    for hour in range(HOURS_PER_WEEK):
+        if calendar.is_operating(_REFERENCE_MONDAY + timedelta(hours=hour, minutes=30)):
+            mask |= 1 << hour
+    return mask
+
+class _MaskSum:
+    """Sum of per-hour values over a 168-bit mask, one table lookup per byte"""
+
+    def __init__(self, values: List[float]):
+        self.tables = []
+        for offset in range(0, HOURS_PER_WEEK, 8):
+            chunk = values[offset:offset + 8]
+            self.tables.append([
+                sum(value for bit, value in enumerate(chunk) if byte >> bit & 1) for byte in range(256)
+            ])
+
+    def __call__(self, mask: int) -> float:
+        total = 0.0
+        for table in self.tables:
+            total += table[mask & 0xff]
+            mask >>= 8
+        return total
+
+class SessionQueries:
+    """Read-only queries over a PlayerSessionStore database, safe while the manager writes to it"""
+
+    def __init__(self, path: str):
+        uri = pathlib.Path(path).absolute().as_uri() + '?mode=ro'
+        self.db = sqlite3.connect(uri, uri=True)
+
+    def close(self):
+        self.db.close()
+
+    def concurrency_by_hour_of_week(self, since: float, until: float) -> List[HourOfWeek]:
+        rows = {
+            how: (player_seconds, online, observed, peak)
+            for how, player_seconds, online, observed, peak in self.db.execute(
+                'SELECT how, SUM(player_seconds), SUM(online_seconds), SUM(observed_seconds), MAX(peak) '
+                'FROM hourly WHERE hour >= ? AND hour < ? GROUP BY how',
+                (int(since), int(until))
+            )
+        }
+        result = []
+        for how in range(HOURS_PER_WEEK):
+            player_seconds, online, observed, peak = rows.get(how, (0.0, 0.0, 0.0, 0))
+            result.append(HourOfWeek(
+                how, player_seconds / online if online else 0.0, peak,
+                player_seconds / 3600, online / 3600, observed / 3600
+            ))
+        return result
+
+    def peak_times(self, since: float, until: float, limit: int = 10) -> List[PeakHour]:
+        return [
+            PeakHour(datetime.fromtimestamp(hour), peak, player_seconds / online if online else 0.0)
+            for hour, peak, player_seconds, online in self.db.execute(
+                'SELECT hour, peak, player_seconds, online_seconds FROM hourly '
+                'WHERE hour >= ? AND hour < ? AND peak > 0 '
+                'ORDER BY peak DESC, player_seconds DESC LIMIT ?',
+                (int(since), int(until), limit)
+            )
+        ]
+
+    def player_totals(self, since: float, until: float, limit: Optional[int] = None) -> List[PlayerTotal]:
+        """Time online per player, with sessions clipped to the range"""
+        return [
+            PlayerTotal(player, sessions, seconds, datetime.fromtimestamp(last_seen))
+            for player, sessions, seconds, last_seen in self.db.execute(
+                'SELECT player, COUNT(*), SUM(MIN(COALESCE(end, last_seen), :until) - MAX(start, :since)), '
+                'MAX(last_seen) FROM sessions '
+                'WHERE start < :until AND COALESCE(end, last_seen) > :since '
+                'GROUP BY player ORDER BY 3 DESC LIMIT :limit',
+                {'since': int(since), 'until': int(until), 'limit': -1 if limit is None else limit}
+            )
+        ]
+
+    def recommend_schedule(self, since: float, until: float, config, coverage: float = 0.95) -> ScheduleRecommendation:
+        """
+        The schedule with the fewest weekly hours that still covers `coverage`
+        of the observed player-hours.
+
+        Every START_TIME/END_TIME pair on the hour is tried; 24h days are then
+        added greedily, best player-hours per extra hour first, until the
+        target is met.
+        """
+        hours = self.concurrency_by_hour_of_week(since, until)
+        demand = [hour.player_hours for hour in hours]
+        total = sum(demand)
+        covered = _MaskSum(demand)
+        current = schedule_mask(config)
+        unobserved = [hour.hour for hour in hours if not hour.online_hours]
+
+        def share(mask: int) -> float:
+            return covered(mask) / total if total else 1.0
+
+        best = None
+        for start in range(24):
+            for end in range(24):
+                if start == end:
+                    continue
+                length = (end - start) % 24
+                mask = 0
+                for day in range(7):
+                    mask |= _window_mask(day, start, length)
+                days: List[int] = []
+                while share(mask) < coverage and len(days) < 7:
+                    gained = mask
+                    choice = None
+                    for day in range(7):
+                        if day in days:
+                            continue
+                        candidate = mask | _window_mask(day, end, 24)
+                        extra = bin(candidate & ~mask).count('1')
+                        value = (covered(candidate) - covered(mask)) / extra if extra else 0.0
+                        if choice is None or value > choice[0]:
+                            choice = (value, day, candidate)
+                    days.append(choice[1])
+                    mask = choice[2]
+                    if mask == gained:
+                        break
+                key = (bin(mask).count('1'), -share(mask))
+                if best is None or key < best[0]:
+                    best = (key, start, end, sorted(days), mask)
+
+        _, start, end, days, mask = best
+        return ScheduleRecommendation(
+            start, end, days, bin(mask).count('1'), share(mask),
+            bin(current).count('1'), share(current), unobserved
+        )
+
+    def report(self, since: float, until: float, config, coverage: float = 0.95) -> List[str]:
+        hours = self.concurrency_by_hour_of_week(since, until)
+        busiest = max(hour.mean_players for hour in hours) or 1.0
+        lines = [f"Mean players by hour ({datetime.fromtimestamp(since):%Y-%m-%d} to "
+                 f"{datetime.fromtimestamp(until):%Y-%m-%d}, peak hour mean {busiest:.1f})"]
+        for day in range(7):
+            values = [hour.mean_players for hour in hours[day * 24:(day + 1) * 24]]
+            lines.append(f"  {WEEKDAYS[day]} {sparkline(values, 24, 0, busiest)}")
+
+        peaks = self.peak_times(since, until, 5)
+        if peaks:
+            lines.append("Peak times:")
+            lines += [f"  {peak.start:%Y-%m-%d %H:00}  {peak.peak} players (mean {peak.mean_players:.1f})"
+                      for peak in peaks]
+
+        players = self.player_totals(since, until, 10)
+        if players:
+            lines.append("Most active players:")
+            lines += [f"  {total.player:<16} {total.seconds / 3600:7.1f} h in {total.sessions} sessions, "
+                      f"last seen {total.last_seen:%Y-%m-%d}" for total in players]
+
+        lines += self.recommend_schedule(since, until, config, coverage).summary()
+        return lines
+
+def main():
+    from config import ServerConfig
+
+    parser = argparse.ArgumentParser(description='Player session statistics and operating schedule recommendation')
+    parser.add_argument('--server', help='Server name when several are configured')
+    parser.add_argument('--days', type=float, default=90, help='Days of sessions to analyse')
+    parser.add_argument('--coverage', type=float, default=None, help='Share of player-hours the schedule must cover')
+    args = parser.parse_args()
+
+    config = ServerConfig.find(args.server) if args.server else ServerConfig.servers()[0]
+    queries = SessionQueries(os.path.join(config.HISTORY_DIR, config.SESSIONS_FILE))
+    until = time.time()
+    since = until - args.days * 86400
+    started = time.perf_counter()
+    try:
+        lines = queries.report(since, until, config,
+                               config.SCHEDULE_COVERAGE if args.coverage is None else args.coverage)
+    finally:
+        queries.close()
+    print('\n'.join(lines))
+    print(f"(report built in {(time.perf_counter() - started) * 1000:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import asyncio
+import os
+from typing import Callable, Dict, List, Optional
+import psutil
+
+from utils import LoggerSetup
+
+class ServerProcessTracker:
+    """
+    Keeps a handle on the server JVM instead of walking the process table.
+
+    The PID is learned from the launcher's child tree and re-validated with
+    is_running() (which also compares create times, so a recycled PID never
+    matches). A name + cmdline scan is only used when the handle is lost; it also
+    requires the JVM to run from SERVER_DIR so other servers on the host are
+    never picked up.
+    """
+
+    EVENTS = ('start', 'exit')
+
+    def __init__(self, config, logger=None):
+        self.config = config
+        self.logger = logger or LoggerSetup.setup(config.log_name('process'))
+        self.process_names = {name.lower() for name in config.JAVA_PROCESS_NAMES}
+        self.cmdline_pattern = config.SERVER_CMDLINE_PATTERN.lower()
+        self.server_dir = os.path.normcase(os.path.abspath(config.SERVER_DIR))
+        self._proc: Optional[psutil.Process] = None
+        self._launcher: Optional[psutil.Process] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._listeners: Dict[str, List[Callable]] = {event: [] for event in self.EVENTS}
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc else None
+
+    def add_listener(self, event: str, callback: Callable[[psutil.Process], None]):
+        """Register a callback for 'start' or 'exit' events"""
+        if event not in self._listeners:
+            raise ValueError(f"Unknown process event: {event}")
+        self._listeners[event].append(callback)
+
+    def _emit(self, event: str, proc: psutil.Process):
+        for callback in self._listeners[event]:
+            try:
+                callback(proc)
+            except Exception as e:
+                self.logger.error(f"Process {event} listener failed: {e}")
+
+    def _is_server_process(self, proc: psutil.Process) -> bool:
+        try:
+            if proc.name().lower() not in self.process_names:
+                return False
+            return self.cmdline_pattern in ' '.join(proc.cmdline()).lower()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+
+    @staticmethod
+    def _is_alive(proc: psutil.Process) -> bool:
+        try:
+            return proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def attach(self, proc: psutil.Process):
+        if self._proc is not None and self._proc.pid == proc.pid and self._is_alive(self._proc):
+            return
+        self._proc = proc
+        self.logger.info(f"Tracking server process (PID {proc.pid})")
+        self._start_watch(proc)
+        self._emit('start', proc)
+
+    def attach_launcher(self, launcher_pid: int) -> Optional[psutil.Process]:
+        """Find the server JVM in the child tree of the process that launched it"""
+        if self._proc is not None and self._is_alive(self._proc):
+            return self._proc
+        try:
+            launcher = psutil.Process(launcher_pid)
+            candidates = [launcher] + launcher.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return None
+
+        for proc in candidates:
+            if self._is_server_process(proc):
+                self._launcher = launcher if proc.pid != launcher.pid else None
+                self.attach(proc)
+                return proc
+        return None
+
+    def _runs_in_server_dir(self, proc: psutil.Process) -> bool:
+        try:
+            return os.path.normcase(os.path.abspath(proc.cwd())) == self.server_dir
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return False
+
+    def _scan(self) -> Optional[psutil.Process]:
+        # Filter on the cached name first so cmdline is only read for JVMs
+        for proc in psutil.process_iter(['name']):
+            name = (proc.info.get('name') or '').lower()
+            if (name in self.process_names and self._is_server_process(proc)
+                    and self._runs_in_server_dir(proc)):
+                return proc
+        return None
+
+    def _lost(self):
+        proc, self._proc = self._proc, None
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+        if proc is not None:
+            self.logger.info(f"Server process exited (PID {proc.pid})")
+            self._emit('exit', proc)
+
+    def get_process(self) -> Optional[psutil.Process]:
+        if self._proc is not None:
+            if self._is_alive(self._proc):
+                return self._proc
+            self._lost()
+
+        proc = self._scan()
+        if proc is not None:
+            self.attach(proc)
+        return proc
+
+    def is_running(self) -> bool:
+        return self.get_process() is not None
+
+    def _start_watch(self, proc: psutil.Process):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (standalone monitor): exits are noticed on the next get_process()
+            return
+        self._watch_task = loop.create_task(self._watch_exit(proc))
+
+    async def _watch_exit(self, proc: psutil.Process):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, proc.wait)
+        except psutil.NoSuchProcess:
+            pass
+        if self._proc is not None and self._proc.pid == proc.pid:
+            self._watch_task = None
+            self._lost()
+
+    def _tree(self, proc: psutil.Process) -> List[psutil.Process]:
+        """The JVM, its children and the console that launched it - nothing else on the host"""
+        tree = [proc]
+        try:
+            tree += proc.children(recursive=True)
+        except psutil.NoSuchProcess:
+            pass
+        if self._launcher is not None and self._is_alive(self._launcher):
+            tree.append(self._launcher)
+        return tree
+
+    async def stop_tree(self, grace: float) -> Optional[str]:
+        """
+        Terminate the server's process tree, killing whatever outlives grace seconds.
+
+        Returns 'terminate' or 'kill' for the step that ended it, None if nothing was running.
+        """
+        proc = self.get_process()
+        if proc is None:
+            return None
+
+        def escalate() -> str:
+            tree = self._tree(proc)
+            for member in tree:
+                try:
+                    member.terminate()
+                except psutil.NoSuchProcess:
+                    pass
+            _, alive = psutil.wait_procs(tree, timeout=grace)
+            if not alive:
+                return 'terminate'
+            for member in alive:
+                try:
+                    member.kill()
+                except psutil.NoSuchProcess:
+                    pass
+            psutil.wait_procs(alive, timeout=5)
+            return 'kill'
+
+        step = await asyncio.get_running_loop().run_in_executor(None, escalate)
+        self.logger.warning(f"Server process tree stopped by {step} (PID {proc.pid})")
+        self._launcher = None
+        self.get_process()
+        return step
+
+    async def wait_for_exit(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the tracked process exits; True if it is gone"""
+        proc = self._proc
+        if proc is None:
+            return True
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, proc.wait, timeout)
+        except psutil.TimeoutExpired:
+            return False
+        except psutil.NoSuchProcess:
+            pass
+        return True
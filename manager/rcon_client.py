@@ -0,0 +1,221 @@
+import asyncio
+import itertools
+import struct
+from typing import Dict, List, Optional
+
+# Source RCON packet types
+PACKET_RESPONSE = 0
+PACKET_COMMAND = 2
+PACKET_LOGIN = 3
+
+_HEADER = struct.Struct('<iii')
+_MAX_PACKET = 4110
+
+class RconError(Exception):
+    pass
+
+class RconAuthError(RconError):
+    pass
+
+def encode_packet(request_id: int, packet_type: int, body: str) -> bytes:
+    payload = body.encode('utf-8') + b'\x00\x00'
+    return _HEADER.pack(len(payload) + 8, request_id, packet_type) + payload
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple:
+    """Read one packet and return (request_id, type, body)"""
+    length, = struct.unpack('<i', await reader.readexactly(4))
+    if length < 10 or length > _MAX_PACKET:
+        raise RconError(f"Invalid packet length: {length}")
+    data = await reader.readexactly(length)
+    request_id, packet_type = struct.unpack('<ii', data[:8])
+    body = data[8:-2].decode('utf-8', errors='replace')
+    return request_id, packet_type, body
+
+class _PendingCommand:
+    __slots__ = ('future', 'chunks')
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.chunks: List[str] = []
+
+class AsyncRconClient:
+    """
+    Asyncio RCON client that multiplexes commands over one authenticated socket.
+
+    Every command is followed by an empty RESPONSE_VALUE packet with its own id.
+    The server answers packets in order, so the echo of that sentinel marks the
+    end of a (possibly fragmented) response.
+    """
+
+    def __init__(self, host: str, password: str, port: int,
+                 timeout: float = 5.0,
+                 reconnect_min: float = 1.0,
+                 reconnect_max: float = 60.0,
+                 logger=None):
+        self.host = host
+        self.password = password
+        self.port = port
+        self.timeout = timeout
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.logger = logger
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, _PendingCommand] = {}
+        self._sentinels: Dict[int, int] = {}
+
+        self._backoff = 0.0
+        self._next_attempt = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def reset_backoff(self):
+        self._backoff = 0.0
+        self._next_attempt = 0.0
+
+    def _next_id(self) -> int:
+        request_id = next(self._ids)
+        if request_id >= 0x7fffffff:
+            self._ids = itertools.count(1)
+            request_id = next(self._ids)
+        return request_id
+
+    async def connect(self):
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+
+        async with self._connect_lock:
+            if self.connected:
+                return
+
+            loop = asyncio.get_running_loop()
+            if loop.time() < self._next_attempt:
+                raise RconError("Reconnect backoff in progress")
+
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout
+                )
+                try:
+                    await self._authenticate(reader, writer)
+                except BaseException:
+                    writer.close()
+                    raise
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RconError) as e:
+                self._backoff = min(max(self._backoff * 2, self.reconnect_min), self.reconnect_max)
+                self._next_attempt = loop.time() + self._backoff
+                if isinstance(e, RconAuthError):
+                    raise
+                raise RconError(f"Connection to {self.host}:{self.port} failed: {e}") from e
+
+            self._reader, self._writer = reader, writer
+            self._backoff = 0.0
+            self._next_attempt = 0.0
+            self._reader_task = loop.create_task(self._read_loop(reader))
+            if self.logger:
+                self.logger.info("RCON connection established")
+
+    async def _authenticate(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        login_id = self._next_id()
+        writer.write(encode_packet(login_id, PACKET_LOGIN, self.password))
+        await writer.drain()
+
+        async def wait_auth():
+            while True:
+                request_id, packet_type, _ = await read_packet(reader)
+                if request_id == -1:
+                    raise RconAuthError("RCON authentication failed")
+                if request_id == login_id and packet_type == PACKET_COMMAND:
+                    return
+
+        await asyncio.wait_for(wait_auth(), self.timeout)
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        error: Optional[BaseException] = None
+        try:
+            while True:
+                request_id, _, body = await read_packet(reader)
+
+                command_id = self._sentinels.pop(request_id, None)
+                if command_id is not None:
+                    pending = self._pending.pop(command_id, None)
+                    if pending and not pending.future.done():
+                        pending.future.set_result(''.join(pending.chunks))
+                    continue
+
+                pending = self._pending.get(request_id)
+                if pending:
+                    pending.chunks.append(body)
+        except asyncio.CancelledError:
+            error = RconError("RCON connection closed")
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            if reader is self._reader:
+                self._drop_connection(error or RconError("RCON connection closed"))
+
+    def _drop_connection(self, error: BaseException):
+        if self._writer is not None:
+            self._writer.close()
+            if self.logger:
+                self.logger.warning(f"RCON connection lost: {error}")
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_exception(RconError(str(error)))
+        self._pending.clear()
+        self._sentinels.clear()
+
+    async def command(self, command: str, timeout: Optional[float] = None) -> str:
+        if not self.connected:
+            await self.connect()
+
+        command_id = self._next_id()
+        sentinel_id = self._next_id()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = _PendingCommand(future)
+        self._sentinels[sentinel_id] = command_id
+
+        try:
+            self._writer.write(
+                encode_packet(command_id, PACKET_COMMAND, command) +
+                encode_packet(sentinel_id, PACKET_RESPONSE, '')
+            )
+            await self._writer.drain()
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            # A stalled command blocks everything queued behind it on this
+            # socket, so start over with a fresh connection.
+            await self._reset()
+            raise RconError(f"RCON command timed out: {command}")
+        except (OSError, AttributeError) as e:
+            raise RconError(f"RCON write failed: {e}") from e
+        finally:
+            self._pending.pop(command_id, None)
+            self._sentinels.pop(sentinel_id, None)
+
+    async def _reset(self):
+        task = self._reader_task
+        if task:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        await self._reset()
+        self._drop_connection(RconError("RCON connection closed"))
@@ -0,0 +1,406 @@
+import argparse
+import gzip
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+SECTOR = 4096
+CHUNKS_PER_REGION = 1024
+_HEADER = struct.Struct('>1024I')
+_REGION_RE = re.compile(r'^r\.(-?\d+)\.(-?\d+)\.mca$')
+# Folders holding per-chunk data keyed the same way as the terrain regions
+CHUNK_FOLDERS = ('region', 'entities', 'poi')
+
+# NBT payload sizes of the fixed-width tag types
+_FIXED = {1: 1, 2: 2, 3: 4, 4: 8, 5: 4, 6: 8}
+_NUMERIC = {1: '>b', 2: '>h', 3: '>i', 4: '>q', 5: '>f', 6: '>d'}
+_INT = struct.Struct('>i')
+
+def _skip(data: bytes, pos: int, tag: int) -> int:
+    """Position just past a tag payload, without decoding it"""
+    size = _FIXED.get(tag)
+    if size:
+        return pos + size
+    if tag == 8:
+        return pos + 2 + ((data[pos] << 8) | data[pos + 1])
+    if tag in (7, 11, 12):
+        count = _INT.unpack_from(data, pos)[0]
+        return pos + 4 + count * (1 if tag == 7 else 4 if tag == 11 else 8)
+    if tag == 9:
+        item = data[pos]
+        count = _INT.unpack_from(data, pos + 1)[0]
+        pos += 5
+        if item in _FIXED:
+            return pos + count * _FIXED[item]
+        for _ in range(count):
+            pos = _skip(data, pos, item)
+        return pos
+    if tag == 10:
+        while True:
+            child = data[pos]
+            pos += 1
+            if child == 0:
+                return pos
+            pos = _skip(data, pos + 2 + ((data[pos] << 8) | data[pos + 1]), child)
+    raise ValueError(f"Unknown NBT tag {tag}")
+
+def read_nbt_numbers(data: bytes, wanted: Iterable[str], descend: Iterable[str] = ()) -> Dict[str, float]:
+    """
+    Numeric tags by name from an NBT root compound.
+
+    Only the compounds named in `descend` are entered; everything else is
+    skipped by length, and the walk stops once every wanted tag was found.
+    """
+    wanted = {name.encode() for name in wanted}
+    descend = {name.encode() for name in descend}
+    found: Dict[str, float] = {}
+    if not data or data[0] != 10:
+        return found
+
+    def walk(pos: int) -> int:
+        # Returns -1 once everything wanted was found
+        while True:
+            tag = data[pos]
+            pos += 1
+            if tag == 0:
+                return pos
+            length = (data[pos] << 8) | data[pos + 1]
+            name = data[pos + 2:pos + 2 + length]
+            pos += 2 + length
+            if tag in _NUMERIC and name in wanted:
+                found[name.decode()] = struct.unpack_from(_NUMERIC[tag], data, pos)[0]
+                pos += _FIXED[tag]
+            elif tag == 10 and name in descend:
+                pos = walk(pos)
+            else:
+                pos = _skip(data, pos, tag)
+            if pos < 0 or len(found) == len(wanted):
+                return -1
+
+    walk(3 + ((data[1] << 8) | data[2]))
+    return found
+
+def read_level(world_dir: str) -> Dict[str, float]:
+    """Spawn position, world border and world age (ticks) from level.dat"""
+    try:
+        with gzip.open(os.path.join(world_dir, 'level.dat'), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return {}
+    return read_nbt_numbers(data, ('SpawnX', 'SpawnZ', 'Time', 'BorderCenterX', 'BorderCenterZ', 'BorderSize'),
+                            ('Data',))
+
+def _decompress(kind: int, payload: bytes) -> Optional[bytes]:
+    if kind == 2:
+        return zlib.decompress(payload)
+    if kind == 1:
+        return gzip.decompress(payload)
+    if kind == 3:
+        return payload
+    return None  # LZ4 (1.20.5+) or unknown: leave the chunk alone
+
+def _external_path(path: str, index: int) -> str:
+    """Oversized chunks are stored next to their region as c.<x>.<z>.mcc"""
+    rx, rz = region_coords(path)
+    return os.path.join(os.path.dirname(path), f"c.{rx * 32 + index % 32}.{rz * 32 + index // 32}.mcc")
+
+def _chunk_data(path: str, mm, index: int, location: int) -> Optional[bytes]:
+    offset = (location >> 8) * SECTOR
+    length, kind = struct.unpack_from('>IB', mm, offset)
+    if kind & 0x80:
+        with open(_external_path(path, index), 'rb') as f:
+            return _decompress(kind & 0x7f, f.read())
+    return _decompress(kind, mm[offset + 5:offset + 4 + length])
+
+def world_in_use(world_dir: str) -> bool:
+    """True while a server holds the world's session.lock"""
+    path = os.path.join(world_dir, 'session.lock')
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, 'r+b') as f:
+            # The server keeps an exclusive lock on the file for as long as the world is open
+            if sys.platform == 'win32':
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.lockf(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.lockf(f, fcntl.LOCK_UN)
+    except OSError:
+        return True
+    return False
+
+def region_coords(path: str) -> Tuple[int, int]:
+    match = _REGION_RE.match(os.path.basename(path))
+    if not match:
+        raise ValueError(f"Not a region file: {path}")
+    return int(match.group(1)), int(match.group(2))
+
+@dataclass
+class RegionReport:
+    path: str
+    dimension: str
+    size: int
+    chunks: int = 0
+    inhabited_ticks: int = 0
+    unreadable: int = 0
+    prunable: List[int] = field(default_factory=list)  # Chunk indexes below the thresholds
+
+@dataclass
+class PruneRules:
+    min_inhabited: int = 1200          # Ticks players spent in range of the chunk
+    min_age: int = 0                   # World ticks since the chunk was last updated
+    keep_radius: int = 64              # Chunks around spawn that are never pruned
+    spawn: Tuple[int, int] = (0, 0)    # Spawn position in chunks
+    world_time: Optional[int] = None
+
+    def prunable(self, chunk_x: int, chunk_z: int, inhabited: int, last_update: int) -> bool:
+        if inhabited >= self.min_inhabited:
+            return False
+        if max(abs(chunk_x - self.spawn[0]), abs(chunk_z - self.spawn[1])) <= self.keep_radius:
+            return False
+        if self.min_age and (self.world_time is None or self.world_time - last_update < self.min_age):
+            return False
+        return True
+
+def analyze_region(path: str, dimension: str, rules: Optional[PruneRules] = None) -> RegionReport:
+    """Header and chunk NBT scan of one region file (runs in pool workers)"""
+    report = RegionReport(path, dimension, os.path.getsize(path))
+    if report.size < 2 * SECTOR:
+        return report
+    rx, rz = region_coords(path)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        locations = _HEADER.unpack_from(mm, 0)
+        for index, location in enumerate(locations):
+            if not location:
+                continue
+            report.chunks += 1
+            try:
+                data = _chunk_data(path, mm, index, location)
+                values = read_nbt_numbers(data, ('InhabitedTime', 'LastUpdate'), ('Level',)) if data else None
+            except (OSError, ValueError, IndexError, struct.error, zlib.error):
+                values = None
+            if not values or 'InhabitedTime' not in values:
+                report.unreadable += 1
+                continue
+            inhabited = int(values['InhabitedTime'])
+            report.inhabited_ticks += inhabited
+            if rules and rules.prunable(rx * 32 + index % 32, rz * 32 + index // 32,
+                                        inhabited, int(values.get('LastUpdate', 0))):
+                report.prunable.append(index)
+    return report
+
+def dimension_dirs(world_dir: str) -> Dict[str, str]:
+    """Dimension id -> folder holding its region/ entities/ poi/ subfolders"""
+    dims = {'minecraft:overworld': world_dir}
+    for legacy, name in (('DIM-1', 'minecraft:the_nether'), ('DIM1', 'minecraft:the_end')):
+        path = os.path.join(world_dir, legacy)
+        if os.path.isdir(path):
+            dims[name] = path
+    custom = os.path.join(world_dir, 'dimensions')
+    if os.path.isdir(custom):
+        for namespace in sorted(os.listdir(custom)):
+            for root, folders, _ in os.walk(os.path.join(custom, namespace)):
+                if 'region' in folders:
+                    rel = os.path.relpath(root, os.path.join(custom, namespace)).replace(os.sep, '/')
+                    dims[f"{namespace}:{rel}"] = root
+    return dims
+
+def _compact(path: str, keep: List[bool]) -> Tuple[Optional[bytes], List[str]]:
+    """
+    Region file content without the dropped chunks (None if nothing is left),
+    and the external .mcc files of the dropped chunks, which go with them
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < 2 * SECTOR:
+        return data, []
+    locations = _HEADER.unpack_from(data, 0)
+    timestamps = _HEADER.unpack_from(data, SECTOR)
+    new_locations = [0] * CHUNKS_PER_REGION
+    new_timestamps = [0] * CHUNKS_PER_REGION
+    body = bytearray()
+    externals = []
+    for index, location in enumerate(locations):
+        if not location:
+            continue
+        start, count = (location >> 8) * SECTOR, location & 0xff
+        if not keep[index]:
+            if start + 4 < len(data) and data[start + 4] & 0x80:
+                external = _external_path(path, index)
+                if os.path.exists(external):
+                    externals.append(external)
+            continue
+        new_locations[index] = ((2 + len(body) // SECTOR) << 8) | count
+        new_timestamps[index] = timestamps[index]
+        body += data[start:start + count * SECTOR].ljust(count * SECTOR, b'\0')
+    if not body:
+        return None, externals
+    return _HEADER.pack(*new_locations) + _HEADER.pack(*new_timestamps) + bytes(body), externals
+
+@dataclass
+class WorldReport:
+    regions: List[RegionReport]
+
+    @property
+    def size(self) -> int:
+        return sum(region.size for region in self.regions)
+
+    @property
+    def prunable(self) -> int:
+        return sum(len(region.prunable) for region in self.regions)
+
+    def by_dimension(self) -> Dict[str, dict]:
+        totals: Dict[str, dict] = defaultdict(lambda: {'size': 0, 'regions': 0, 'chunks': 0, 'prunable': 0})
+        for region in self.regions:
+            entry = totals[region.dimension]
+            entry['size'] += region.size
+            entry['regions'] += 1
+            entry['chunks'] += region.chunks
+            entry['prunable'] += len(region.prunable)
+        return dict(totals)
+
+    def summary(self, top: int = 5) -> List[str]:
+        lines = [f"World: {self.size / 1024 / 1024:.1f} MB in {len(self.regions)} region files, "
+                 f"{self.prunable} prunable chunks"]
+        for dimension, entry in sorted(self.by_dimension().items(), key=lambda item: -item[1]['size']):
+            lines.append(f"  {dimension}: {entry['size'] / 1024 / 1024:.1f} MB, {entry['regions']} regions, "
+                         f"{entry['chunks']} chunks, {entry['prunable']} prunable")
+        for region in sorted(self.regions, key=lambda r: -r.size)[:top]:
+            lines.append(f"  {os.path.basename(region.path)} ({region.dimension}): "
+                         f"{region.size / 1024 / 1024:.1f} MB, {region.chunks} chunks")
+        return lines
+
+class RegionAnalyzer:
+    """
+    Offline scan and pruning of a world's Anvil region files.
+
+    Must only run while the server is stopped: pruning rewrites region files.
+    """
+
+    def __init__(self, world_dir: str, workers: int = 0):
+        self.world_dir = os.path.abspath(world_dir)
+        self.workers = workers or os.cpu_count() or 1
+
+    def rules(self, min_inhabited: int = 1200, min_age_hours: float = 0, keep_radius: int = 64) -> PruneRules:
+        level = read_level(self.world_dir)
+        world_time = int(level['Time']) if 'Time' in level else None
+        return PruneRules(
+            min_inhabited=min_inhabited,
+            min_age=int(min_age_hours * 72000),
+            keep_radius=keep_radius,
+            spawn=(int(level.get('SpawnX', 0)) >> 4, int(level.get('SpawnZ', 0)) >> 4),
+            world_time=world_time
+        )
+
+    def _region_files(self) -> List[Tuple[str, str]]:
+        files = []
+        for dimension, folder in dimension_dirs(self.world_dir).items():
+            region_dir = os.path.join(folder, 'region')
+            if not os.path.isdir(region_dir):
+                continue
+            files.extend(
+                (os.path.join(region_dir, name), dimension)
+                for name in sorted(os.listdir(region_dir)) if _REGION_RE.match(name)
+            )
+        return files
+
+    def analyze(self, rules: Optional[PruneRules] = None) -> WorldReport:
+        files = self._region_files()
+        if self.workers < 2 or len(files) < 2:
+            return WorldReport([analyze_region(path, dimension, rules) for path, dimension in files])
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(files))) as pool:
+            futures = [pool.submit(analyze_region, path, dimension, rules) for path, dimension in files]
+            return WorldReport([future.result() for future in futures])
+
+    def prune(self, report: WorldReport, backup_dir: str, dry_run: bool = True) -> Tuple[int, int]:
+        """
+        Drop the report's prunable chunks; returns (chunks removed, bytes freed).
+
+        Every rewritten file (terrain, entities and POI) and the external
+        .mcc file of every dropped oversized chunk is first moved into
+        backup_dir, keeping its path relative to the world.
+        """
+        if not dry_run and world_in_use(self.world_dir):
+            raise RuntimeError(f"{self.world_dir} is locked by a running server")
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        removed = freed = 0
+        for region in report.regions:
+            if not region.prunable:
+                continue
+            removed += len(region.prunable)
+            keep = [True] * CHUNKS_PER_REGION
+            for index in region.prunable:
+                keep[index] = False
+            folder = os.path.dirname(os.path.dirname(region.path))
+            for kind in CHUNK_FOLDERS:
+                path = os.path.join(folder, kind, os.path.basename(region.path))
+                if not os.path.exists(path):
+                    continue
+                before = os.path.getsize(path)
+                content, externals = _compact(path, keep)
+                freed += before - (len(content) if content else 0)
+                freed += sum(os.path.getsize(external) for external in externals)
+                if dry_run:
+                    continue
+                target = self._backup_target(backup_dir, stamp, path)
+                if content is not None:
+                    with open(f"{path}.tmp", 'wb') as f:
+                        f.write(content)
+                shutil.move(path, target)
+                if content is not None:
+                    os.replace(f"{path}.tmp", path)
+                for external in externals:
+                    shutil.move(external, self._backup_target(backup_dir, stamp, external))
+        return removed, freed
+
+    def _backup_target(self, backup_dir: str, stamp: str, path: str) -> str:
+        target = os.path.join(backup_dir, stamp, os.path.relpath(path, self.world_dir))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        return target
+
+def main():
+    from config import ServerConfig
+    from process_tracker import ServerProcessTracker
+
+    parser = argparse.ArgumentParser(description='Anvil region analysis and chunk pruning (server must be stopped)')
+    parser.add_argument('--server', help='Server name when several are configured')
+    parser.add_argument('--prune', action='store_true', help='Report what pruning would remove')
+    parser.add_argument('--apply', action='store_true', help='With --prune, really remove the chunks')
+    parser.add_argument('--min-inhabited', type=int, default=None, help='Ticks of player presence to keep a chunk')
+    parser.add_argument('--keep-radius', type=int, default=None, help='Chunks around spawn that are always kept')
+    args = parser.parse_args()
+
+    config = ServerConfig.find(args.server) if args.server else ServerConfig.servers()[0]
+    if ServerProcessTracker(config).is_running() or world_in_use(config.world_path()):
+        # A live server rewrites region files under our feet, and pruning them would corrupt the world
+        sys.exit(f"{config.SERVER_NAME}: the server is running or holds the world lock; stop it first")
+    analyzer = RegionAnalyzer(config.world_path(), config.ANALYZER_WORKERS)
+    rules = analyzer.rules(
+        config.CHUNK_PRUNE_MIN_INHABITED if args.min_inhabited is None else args.min_inhabited,
+        config.CHUNK_PRUNE_MIN_AGE_HOURS,
+        config.CHUNK_PRUNE_KEEP_RADIUS if args.keep_radius is None else args.keep_radius
+    )
+    report = analyzer.analyze(rules)
+    print('\n'.join(report.summary()))
+    if args.prune:
+        removed, freed = analyzer.prune(report, os.path.join(config.backup_path(), 'pruned'), not args.apply)
+        verb = 'Removed' if args.apply else 'Would remove'
+        print(f"{verb} {removed} chunks, {freed / 1024 / 1024:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import os
+import re
+import sys
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+
+import psutil
+
+# Escalation steps, in order
+WARN = 'warn'
+SAVE = 'save'
+RESTART = 'restart'
+
+ELEVATED = 1
+CRITICAL = 2
+
+_XMX = re.compile(r'^-Xmx(\d+)([kKmMgGtT]?)$')
+_UNITS = {'': 1 / (1024 * 1024), 'k': 1 / 1024, 'm': 1, 'g': 1024, 't': 1024 * 1024}
+
+if sys.platform == 'win32':
+    _PRIORITIES = {
+        'below_normal': psutil.BELOW_NORMAL_PRIORITY_CLASS,
+        'normal': psutil.NORMAL_PRIORITY_CLASS,
+        'above_normal': psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+        'high': psutil.HIGH_PRIORITY_CLASS,
+    }
+    _IO_PRIORITIES = {
+        'low': (psutil.IOPRIO_LOW,),
+        'normal': (psutil.IOPRIO_NORMAL,),
+        'high': (psutil.IOPRIO_HIGH,),
+    }
+else:
+    _PRIORITIES = {'below_normal': 5, 'normal': 0, 'above_normal': -5, 'high': -10}
+    _IO_PRIORITIES = {
+        'low': (getattr(psutil, 'IOPRIO_CLASS_BE', 2), 7),
+        'normal': (getattr(psutil, 'IOPRIO_CLASS_BE', 2), 4),
+        'high': (getattr(psutil, 'IOPRIO_CLASS_BE', 2), 0),
+    }
+
+def parse_heap_mb(args: List[str], cwd: str = '.') -> Optional[float]:
+    """-Xmx of a JVM command line in MB, following @argfiles such as Forge's user_jvm_args.txt"""
+    heap = None
+    for arg in args:
+        if arg.startswith('@'):
+            try:
+                with open(os.path.join(cwd, arg[1:]), encoding='utf-8', errors='replace') as f:
+                    nested = parse_heap_mb(f.read().split(), cwd)
+            except OSError:
+                nested = None
+            heap = nested if nested is not None else heap
+            continue
+        match = _XMX.match(arg)
+        if match:
+            # The last -Xmx wins, as in the JVM itself
+            heap = int(match.group(1)) * _UNITS[match.group(2).lower()]
+    return heap
+
+def jvm_heap_mb(proc: psutil.Process, configured: float = 0) -> Optional[float]:
+    """Max heap of the server JVM in MB: the configured value, else its -Xmx"""
+    if configured:
+        return float(configured)
+    try:
+        return parse_heap_mb(proc.cmdline(), proc.cwd())
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+def usable_cores(proc: Optional[psutil.Process] = None) -> int:
+    """Logical CPUs the process may run on"""
+    try:
+        if proc is not None and hasattr(proc, 'cpu_affinity'):
+            return len(proc.cpu_affinity()) or psutil.cpu_count()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        pass
+    return psutil.cpu_count() or 1
+
+@dataclass
+class ResourceThresholds:
+    """Memory levels in MB and CPU levels in psutil percent (100 per core), derived from the heap"""
+    heap_mb: float
+    memory_warn: float
+    memory_critical: float
+    cpu_busy: float
+    cpu_saturated: float
+
+    @classmethod
+    def derive(cls, heap_mb: float, cores: int, config) -> 'ResourceThresholds':
+        capacity = 100 * max(1, cores)
+        return cls(
+            heap_mb=heap_mb,
+            memory_warn=heap_mb * config.GOVERNOR_RSS_WARN,
+            memory_critical=heap_mb * config.GOVERNOR_RSS_CRITICAL,
+            cpu_busy=capacity * config.GOVERNOR_CPU_BUSY / 100,
+            cpu_saturated=capacity * config.GOVERNOR_CPU_SATURATED / 100,
+        )
+
+def place_process(proc: psutil.Process, affinity: List[int], priority: str,
+                  io_priority: str) -> Tuple[List[str], List[str]]:
+    """Apply CPU affinity, scheduling priority and I/O priority; returns what was changed and what failed
+
+    Each setting is tried on its own, so e.g. a raised priority refused
+    without privileges does not keep the affinity or I/O priority from applying.
+
+    On Linux these are per-thread attributes, so every existing thread of the
+    JVM is updated; threads started later inherit them from their creator. A
+    setting refused for some threads only is reported as failed with how
+    many threads did take it.
+    """
+    targets = [proc]
+    if sys.platform.startswith('linux'):
+        try:
+            targets = [psutil.Process(thread.id) for thread in proc.threads()]
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+
+    applied = []
+    failed = []
+    settings = []
+    if affinity and hasattr(proc, 'cpu_affinity'):
+        settings.append((f"affinity {affinity}", lambda p: p.cpu_affinity(affinity)))
+    if priority:
+        settings.append((f"priority {priority}", lambda p, value=_PRIORITIES[priority]: p.nice(value)))
+    if io_priority and hasattr(proc, 'ionice'):
+        settings.append((f"I/O priority {io_priority}",
+                         lambda p, value=_IO_PRIORITIES[io_priority]: p.ionice(*value)))
+
+    for label, apply in settings:
+        changed = 0
+        errors = []
+        for target in targets:
+            try:
+                apply(target)
+                changed += 1
+            except psutil.NoSuchProcess:
+                continue  # Thread ended in the meantime
+            except (psutil.AccessDenied, ValueError, OSError) as e:
+                errors.append('access denied' if isinstance(e, psutil.AccessDenied) else str(e))
+        if not errors:
+            if changed:
+                applied.append(label)
+        elif changed:
+            failed.append(f"{label}: only {changed} of {changed + len(errors)} threads ({errors[0]})")
+        else:
+            failed.append(f"{label}: {errors[0]}")
+    return applied, failed
+
+@dataclass
+class Sample:
+    at: float     # Monotonic seconds
+    rss: float    # MB
+    cpu: float    # psutil percent
+    tps: float
+
+class ResourceGovernor:
+    """
+    Watches the server JVM's resident memory and CPU for signs of trouble.
+
+    A least-squares fit over the last GOVERNOR_WINDOW seconds of RSS projects
+    when memory reaches the critical level; CPU counts as saturated once most
+    of the window sits near the usable cores' capacity, and as critical when
+    the server also stops keeping up (the usual shape of a GC death spiral).
+    Pressure is answered one step at a time: a warning, then a forced save,
+    then a planned restart, each step only after critical pressure outlasted
+    the previous one by GOVERNOR_ESCALATE_MINUTES. Pressure going away resets
+    the sequence.
+    """
+
+    def __init__(self, config, thresholds: Optional[ResourceThresholds] = None):
+        self.config = config
+        self.thresholds = thresholds
+        self.samples: Deque[Sample] = deque()
+        self.stage: Optional[str] = None
+        self._stage_at = 0.0
+        self.level = 0
+        self.reason = ''
+
+    def reset(self, thresholds: Optional[ResourceThresholds] = None):
+        self.thresholds = thresholds
+        self.samples.clear()
+        self.stage = None
+        self.level = 0
+        self.reason = ''
+
+    def observe(self, at: float, rss: float, cpu: float, tps: float):
+        self.samples.append(Sample(at, rss, cpu, tps))
+        while self.samples and self.samples[0].at < at - self.config.GOVERNOR_WINDOW:
+            self.samples.popleft()
+
+    def memory_slope(self) -> Optional[float]:
+        """RSS growth in MB/s over the window, None without enough samples"""
+        if len(self.samples) < 3:
+            return None
+        n = len(self.samples)
+        mean_t = sum(s.at for s in self.samples) / n
+        mean_m = sum(s.rss for s in self.samples) / n
+        spread = sum((s.at - mean_t) ** 2 for s in self.samples)
+        if spread == 0:
+            return None
+        return sum((s.at - mean_t) * (s.rss - mean_m) for s in self.samples) / spread
+
+    def _covers_window(self) -> bool:
+        return len(self.samples) >= 3 and \
+            self.samples[-1].at - self.samples[0].at >= self.config.GOVERNOR_WINDOW / 2
+
+    def pressure(self) -> Tuple[int, str]:
+        """0, ELEVATED or CRITICAL, with the reason"""
+        limits = self.thresholds
+        if limits is None or not self.samples:
+            return 0, ''
+        latest = self.samples[-1]
+        level, reason = 0, ''
+
+        if latest.rss >= limits.memory_critical:
+            return CRITICAL, f"memory {latest.rss:.0f} MB over {limits.memory_critical:.0f} MB"
+        if self._covers_window():
+            slope = self.memory_slope()
+            if slope and slope > 0:
+                minutes = (limits.memory_critical - latest.rss) / slope / 60
+                if minutes <= self.config.GOVERNOR_HORIZON:
+                    level = CRITICAL if latest.rss >= limits.memory_warn else ELEVATED
+                    reason = f"memory {latest.rss:.0f} MB, growing {slope * 60:.0f} MB/min, critical in {minutes:.0f} min"
+            saturated = [s for s in self.samples if s.cpu >= limits.cpu_saturated]
+            if len(saturated) >= self.config.GOVERNOR_SUSTAINED * len(self.samples):
+                slow = [s for s in saturated if s.tps and s.tps < self.config.GOVERNOR_MIN_TPS]
+                cpu_level = CRITICAL if len(slow) >= len(saturated) / 2 else ELEVATED
+                if cpu_level > level:
+                    level = cpu_level
+                    reason = (f"CPU saturated for {len(saturated) / len(self.samples):.0%} of "
+                              f"{self.config.GOVERNOR_WINDOW / 60:.0f} min"
+                              + (f" with TPS under {self.config.GOVERNOR_MIN_TPS}" if cpu_level == CRITICAL else ''))
+        if level == 0 and latest.rss >= limits.memory_warn:
+            level, reason = ELEVATED, f"memory {latest.rss:.0f} MB over {limits.memory_warn:.0f} MB"
+        return level, reason
+
+    def decide(self, now: float) -> Optional[str]:
+        """The next escalation step due now, if any"""
+        level, reason = self.pressure()
+        self.level = level
+        self.reason = reason
+        if level == 0:
+            self.stage = None
+            return None
+        escalate = now - self._stage_at >= self.config.GOVERNOR_ESCALATE_MINUTES * 60
+        if self.stage is None:
+            step = WARN
+        elif self.stage == WARN and level == CRITICAL and escalate:
+            step = SAVE
+        elif self.stage == SAVE and level == CRITICAL and escalate:
+            step = RESTART
+        else:
+            return None
+        self.stage = step
+        self._stage_at = now
+        return step
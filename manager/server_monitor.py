@@ -1,13 +1,19 @@
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
-import os
+from typing import Dict, List, Optional
 import time
-import psutil
 from colorama import init, Fore, Style
 
 from config import ServerConfig
 from utils import LoggerSetup, RconManager
+from process_tracker import ServerProcessTracker
+from terminal_renderer import TerminalRenderer, sparkline
+from tick_stats import TickReport, parse_forge_tps, parse_player_list
+from adaptive_sampler import AdaptiveSampler
+from resource_governor import ResourceThresholds, jvm_heap_mb, usable_cores
+from log_tailer import (LogTailer, LogEvent, SERVER_STARTING, SERVER_DONE,
+                        SERVER_STOPPING, PLAYER_JOIN, PLAYER_LEAVE)
 
 @dataclass
 class ServerStatus:
@@ -17,6 +23,11 @@ class ServerStatus:
     memory_used: float = 0.0
     cpu_usage: float = 0.0
     tps: float = 0.0
+    mspt: float = 0.0  # Overall mean tick time in ms
+    dimensions: Dict[str, float] = field(default_factory=dict)  # Mean tick time per dimension
+    sample_interval: float = 0.0  # Seconds until the collector samples again
+    heap_max: float = 0.0  # Max heap (-Xmx) in MB, 0 when unknown
+    cpu_cores: int = 0  # Logical CPUs the JVM may use
     
     def __post_init__(self):
         if self.players is None:
@@ -25,136 +36,262 @@ class ServerStatus:
             self.timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
 class MinecraftServerMonitor:
-    def __init__(self):
-        self.config = ServerConfig()
-        self.logger = LoggerSetup.setup('monitor')
+    SPARKLINE_WIDTH = 36
+
+    def __init__(self, tracker: Optional[ServerProcessTracker] = None,
+                 log_tailer: Optional[LogTailer] = None,
+                 config: Optional[ServerConfig] = None):
+        self.config = config or ServerConfig()
+        self.logger = LoggerSetup.setup(self.config.log_name('monitor'))
+        self.tracker = tracker or ServerProcessTracker(self.config)
+        self.tracker.add_listener('exit', self._on_server_exit)
+        self.log_tailer = log_tailer
+        # Player set maintained from log join/leave lines; None until synced
+        self._log_players: Optional[Dict[str, None]] = None
+        self._heap_pid: Optional[int] = None
+        self._heap_max = 0.0
+        self.history: Dict[str, deque] = {
+            key: deque(maxlen=self.SPARKLINE_WIDTH) for key in ('tps', 'memory', 'cpu')
+        }
+        self.sampler = AdaptiveSampler(
+            self.config.MONITOR_REFRESH,
+            self.config.MONITOR_MIN_INTERVAL,
+            self.config.MONITOR_MAX_INTERVAL,
+            self.config.MONITOR_RCON_BUDGET,
+            mspt_rise=self.config.MONITOR_MSPT_RISE,
+            memory_rate=self.config.MONITOR_MEMORY_RATE
+        )
+        if log_tailer:
+            log_tailer.subscribe(
+                self._on_log_event,
+                [SERVER_STARTING, SERVER_DONE, SERVER_STOPPING, PLAYER_JOIN, PLAYER_LEAVE]
+            )
         self.rcon = RconManager.get_instance(
             self.config.HOST,
             self.config.RCON_PASSWORD,
-            self.config.PORT
+            self.config.PORT,
+            self.config.RCON_TIMEOUT
         )
         init()  # colorama initialization
         
-    def _get_java_process(self) -> Optional[psutil.Process]:
-        """마인크래프트 자바 프로세스 찾기"""
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if (proc.name() == 'java.exe' and 
-                    'forge' in ' '.join(proc.cmdline()).lower()):
-                    return proc
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        return None
-
-    def _get_rcon_data(self) -> tuple[List[str], float]:
-        """RCON 을 통해 서버 정보 수집"""
-        players = []
-        tps = 0.0
-    
-        player_response = self.rcon.send_command("list")
+    def _on_log_event(self, event: LogEvent):
+        if event.kind in (SERVER_STARTING, SERVER_DONE, SERVER_STOPPING):
+            self._log_players = {}
+        elif self._log_players is None:
+            return
+        elif event.kind == PLAYER_JOIN:
+            self._log_players[event.data['player']] = None
+        elif event.kind == PLAYER_LEAVE:
+            self._log_players.pop(event.data['player'], None)
+
+    def _on_server_exit(self, proc):
+        self._log_players = None
+
+    def _parse_players(self, player_response: Optional[str]) -> List[str]:
         if player_response:
-            self.logger.debug(f"List command response:\n{player_response}")
-            for line in player_response.splitlines():
-                if "players online:" in line:
-                    if "There are 0" in line:
-                        players = []
-                else:
-                    player_list = line.split('online:')[1].strip()
-                    if player_list:
-                        players = [p.strip() for p in player_list.split(',')]
-    
-        tps_response = self.rcon.send_command("forge tps")
+            self.logger.debug("List command response:\n%s", player_response, extra={'command': 'list'})
+        players = parse_player_list(player_response)
+        if players is None:
+            if player_response:
+                self.logger.warning(f"Unrecognised list response: {player_response!r}")
+            return []
+        if self.log_tailer:
+            self._log_players = dict.fromkeys(players)
+        return players
+
+    def _parse_tps(self, tps_response: Optional[str]) -> TickReport:
         if tps_response:
-            self.logger.debug(f"TPS command response:\n{tps_response}")
-            for line in tps_response.splitlines():
-                if 'Overall:' in line:
-                    tps_part = line.split('Mean TPS:')[1].strip()
-                    tps = float(tps_part)
-                    break
-                
-        return players, tps
+            self.logger.debug("TPS command response:\n%s", tps_response, extra={'command': 'forge tps'})
+        report = parse_forge_tps(tps_response)
+        if report is None:
+            if tps_response:
+                self.logger.warning(f"Unrecognised forge tps response: {tps_response!r}")
+            return TickReport()
+        return report
+
+    @staticmethod
+    def _apply_tick_report(status: ServerStatus, report: TickReport):
+        status.tps = report.tps
+        status.mspt = report.mspt
+        status.dimensions = report.dimensions
+
+    def _get_rcon_data(self) -> tuple[List[str], TickReport]:
+        """RCON 을 통해 서버 정보 수집"""
+        if self._log_players is not None:
+            # Log tail is authoritative once synced, no `list` round trip needed
+            players = list(self._log_players)
+        else:
+            players = self._parse_players(self.rcon.command("list"))
+            self.sampler.record_commands(1)
+        report = self._parse_tps(self.rcon.command("forge tps"))
+        self.sampler.record_commands(1)
+        return players, report
+
+    async def _get_rcon_data_async(self) -> tuple[List[str], TickReport]:
+        """RCON 을 통해 서버 정보 수집 (이벤트 루프용)"""
+        if self._log_players is not None:
+            players = list(self._log_players)
+        else:
+            players = self._parse_players(await self.rcon.send_command("list"))
+            self.sampler.record_commands(1)
+        report = self._parse_tps(await self.rcon.send_command("forge tps"))
+        self.sampler.record_commands(1)
+        return players, report
+
+    def _collect_process_stats(self, status: ServerStatus):
+        proc = self.tracker.get_process()
+        if not proc:
+            return False
+        memory = proc.memory_info()
+        status.memory_used = memory.rss / (1024 * 1024)  # Convert to MB
+        status.cpu_usage = proc.cpu_percent()
+        if self._heap_pid != proc.pid:
+            # The command line (and any argfile) only needs reading once per JVM
+            self._heap_pid = proc.pid
+            self._heap_max = jvm_heap_mb(proc, self.config.SERVER_HEAP_MB) or 0.0
+        status.heap_max = self._heap_max
+        status.cpu_cores = usable_cores(proc)
+        status.is_online = True
+        return True
 
     def get_server_status(self) -> ServerStatus:
         """서버 상태 정보를 수집"""
         status = ServerStatus()
-        
-        proc = self._get_java_process()
-        if not proc:
-            return status
-            
         try:
-            memory = proc.memory_info()
-            status.memory_used = memory.rss / (1024 * 1024)  # Convert to MB
-            status.cpu_usage = proc.cpu_percent()
-            status.is_online = True
-            
-            status.players, status.tps = self._get_rcon_data()
-            
+            if self._collect_process_stats(status):
+                status.players, report = self._get_rcon_data()
+                self._apply_tick_report(status, report)
         except Exception as e:
             self.logger.error(f"Status collection failed: {e}")
-            
+        self._schedule_next(status)
         return status
 
-    def display_status(self):
-        """서버 상태 정보를 화면에 출력"""
+    async def collect_status(self) -> ServerStatus:
+        """get_server_status() without blocking the event loop on RCON"""
+        status = ServerStatus()
+        try:
+            if self._collect_process_stats(status):
+                status.players, report = await self._get_rcon_data_async()
+                self._apply_tick_report(status, report)
+        except Exception as e:
+            self.logger.error(f"Status collection failed: {e}")
+        self._schedule_next(status)
+        return status
+
+    def _schedule_next(self, status: ServerStatus):
+        reason = self.sampler.reason
+        status.sample_interval = self.sampler.next_interval(status)
+        if self.sampler.reason != reason:
+            self.logger.info(f"Sampling every {status.sample_interval:.1f}s ({self.sampler.reason})")
+
+    def _record_history(self, status: ServerStatus):
+        if not status.is_online:
+            return
+        self.history['tps'].append(status.tps)
+        self.history['memory'].append(status.memory_used)
+        self.history['cpu'].append(status.cpu_usage)
+
+    def display_status(self, subscriber=None):
+        """
+        서버 상태 정보를 화면에 출력
+
+        With a StatusSubscriber the snapshots published by the scheduler are
+        shown as-is and nothing is collected locally.
+        """
+        renderer = TerminalRenderer()
         next_check = time.time()
-        last_status = self.get_server_status()
+        last_status = ServerStatus()
+        last_seq = None
         
-        while True:
-            try:
-                current_time = time.time()
-                
-                if current_time >= next_check:
-                    last_status = self.get_server_status()
-                    next_check = current_time + self.config.MONITOR_REFRESH
-                
-                os.system('cls' if os.name == 'nt' else 'clear')
-                self._print_status(last_status, next_check - current_time)
-                
-                time.sleep(self.config.DISPLAY_REFRESH)
-                
-            except KeyboardInterrupt:
-                break
-            except Exception as e:
-                self.logger.error(f"Display error: {e}")
-                time.sleep(self.config.MONITOR_REFRESH)
-
-    def _print_status(self, status: ServerStatus, time_left: float):
+        try:
+            while True:
+                try:
+                    current_time = time.time()
+                    
+                    if subscriber is not None:
+                        status = subscriber.read()
+                        last_status = status or ServerStatus()
+                        if status is not None and subscriber.seq != last_seq:
+                            last_seq = subscriber.seq
+                            self._record_history(status)
+                        next_check = subscriber.published_at + (
+                            last_status.sample_interval or self.config.MONITOR_REFRESH
+                        )
+                    elif current_time >= next_check:
+                        if self.log_tailer:
+                            self.log_tailer.poll()
+                        last_status = self.get_server_status()
+                        self._record_history(last_status)
+                        next_check = current_time + last_status.sample_interval
+                    
+                    renderer.render(self._format_status(last_status, next_check - current_time))
+                    
+                    time.sleep(self.config.DISPLAY_REFRESH)
+                    
+                except KeyboardInterrupt:
+                    break
+                except Exception as e:
+                    self.logger.error(f"Display error: {e}")
+                    time.sleep(self.config.MONITOR_REFRESH)
+        finally:
+            renderer.close()
+
+    def _format_status(self, status: ServerStatus, time_left: float) -> List[str]:
         """출력 포맷 설정"""
-        print(f"======= Minecraft Server Monitor=======")
-        print(f"Last check: {status.timestamp}")
-        print("-" * 40)
+        width = self.SPARKLINE_WIDTH
+        lines = [
+            f"======= Minecraft Server Monitor=======" if self.config.SERVER_NAME == ServerConfig.SERVER_NAME
+            else f"======= {self.config.SERVER_NAME} =======",
+            f"Last check: {status.timestamp} (next in {max(time_left, 0):.0f}s)",
+            "-" * 40,
+        ]
         
         # Server status
         status_color = Fore.GREEN if status.is_online else Fore.RED
-        print(f"Status: {status_color}"
-              f"{'Online' if status.is_online else 'Offline'}"
-              f"{Style.RESET_ALL}")
+        lines.append(f"Status: {status_color}"
+                     f"{'Online' if status.is_online else 'Offline'}"
+                     f"{Style.RESET_ALL}")
         
         if status.is_online:
             # TPS
             tps_color = (Fore.GREEN if status.tps >= 19 else 
                         Fore.YELLOW if status.tps >= 15 else Fore.RED)
-            print(f"TPS: {tps_color}{status.tps:.1f}{Style.RESET_ALL}")
+            lines.append(f"TPS: {tps_color}{status.tps:.1f}{Style.RESET_ALL} ({status.mspt:.1f} ms/tick)")
+            lines.append(f"  {tps_color}{sparkline(self.history['tps'], width, 0, 20)}{Style.RESET_ALL}")
+            slowest = sorted(status.dimensions.items(), key=lambda item: item[1], reverse=True)[:3]
+            for dimension, mspt in slowest:
+                dim_color = (Fore.GREEN if mspt < 40 else
+                            Fore.YELLOW if mspt < 50 else Fore.RED)
+                lines.append(f"  {dimension}: {dim_color}{mspt:.1f} ms{Style.RESET_ALL}")
             
-            # Memory
-            mem_color = (Fore.GREEN if status.memory_used < 4096 else
-                        Fore.YELLOW if status.memory_used < 6144 else Fore.RED)
-            print(f"Memory: {mem_color}{status.memory_used:.0f}MB{Style.RESET_ALL}")
+            # Memory and CPU levels follow the heap and the cores the JVM may use
+            limits = ResourceThresholds.derive(status.heap_max, status.cpu_cores or usable_cores(), self.config)
+            if status.heap_max:
+                mem_color = (Fore.GREEN if status.memory_used < limits.memory_warn else
+                            Fore.YELLOW if status.memory_used < limits.memory_critical else Fore.RED)
+                heap = f" (heap {status.heap_max:.0f}MB)"
+            else:
+                mem_color, heap = Fore.WHITE, ''
+            lines.append(f"Memory: {mem_color}{status.memory_used:.0f}MB{Style.RESET_ALL}{heap}")
+            lines.append(f"  {mem_color}{sparkline(self.history['memory'], width, 0)}{Style.RESET_ALL}")
             
             # CPU
-            cpu_color = (Fore.GREEN if status.cpu_usage < 70 else
-                        Fore.YELLOW if status.cpu_usage < 85 else Fore.RED)
-            print(f"CPU Usage: {cpu_color}{status.cpu_usage:.1f}%{Style.RESET_ALL}")
+            cpu_color = (Fore.GREEN if status.cpu_usage < limits.cpu_busy else
+                        Fore.YELLOW if status.cpu_usage < limits.cpu_saturated else Fore.RED)
+            lines.append(f"CPU Usage: {cpu_color}{status.cpu_usage:.1f}%{Style.RESET_ALL}")
+            lines.append(f"  {cpu_color}{sparkline(self.history['cpu'], width, 0)}{Style.RESET_ALL}")
             
             # Player list
-            print(f"\n{Fore.CYAN}Players Online: {len(status.players)}{Style.RESET_ALL}")
+            lines.append("")
+            lines.append(f"{Fore.CYAN}Players Online: {len(status.players)}{Style.RESET_ALL}")
             if status.players:
-                print("┌" + "─" * 30 + "┐")
+                lines.append("┌" + "─" * 30 + "┐")
                 for player in status.players:
-                    print(f"│ {Fore.YELLOW} {player}{Style.RESET_ALL}" + " " * (28 - len(player)) + "│")
-                print("└" + "─" * 30 + "┘")
+                    lines.append(f"│ {Fore.YELLOW} {player}{Style.RESET_ALL}" + " " * (28 - len(player)) + "│")
+                lines.append("└" + "─" * 30 + "┘")
             else:
-                print(f"{Fore.YELLOW}No players online{Style.RESET_ALL}")
+                lines.append(f"{Fore.YELLOW}No players online{Style.RESET_ALL}")
         
-        print("\nPress Ctrl+C to stop monitoring")
+        lines.append("")
+        lines.append("Press Ctrl+C to stop monitoring")
+        return lines
@@ -1,38 +1,267 @@
 import asyncio
-import threading
-import schedule
+import contextlib
+import math
 import subprocess
 import os
-import psutil
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
+import psutil
 
 from config import ServerConfig
 from utils import LoggerSetup, RconManager, DiscordWebhook
-from server_monitor import MinecraftServerMonitor
+from server_monitor import MinecraftServerMonitor, ServerStatus
+from status_bus import StatusPublisher
+from status_history import StatusHistory
+from player_sessions import PlayerSessionStore
+from metrics import REGISTRY
+from process_tracker import ServerProcessTracker
+from timer_scheduler import TimerScheduler, Job, Clock
+from log_tailer import (LogTailer, LogEvent, SERVER_DONE, LAG_WARNING, SERVER_CRASH,
+                        PLAYER_JOIN, PLAYER_LEAVE, OPERATOR_COMMAND)
+from operating_calendar import OperatingCalendar, OperatingWindow
+from tick_stats import LagSpikeDetector, TickReport
+from autosave import AutosavePolicy, WorldSaver, SaveError, SAVE, DEFER
+from backup import BackupEngine
+from region_analyzer import RegionAnalyzer, read_level
+from wake_listener import WakeListener
+from chunk_pregen import ChunkPregenerator, PregenArea, DONE as PREGEN_DONE, MAX_BATCH
+from thread_sampler import ThreadSampler
+from countdown import Countdown, CountdownPlan
+from resource_governor import (ResourceGovernor, ResourceThresholds, place_process, jvm_heap_mb, usable_cores,
+                               WARN as PRESSURE_WARN, SAVE as PRESSURE_SAVE, RESTART as PRESSURE_RESTART)
+
+SERVER_UP = REGISTRY.gauge('minecraft_server_up', 'Whether the server JVM is running', ['server'])
+SERVER_TPS = REGISTRY.gauge('minecraft_tps', 'Overall mean ticks per second', ['server'])
+SERVER_MEMORY = REGISTRY.gauge('minecraft_memory_bytes', 'Resident memory of the server JVM', ['server'])
+SERVER_CPU = REGISTRY.gauge('minecraft_cpu_percent', 'CPU usage of the server JVM', ['server'])
+SERVER_PLAYERS = REGISTRY.gauge('minecraft_players_online', 'Players currently online', ['server'])
+SERVER_MSPT = REGISTRY.gauge('minecraft_tick_milliseconds', 'Overall mean tick time', ['server'])
+DIMENSION_MSPT = REGISTRY.gauge(
+    'minecraft_dimension_tick_milliseconds', 'Mean tick time per dimension', ['server', 'dimension']
+)
+LAG_SPIKES = REGISTRY.counter(
+    'minecraft_lag_spikes', 'Lag spikes detected per dimension', ['server', 'dimension']
+)
+HEALTH_CHECK_DURATION = REGISTRY.histogram(
+    'manager_health_check_duration_seconds', 'Time spent evaluating a health check', ['server']
+)
+STARTUP_DURATION = REGISTRY.histogram(
+    'manager_server_startup_seconds', 'Launch to RCON-ready time', ['server'],
+    buckets=(10, 20, 30, 45, 60, 90, 120, 180, 300, 600)
+)
+STARTUP_PHASE = REGISTRY.gauge(
+    'manager_server_startup_phase_seconds', 'Phase timings of the most recent start', ['server', 'phase']
+)
+SHUTDOWN_DURATION = REGISTRY.histogram(
+    'manager_server_shutdown_seconds', 'Stop command to process exit time', ['server'],
+    buckets=(1, 2, 5, 10, 15, 20, 30, 45, 60, 120)
+)
+SHUTDOWN_PHASE = REGISTRY.gauge(
+    'manager_server_shutdown_phase_seconds', 'Phase timings of the most recent shutdown', ['server', 'phase']
+)
+RESTART_DOWNTIME = REGISTRY.histogram(
+    'manager_server_restart_downtime_seconds', 'Stop command to RCON-ready time of planned restarts', ['server'],
+    buckets=(5, 10, 20, 30, 45, 60, 90, 120, 180, 300)
+)
+SERVER_STARTS = REGISTRY.counter('manager_server_starts', 'Successful server starts', ['server'])
+SERVER_RESTARTS = REGISTRY.counter(
+    'manager_server_crash_restarts', 'Restarts after the server was found offline', ['server']
+)
+SAVE_DURATION = REGISTRY.histogram(
+    'manager_world_save_seconds', 'save-all flush to confirmed save time', ['server'],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+)
+SAVES_DEFERRED = REGISTRY.counter('manager_autosave_deferred', 'Due autosaves held back by low TPS', ['server'])
+BACKUP_DURATION = REGISTRY.histogram(
+    'manager_backup_seconds', 'Time to take an incremental world snapshot', ['server'],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800)
+)
+BACKUP_BYTES = REGISTRY.counter('manager_backup_stored_bytes', 'New bytes written to the backup store', ['server'])
+BACKUP_CHANGED = REGISTRY.gauge('manager_backup_changed_files', 'Files changed since the previous snapshot', ['server'])
+BACKUP_FAILURES = REGISTRY.counter('manager_backup_failures', 'World backups that failed', ['server'])
+PREGEN_CHUNKS = REGISTRY.counter('manager_pregen_chunks', 'Chunks pre-generated', ['server'])
+PREGEN_PROGRESS = REGISTRY.gauge('manager_pregen_progress_ratio', 'Share of the pre-generation area done', ['server'])
+RESOURCE_PRESSURE = REGISTRY.gauge(
+    'manager_resource_pressure', 'Memory/CPU pressure on the server JVM (0 none, 1 elevated, 2 critical)', ['server']
+)
+RESOURCE_ACTIONS = REGISTRY.counter(
+    'manager_resource_actions', 'Steps taken against resource pressure', ['server', 'action']
+)
+START_QUEUE = REGISTRY.gauge('manager_server_start_queue', 'Servers waiting for a start slot')
+DISCORD_QUEUE = REGISTRY.gauge('manager_discord_queue_depth', 'Discord messages waiting to be sent')
+DISCORD_DROPPED = REGISTRY.counter('manager_discord_dropped_messages', 'Discord messages dropped while unreachable')
+
+@dataclass
+class StartupTiming:
+    """Loop-clock timestamps of each startup phase"""
+    launched: float
+    spawned: Optional[float] = None
+    jvm_up: Optional[float] = None
+    world_loaded: Optional[float] = None
+    rcon_ready: Optional[float] = None
+    reported_seconds: Optional[float] = None  # From the server's own "Done (Xs)!"
+
+    def phases(self) -> dict:
+        return {
+            name: getattr(self, name) - self.launched
+            for name in ('spawned', 'jvm_up', 'world_loaded', 'rcon_ready')
+            if getattr(self, name) is not None
+        }
+
+    def summary(self) -> str:
+        parts = [f"{name}: {seconds:.1f}s" for name, seconds in self.phases().items()]
+        if self.reported_seconds is not None:
+            parts.append(f"server reported: {self.reported_seconds:.1f}s")
+        return ', '.join(parts) or 'no phase reached'
+
+@dataclass
+class ShutdownTiming:
+    """Loop-clock timestamps of each shutdown phase"""
+    begun: float
+    warned: Optional[float] = None
+    saved: Optional[float] = None
+    stop_sent: Optional[float] = None
+    exited: Optional[float] = None
+    escalation: Optional[str] = None  # 'terminate' or 'kill' when stop alone did not end the JVM
+
+    def phases(self) -> dict:
+        return {
+            name: getattr(self, name) - self.begun
+            for name in ('warned', 'saved', 'stop_sent', 'exited')
+            if getattr(self, name) is not None
+        }
+
+    def summary(self) -> str:
+        parts = [f"{name}: {seconds:.1f}s" for name, seconds in self.phases().items()]
+        if self.escalation:
+            parts.append(f"forced by {self.escalation}")
+        return ', '.join(parts) or 'no phase reached'
 
 class MinecraftServerScheduler:
-    def __init__(self):
-        self.config = ServerConfig()
-        self.logger = LoggerSetup.setup('scheduler')
-        self.monitor = MinecraftServerMonitor()
+    def __init__(self, config: Optional[ServerConfig] = None,
+                 start_limiter: Optional[asyncio.Semaphore] = None,
+                 clock: Optional[Clock] = None):
+        self.config = config or ServerConfig()
+        # Every schedule decision reads time from here, so it can run on simulated time
+        self.clock = clock or Clock()
+        self.name = self.config.SERVER_NAME
+        self.logger = LoggerSetup.setup(self.config.log_name('scheduler'))
+        # Shared between schedulers so only so many servers cold-load at once
+        self.start_limiter = start_limiter
+        self.tracker = ServerProcessTracker(self.config, self.logger)
+        self.tracker.add_listener('start', self._on_server_process)
+        self.tracker.add_listener('exit', self._on_server_exit)
+        self.log_tailer = LogTailer(
+            os.path.join(self.config.SERVER_DIR, self.config.SERVER_LOG),
+            self.config.LOG_POLL_INTERVAL,
+            self.logger
+        )
+        self.log_tailer.subscribe(
+            self._on_log_event,
+            [SERVER_DONE, LAG_WARNING, SERVER_CRASH, PLAYER_JOIN, PLAYER_LEAVE, OPERATOR_COMMAND]
+        )
+        self.monitor = MinecraftServerMonitor(self.tracker, self.log_tailer, self.config)
+        self.status_bus = StatusPublisher(self.config.STATUS_BUS_NAME)
+        self.last_status: Optional[ServerStatus] = None
+        self._exported_dimensions: set = set()
+        self.lag_detector = LagSpikeDetector(
+            self.config.LAG_SPIKE_MSPT,
+            self.config.LAG_SPIKE_RATIO,
+            self.config.LAG_EWMA_ALPHA,
+            self.config.LAG_SPIKE_COOLDOWN
+        )
+        self.history = StatusHistory(
+            self.config.HISTORY_DIR,
+            self.config.MONITOR_REFRESH,
+            raw_days=self.config.HISTORY_RAW_DAYS,
+            minute_days=self.config.HISTORY_MINUTE_DAYS,
+            hour_days=self.config.HISTORY_HOUR_DAYS,
+            logger=self.logger
+        )
+        self.sessions = PlayerSessionStore(
+            os.path.join(self.config.HISTORY_DIR, self.config.SESSIONS_FILE),
+            self.config.SESSIONS_FLUSH_SECONDS,
+            logger=self.logger
+        ) if self.config.SESSIONS_ENABLED else None
         self.discord = DiscordWebhook.get_instance(self.config)
         self.shutdown_flag = False
-        self.loop = asyncio.new_event_loop()
         self.warning_times = self._calculate_warning_times()
         self.autosave_warnings = self.config.AUTOSAVE_WARNINGS
-        max_warning = max(self.warning_times) if self.warning_times else 1
-        self.shutdown_sequence_start = datetime.combine(datetime.now().date(), self.config.END_TIME) - timedelta(minutes=max_warning)
+        self.shutdown_lead = timedelta(minutes=max(self.warning_times) if self.warning_times else 1)
+        self.calendar = OperatingCalendar(self.config)
+        self.timers = TimerScheduler(self.clock, logger=self.logger)
+        self._transition_job: Optional[Job] = None
+        # Set when an operator cancels a shutdown: the server stays up until then
+        self._hold_until: Optional[datetime] = None
+        self._restart_job: Optional[Job] = None
+        self._status_job: Optional[Job] = None
         self.rcon = RconManager.get_instance(
             self.config.HOST,
             self.config.RCON_PASSWORD,
-            self.config.PORT
+            self.config.PORT,
+            self.config.RCON_TIMEOUT
+        )
+        self.autosave = AutosavePolicy(
+            self.config.AUTOSAVE_INTERVAL * 60,
+            self.config.AUTOSAVE_MAX_DEFER * 60,
+            self.config.AUTOSAVE_MIN_TPS
         )
+        self.saver = WorldSaver(self.rcon, self.log_tailer, self.logger, self.config.AUTOSAVE_TIMEOUT)
+        self.last_save_duration: Optional[float] = None
+        self.backups = BackupEngine(
+            self.config.world_path(),
+            self.config.backup_path(),
+            self.config.BACKUP_WORKERS,
+            self.config.BACKUP_KEEP_HOURLY,
+            self.config.BACKUP_KEEP_DAILY,
+            self.config.BACKUP_KEEP_WEEKLY
+        ) if self.config.BACKUP_ENABLED else None
+        self._last_backup: Optional[float] = None
+        # Held while offline jobs rewrite world files; start_server waits for it
+        self.world_lock = asyncio.Lock()
+        self._last_maintenance: Optional[float] = None
+        self.pregen = ChunkPregenerator(
+            self.rcon,
+            self.config.pregen_state_path(),
+            self.logger,
+            min_tps=self.config.PREGEN_MIN_TPS,
+            max_mspt=self.config.PREGEN_MAX_MSPT,
+            max_delay=self.config.PREGEN_MAX_DELAY
+        ) if self.config.PREGEN_ENABLED else None
+        self._pregen_task: Optional[asyncio.Task] = None
+        self.wake_listener = WakeListener(
+            self.config.WAKE_LISTEN_HOST,
+            self.config.GAME_PORT,
+            self.config.SLEEPING_MOTD,
+            self.config.WAKE_KICK_MSG,
+            self._on_wake_login,
+            self.logger
+        ) if self.config.IDLE_SUSPEND_ENABLED else None
+        self.suspended = False
+        self.governor = ResourceGovernor(self.config) if self.config.GOVERNOR_ENABLED else None
+        self._pressure_restart_since: Optional[float] = None
+        self._thread_sampler: Optional[ThreadSampler] = None
+        self._thread_profile_task: Optional[asyncio.Task] = None
+        self._wake_task: Optional[asyncio.Task] = None
+        self._thread_profile_at = -math.inf
+        self.active_countdown: Optional[Countdown] = None
+        self.countdown_kind: Optional[str] = None
+        self._last_player_seen = time.monotonic()
+        self._save_deferred = False
         self.starting_pid = None
         self.starting_time = None
+        self.last_startup: Optional[StartupTiming] = None
+        DISCORD_QUEUE.set_function(
+            lambda: sum(webhook.dispatcher.queue_depth for webhook in DiscordWebhook.instances())
+        )
+        DISCORD_DROPPED.set_function(
+            lambda: sum(webhook.dispatcher.dropped for webhook in DiscordWebhook.instances())
+        )
 
     def _calculate_warning_times(self) -> list:
-        today = datetime.now().date()
+        today = self.clock.now().date()
         start_dt = datetime.combine(today, self.config.START_TIME)
         end_dt = datetime.combine(today, self.config.END_TIME)
     
@@ -58,41 +287,21 @@ class MinecraftServerScheduler:
         Returns:
             bool: True if current time falls within a 24/7 operation day
         """
-        now = datetime.now()
-        current_time = now.time()
-        
-        if current_time < self.config.END_TIME:
-            return (now - timedelta(days=1)).weekday() in self.config.TWENTYFOUR_HOUR_DAYS
-        return now.weekday() in self.config.TWENTYFOUR_HOUR_DAYS
+        return self.calendar.is_24h_day(self.clock.now())
 
     def _is_operating_hours(self) -> bool:
-        if self._is_24h_operation():
-            return True
-            
-        now = datetime.now()
-        today = now.date()
-        current_time = now.time()
-        
-        start_dt = datetime.combine(today, self.config.START_TIME)
-        end_dt = datetime.combine(today, self.config.END_TIME)
-    
-        if self.config.END_TIME < self.config.START_TIME:
-            if current_time >= self.config.START_TIME:
-                end_dt = datetime.combine(today + timedelta(days=1), self.config.END_TIME)
-            else:
-                start_dt = datetime.combine(today - timedelta(days=1), self.config.START_TIME)
-    
-        return start_dt <= now <= end_dt
+        now = self.clock.now()
+        if self._hold_until is not None:
+            if now < self._hold_until:
+                return True
+            self._hold_until = None
+        return self.calendar.is_operating(now)
 
-    def _get_java_process(self) -> Optional[psutil.Process]:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                if (proc.name() == 'java.exe' and 
-                    'forge' in ' '.join(proc.cmdline()).lower()):
-                    return proc
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        return None
+    async def notify(self, message: str):
+        """Discord message, tagged with the server name when several servers are managed"""
+        if self.name != ServerConfig.SERVER_NAME:
+            message = f"[{self.name}] {message}"
+        await self.discord.send_message(message)
 
     async def send_message(self, message: str):
         try:
@@ -100,52 +309,207 @@ class MinecraftServerScheduler:
         except Exception as e:
             self.logger.error(f"Failed to send message: {e}")
 
-    async def _send_timed_warnings(self, warning_times: list, warning_msg: str, countdown_msg: str):
-        warning_times = sorted(warning_times, reverse=True)
+    def _countdown_plan(self, warning_times: list, warning_msg: str, countdown_msg: str,
+                        cancel_msg: str = '') -> CountdownPlan:
+        return CountdownPlan(
+            warning_times, warning_msg, countdown_msg,
+            final_seconds=self.config.COUNTDOWN_SECONDS,
+            style=self.config.COUNTDOWN_STYLE,
+            marks=self.config.COUNTDOWN_MARKS,
+            cancel_msg=cancel_msg
+        )
+
+    async def _run_countdown(self, plan: CountdownPlan, kind: str) -> bool:
+        """Broadcast a countdown in game; False if it was cancelled before reaching zero"""
+        countdown = self.active_countdown = Countdown(plan, self.rcon.send_command, self.clock, self.logger)
+        self.countdown_kind = kind
+        try:
+            return await countdown.run()
+        finally:
+            if self.active_countdown is countdown:
+                self.active_countdown = None
+                self.countdown_kind = None
+
+    def cancel_countdown(self) -> bool:
+        """Abort the running shutdown, restart or save countdown together with the action it leads up to"""
+        if self.active_countdown is None:
+            return False
+        self.logger.info("Countdown cancelled")
+        self.active_countdown.cancel()
+        return True
+
+    def reschedule_countdown(self, seconds: float) -> bool:
+        """Let the running countdown end `seconds` from now instead"""
+        if self.active_countdown is None:
+            return False
+        self.logger.info(f"Countdown moved to end in {seconds:.0f}s")
+        self.active_countdown.reschedule(seconds)
+        return True
+
+    def cancel_shutdown(self) -> bool:
+        """
+        Keep the server up past its shutdown, whether the countdown is running or still
+        pending, until the next operating window opens; health checks and the calendar
+        leave it running until then.
+        """
+        job = self._transition_job
+        if self.countdown_kind == 'shutdown':
+            self.cancel_countdown()
+        elif job is not None and job.name == 'shutdown' and not job.running:
+            self._set_transition(None)
+            self.logger.info("Scheduled shutdown cancelled")
+        else:
+            return False
+
+        now = self.clock.now()
+        following = self.calendar.next_window(now)
+        self._hold_until = following.start if following is not None else now + timedelta(days=1)
+        self.logger.info(f"Server kept running until {self._hold_until:%Y-%m-%d %H:%M}")
+        if job is not None and self._transition_job is None:
+            self._arm_transition(now)
+        return True
+
+    async def _on_operator_command(self, event: LogEvent):
+        command, source = event.data['command'], event.data['source']
+        self.logger.info(f"Operator command from {source}: !{command}")
+        if command == 'cancel':
+            counting = self.countdown_kind
+            if counting not in (None, 'shutdown'):
+                self.cancel_countdown()
+            elif self.cancel_shutdown():
+                if counting is None:
+                    # A running countdown announces its own cancellation
+                    await self.send_message(self.config.SHUTDOWN_CANCELLED_MSG)
+                await self.notify(self.config.DISCORD_SHUTDOWN_CANCELLED.format(
+                    source=source, until=self._hold_until
+                ))
+            else:
+                await self.send_message(self.config.NOTHING_TO_CANCEL_MSG)
+        elif command == 'postpone':
+            minutes = int(event.data['minutes'] or self.config.POSTPONE_DEFAULT_MINUTES)
+            if not self.reschedule_countdown(minutes * 60):
+                await self.send_message(self.config.NOTHING_TO_CANCEL_MSG)
+
+    async def _kill_stale_server(self):
+        proc = self.tracker.get_process()
+        if proc is None:
+            return
+        self.logger.warning(f"Stopping leftover server process (PID {proc.pid})")
+        try:
+            # Only ever this server's process tree, never every java process on the host
+            await self.tracker.stop_tree(self.config.SHUTDOWN_KILL_GRACE)
+        except Exception as e:
+            self.logger.error(f"Failed to stop leftover server process: {e}")
+
+    async def _wait_until_ready(self, process: subprocess.Popen, timing: StartupTiming) -> bool:
+        """Wait for JVM spawn, the log's Done line and an answering RCON port"""
+        loop = asyncio.get_running_loop()
+        deadline = timing.launched + self.config.STARTUP_TIMEOUT
+        done = asyncio.Event()
+
+        def on_done(event: LogEvent):
+            if timing.world_loaded is None:
+                timing.world_loaded = loop.time()
+                timing.reported_seconds = float(event.data['seconds'])
+            done.set()
+
+        unsubscribe = self.log_tailer.subscribe(on_done, [SERVER_DONE])
+        try:
+            delay = 0.1
+            while timing.jvm_up is None:
+                if self.tracker.attach_launcher(process.pid) is not None:
+                    timing.jvm_up = loop.time()
+                    break
+                if process.poll() is not None and not self.tracker.is_running():
+                    self.logger.error(f"Launch script exited with code {process.returncode}")
+                    return False
+                if loop.time() >= deadline:
+                    return False
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+            # RCON only listens once the world is loaded; a refused connect is cheap,
+            # and the Done line cuts the backoff short.
+            delay = 0.25
+            while loop.time() < deadline:
+                if not self.tracker.is_running():
+                    self.logger.error("Server process exited during startup")
+                    return False
+                if await self.rcon.probe():
+                    timing.rcon_ready = loop.time()
+                    return True
+                try:
+                    await asyncio.wait_for(done.wait(), delay)
+                    done.clear()
+                    delay = 0.25
+                except asyncio.TimeoutError:
+                    delay = min(delay * 2, 2.0)
+            return False
+        finally:
+            unsubscribe()
+
+    @contextlib.asynccontextmanager
+    async def _start_slot(self):
+        """Hold the shared start slot while the server cold-loads"""
+        if self.start_limiter is None:
+            yield
+            return
+        if self.start_limiter.locked():
+            self.logger.info("Waiting for another server to finish starting")
+        START_QUEUE.inc()
+        try:
+            await self.start_limiter.acquire()
+        finally:
+            START_QUEUE.dec()
+        try:
+            yield
+        finally:
+            self.start_limiter.release()
 
-        for i in range(len(warning_times)):
-            current_warning = warning_times[i]
-            next_warning = warning_times[i + 1] if i + 1 < len(warning_times) else 0
+    async def _launch(self) -> Optional[StartupTiming]:
+        """Run the launch script and wait for readiness; None if the server never came up"""
+        bat_path = os.path.join(self.config.SERVER_DIR, self.config.SERVER_SCRIPT)
         
-            await self.send_message(warning_msg.format(minutes=current_warning))
+        timing = StartupTiming(launched=asyncio.get_running_loop().time())
+        process = subprocess.Popen(
+            [bat_path], 
+            cwd=self.config.SERVER_DIR,
+            creationflags=subprocess.CREATE_NEW_CONSOLE
+        )
+        timing.spawned = asyncio.get_running_loop().time()
+        self.starting_pid = process.pid
         
-            if i < len(warning_times) - 1:
-                wait_minutes = current_warning - next_warning
-                await asyncio.sleep(wait_minutes * 60)
-    
-        await asyncio.sleep(max(0, warning_times[-1] * 60 - 10))
-    
-        for seconds in range(10, 0, -1):
-            await self.send_message(countdown_msg.format(seconds=seconds))
-            await asyncio.sleep(1)
+        if await self._wait_until_ready(process, timing):
+            return timing
+        self.logger.error(f"Server failed to start within timeout - {timing.summary()}")
+        return None
+
+    async def start_server(self, announce: bool = True):
+        if self.starting_time:
+            self.logger.info("Server start already in progress")
+            return False
 
-    async def start_server(self):
         self.shutdown_flag = False
+        self.starting_time = self.clock.now()
         self.logger.info("Starting Minecraft server...")
         try:
-            os.system('taskkill /f /im java.exe 2>nul')
-            await asyncio.sleep(5)
-            
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            bat_path = os.path.join(current_dir, "..", "server.bat")
+            await self._kill_stale_server()
+            if self.world_lock.locked():
+                self.logger.info("Waiting for world maintenance to finish")
+            async with self.world_lock:
+                pass
             
-            process = subprocess.Popen(
-                [bat_path], 
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
-            self.starting_pid = process.pid
-            self.starting_time = datetime.now()
-            
-            for _ in range(30):
-                await asyncio.sleep(10)
-                if self._get_java_process() is not None:
-                    if await self.rcon.send_command("list"):
-                        await self.send_message(self.config.SERVER_START_MSG)
-                        await self.discord.send_message(self.config.DISCORD_SERVER_START)
-                        self.logger.info("Server started successfully")
-                        return True
-            
-            self.logger.error("Server failed to start within timeout")
+            async with self._start_slot():
+                timing = await self._launch()
+
+            if timing is not None:
+                self._record_startup(timing)
+                if announce:
+                    await self.send_message(self.config.SERVER_START_MSG)
+                    await self.notify(self.config.DISCORD_SERVER_START)
+                self.logger.info(f"Server started successfully - {timing.summary()}",
+                                 extra={'event': 'startup', 'phases': timing.phases()})
+                return True
             return False
             
         except Exception as e:
@@ -155,73 +519,596 @@ class MinecraftServerScheduler:
             self.starting_pid = None
             self.starting_time = None
 
-    async def stop_server(self):
-        if self.shutdown_flag or self._is_24h_operation():
+    def _record_startup(self, timing: StartupTiming):
+        self.last_startup = timing
+        self.autosave.mark_clean()
+        # Idle time counts from the start, not from whoever left before it
+        self._last_player_seen = time.monotonic()
+        SERVER_STARTS.labels(self.name).inc()
+        for phase, seconds in timing.phases().items():
+            STARTUP_PHASE.labels(self.name, phase).set(seconds)
+        STARTUP_DURATION.labels(self.name).observe(timing.phases()['rcon_ready'])
+
+    async def _halt(self, timing: ShutdownTiming) -> bool:
+        """Send stop and wait for the JVM to exit, escalating at the grace deadline; True once it is gone"""
+        loop = asyncio.get_running_loop()
+        # Also re-attaches the handle that wait_for_exit() and stop_tree() work on
+        if self.tracker.get_process() is None:
+            self.logger.info("No server process running, nothing to stop")
+            timing.stop_sent = timing.exited = loop.time()
+            return True
+        timing.stop_sent = loop.time()
+        if await self.rcon.send_command("stop") is None:
+            self.logger.warning("stop was not acknowledged, waiting for the process anyway")
+        self.logger.info("Shutdown command sent")
+
+        if not await self.tracker.wait_for_exit(self.config.SHUTDOWN_GRACE):
+            self.logger.warning(f"Server still running {self.config.SHUTDOWN_GRACE}s after stop")
+            timing.escalation = await self.tracker.stop_tree(self.config.SHUTDOWN_KILL_GRACE)
+        if self.tracker.is_running():
+            return False
+        timing.exited = loop.time()
+        for phase, seconds in timing.phases().items():
+            SHUTDOWN_PHASE.labels(self.name, phase).set(seconds)
+        SHUTDOWN_DURATION.labels(self.name).observe(timing.exited - timing.stop_sent)
+        self.logger.info(f"Server stopped - {timing.summary()}",
+                         extra={'event': 'shutdown', 'phases': timing.phases(), 'escalation': timing.escalation})
+        return True
+
+    async def stop_server(self, backup: bool = False, countdown: bool = True):
+        if self.shutdown_flag:
             return
             
         self.shutdown_flag = True
         self.logger.info("Initiating server shutdown sequence")
+        loop = asyncio.get_running_loop()
+        timing = ShutdownTiming(begun=loop.time())
 
         try:
-            await self._send_timed_warnings(
-                self.warning_times,
-                self.config.SHUTDOWN_WARNING_MSG,
-                self.config.SHUTDOWN_COUNTDOWN_MSG
-            )
-            await self.rcon.send_command("stop")
-            await self.discord.send_message(self.config.DISCORD_SERVER_STOP)
-            self.logger.info("Shutdown command sent")
-            
-            await asyncio.sleep(30)
-            os.system('taskkill /f /im java.exe 2>nul')
+            await self._stop_pregen()
+            if countdown and not await self._run_countdown(self._countdown_plan(
+                    self.warning_times,
+                    self.config.SHUTDOWN_WARNING_MSG,
+                    self.config.SHUTDOWN_COUNTDOWN_MSG,
+                    self.config.SHUTDOWN_CANCELLED_MSG), 'shutdown'):
+                self.logger.info("Shutdown cancelled during the countdown")
+                self.shutdown_flag = False
+                return
+            timing.warned = loop.time()
+            if backup and self.backups and self.config.BACKUP_BEFORE_STOP:
+                try:
+                    await self.saver.save(hooks=[self.backup_world])
+                except SaveError as e:
+                    self.logger.error(f"Pre-shutdown save failed, skipping backup: {e}")
+                timing.saved = loop.time()
+            if not await self._halt(timing):
+                self.logger.error(f"Server process survived the shutdown sequence - {timing.summary()}")
+            await self.notify(self.config.DISCORD_SERVER_STOP)
+        except asyncio.CancelledError:
+            if timing.stop_sent is None:
+                # Preempted before the server was told to stop; it keeps running
+                self.shutdown_flag = False
+            raise
         except Exception as e:
             self.logger.error(f"Error during shutdown: {e}")
 
-    async def auto_save(self):
+    def _warm_cache(self, limit: int) -> int:
+        """Read the server jars so the relaunch finds them in the OS file cache; returns bytes read"""
+        server_dir = self.config.SERVER_DIR
+        paths = [os.path.join(server_dir, name) for name in sorted(os.listdir(server_dir)) if name.endswith('.jar')]
+        for folder in ('mods', 'libraries'):
+            for root, _, names in os.walk(os.path.join(server_dir, folder)):
+                paths.extend(os.path.join(root, name) for name in sorted(names) if name.endswith('.jar'))
+        total = 0
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    while total < limit:
+                        chunk = f.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        total += len(chunk)
+            except OSError:
+                continue
+            if total >= limit:
+                break
+        return total
+
+    async def _prepare_launch(self):
+        """Launch prerequisites, done while players still see the restart countdown"""
+        script = os.path.join(self.config.SERVER_DIR, self.config.SERVER_SCRIPT)
+        if not os.path.isfile(script):
+            raise FileNotFoundError(f"Launch script not found: {script}")
+        async with self.world_lock:
+            pass
+        if self.config.RESTART_PREWARM_MB > 0:
+            warmed = await asyncio.get_running_loop().run_in_executor(
+                None, self._warm_cache, self.config.RESTART_PREWARM_MB * 1024 * 1024
+            )
+            self.logger.info(f"Pre-read {warmed / 1024 / 1024:.0f} MB of server jars")
+
+    async def restart_server(self, reason: str = "Planned restart") -> bool:
+        """Stop and relaunch, preparing the launch during the countdown; True once the server is back"""
+        if self.shutdown_flag or self.starting_time:
+            return False
+
+        self.logger.info(f"{reason}: restarting server")
+        loop = asyncio.get_running_loop()
+        self.shutdown_flag = True
+        # Keeps health checks from reacting to the planned gap
+        self.starting_time = self.clock.now()
+        timing = ShutdownTiming(begun=loop.time())
+        prepare = loop.create_task(self._prepare_launch())
+        try:
+            await self._stop_pregen()
+            if self.config.RESTART_WARNINGS and not await self._run_countdown(self._countdown_plan(
+                    self.config.RESTART_WARNINGS,
+                    self.config.RESTART_WARNING_MSG,
+                    self.config.RESTART_COUNTDOWN_MSG,
+                    self.config.RESTART_CANCELLED_MSG), 'restart'):
+                self.logger.info("Restart cancelled during the countdown")
+                return False
+            timing.warned = loop.time()
+            # A server that could not be relaunched is not stopped in the first place
+            await prepare
+            if not await self._halt(timing):
+                self.logger.error(f"Old server process still running, not relaunching - {timing.summary()}")
+                return False
+
+            self.shutdown_flag = False
+            async with self._start_slot():
+                startup = await self._launch()
+            if startup is None:
+                return False
+            self._record_startup(startup)
+            downtime = startup.rcon_ready - timing.stop_sent
+            RESTART_DOWNTIME.labels(self.name).observe(downtime)
+            self.logger.info(f"Server restarted with {downtime:.1f}s downtime - {startup.summary()}",
+                             extra={'event': 'restart', 'downtime': downtime, 'phases': startup.phases()})
+            await self.send_message(self.config.SERVER_START_MSG)
+            await self.notify(self.config.DISCORD_SERVER_RESTART.format(downtime=downtime))
+            return True
+        except Exception as e:
+            self.logger.error(f"Error during restart: {e}")
+            return False
+        finally:
+            if not prepare.done():
+                prepare.cancel()
+            await asyncio.gather(prepare, return_exceptions=True)
+            self.shutdown_flag = False
+            self.starting_pid = None
+            self.starting_time = None
+
+    async def auto_save(self, warn: bool = True) -> bool:
+        """Flush the world to disk; True once the server confirmed the save"""
         if self.shutdown_flag:
-            return
+            return False
             
         self.logger.info("Initiating server auto-save sequence")
 
         try:
-            await self._send_timed_warnings(
-                self.autosave_warnings,
-                self.config.AUTOSAVE_WARNING_MSG,
-                self.config.AUTOSAVE_COUNTDOWN_MSG
-            )
+            if warn and self.autosave_warnings and not await self._run_countdown(self._countdown_plan(
+                    self.autosave_warnings,
+                    self.config.AUTOSAVE_WARNING_MSG,
+                    self.config.AUTOSAVE_COUNTDOWN_MSG), 'save'):
+                self.logger.info("Auto-save cancelled during the countdown")
+                return False
             await self.send_message(self.config.AUTOSAVE_START_MSG)
-            await self.rcon.send_command("save-all")
-            await asyncio.sleep(60)
-            await self.send_message(self.config.AUTOSAVE_COMPLETE_MSG)
+            duration = await self.saver.save(hooks=self._post_save_hooks())
+            self.autosave.mark_clean()
+            self.last_save_duration = duration
+            SAVE_DURATION.labels(self.name).observe(duration)
+            self.logger.info(f"World saved in {duration:.1f}s")
+            await self.send_message(self.config.AUTOSAVE_COMPLETE_MSG.format(seconds=duration))
+            return True
+        except SaveError as e:
+            self.logger.error(f"Auto-save failed: {e}")
         except Exception as e:
             self.logger.error(f"Error during auto-save: {e}")
+        return False
 
-    async def schedule_autosaves(self):
-        start_hour = self.config.START_TIME.hour
-        end_hour = self.config.END_TIME.hour
-        if end_hour < start_hour:
-            end_hour += 24
-            
-        save_end_hour = (end_hour - 1) % 24
-        
-        for hour in range(start_hour + 1, save_end_hour):
-            hour = hour % 24
-            schedule.every().day.at(f"{hour:02d}:00").do(
-                lambda: asyncio.create_task(self.auto_save())
-            )
+    def _post_save_hooks(self) -> list:
+        if self.backups is None:
+            return []
+        interval = self.config.BACKUP_INTERVAL * 60
+        if self._last_backup is not None and time.monotonic() - self._last_backup < interval:
+            return []
+        return [self.backup_world]
 
-    async def health_check(self):
-        if self.shutdown_flag:
+    async def backup_world(self):
+        """Incremental snapshot of the world; run while automatic saving is off"""
+        self.logger.info("Backing up world...")
+        try:
+            # Shielded: a preempted save must not turn saving back on while files are still copied
+            result = await self._run_world_io(self.backups.snapshot)
+        except Exception as e:
+            BACKUP_FAILURES.labels(self.name).inc()
+            self.logger.error(f"World backup failed: {e}")
+            await self.notify(self.config.DISCORD_BACKUP_FAILED.format(error=e))
             return
+        self._last_backup = time.monotonic()
+        BACKUP_DURATION.labels(self.name).observe(result.seconds)
+        BACKUP_BYTES.labels(self.name).inc(result.new_bytes)
+        BACKUP_CHANGED.labels(self.name).set(result.changed)
+        self.logger.info(
+            f"Backup {result.name}: {result.changed}/{result.files} files changed, "
+            f"{result.new_bytes / 1024 / 1024:.1f} MB stored in {result.seconds:.1f}s"
+        )
+        try:
+            removed = await self._run_world_io(self.backups.prune)
+            if removed:
+                self.logger.info(f"Pruned {len(removed)} old snapshot(s)")
+        except Exception as e:
+            self.logger.error(f"Backup pruning failed: {e}")
+
+    async def _run_world_io(self, function, *args):
+        """Run blocking world-file work; cancellation waits for it instead of abandoning it"""
+        future = asyncio.get_running_loop().run_in_executor(None, function, *args)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await future
+            raise
+
+    async def world_maintenance(self):
+        """Region report and optional chunk pruning, only while the server is stopped off-hours"""
+        if self.starting_time:
+            return
+        if self._is_operating_hours() or await self._check_server_running():
+            return
+        interval = self.config.WORLD_MAINTENANCE_INTERVAL * 3600
+        if self._last_maintenance is not None and time.monotonic() - self._last_maintenance < interval:
+            return
+
+        async with self.world_lock:
+            self._last_maintenance = time.monotonic()
+            analyzer = RegionAnalyzer(self.config.world_path(), self.config.ANALYZER_WORKERS)
+            self.logger.info("Analyzing region files...")
+            try:
+                rules = analyzer.rules(
+                    self.config.CHUNK_PRUNE_MIN_INHABITED,
+                    self.config.CHUNK_PRUNE_MIN_AGE_HOURS,
+                    self.config.CHUNK_PRUNE_KEEP_RADIUS
+                )
+                area = self.pregen.area if self.pregen else None
+                if area is not None:
+                    # Pre-generated chunks were never inhabited; pruning them would undo the work
+                    reach = max(abs(area.center_x - rules.spawn[0]), abs(area.center_z - rules.spawn[1]))
+                    rules.keep_radius = max(rules.keep_radius, reach + area.radius + area.batch)
+                report = await self._run_world_io(analyzer.analyze, rules)
+                for line in report.summary():
+                    self.logger.info(line)
+                if not self.config.CHUNK_PRUNE_ENABLED or not report.prunable:
+                    return
 
-        if self.starting_pid:
-            if (datetime.now() - self.starting_time).total_seconds() > 300:
-                self.starting_pid = None
-                self.starting_time = None
+                dry_run = self.config.CHUNK_PRUNE_DRY_RUN
+                if not dry_run and self.backups is not None:
+                    # Safety net on top of the copies prune() keeps of every rewritten file
+                    await self._run_world_io(self.backups.snapshot)
+                removed, freed = await self._run_world_io(
+                    analyzer.prune, report, os.path.join(self.config.backup_path(), 'pruned'), dry_run
+                )
+                self.logger.info(
+                    f"{'Would prune' if dry_run else 'Pruned'} {removed} chunks, "
+                    f"{freed / 1024 / 1024:.1f} MB"
+                )
+            except Exception as e:
+                self.logger.error(f"World maintenance failed: {e}")
+
+    def _pregen_area(self) -> Optional[PregenArea]:
+        """Target area from PREGEN_CENTER, in chunks; None until the world exists"""
+        radius = self.config.PREGEN_RADIUS
+        center = self.config.PREGEN_CENTER
+        if center in ('spawn', 'border'):
+            level = read_level(self.config.world_path())
+            if center == 'border':
+                if 'BorderSize' not in level:
+                    return None
+                center = (level.get('BorderCenterX', 0), level.get('BorderCenterZ', 0))
+                radius = min(radius, level['BorderSize'] / 2)
             else:
-                self.logger.info("Health Check - Server is currently starting")
+                if 'SpawnX' not in level:
+                    return None
+                center = (level['SpawnX'], level.get('SpawnZ', 0))
+        return PregenArea(
+            self.config.PREGEN_DIMENSION,
+            math.floor(center[0]) >> 4,
+            math.floor(center[1]) >> 4,
+            math.ceil(radius / 16),
+            max(1, min(self.config.PREGEN_BATCH, MAX_BATCH))
+        )
+
+    def _pregen_may_run(self) -> bool:
+        """Nobody online for a while and the shutdown sequence not close"""
+        if self.shutdown_flag:
+            return False
+        if self.last_status and self.last_status.players:
+            return False
+        if time.monotonic() - self._last_player_seen < self.config.PREGEN_IDLE_MINUTES * 60:
+            return False
+        return not self._shutdown_due_within(timedelta(minutes=self.config.PREGEN_STOP_LEAD))
+
+    async def _pregen_check(self):
+        """Resume pre-generation whenever an idle window opens"""
+        if self._pregen_task is not None or self.shutdown_flag or self.starting_time or self.world_lock.locked():
+            return
+        area = self._pregen_area()
+        if area is None:
+            return
+        self.pregen.plan(area)
+        PREGEN_PROGRESS.labels(self.name).set(self.pregen.progress)
+        if self.pregen.done or not self._pregen_may_run():
+            return
+
+        if not await self._check_server_running():
+            if self._is_operating_hours() or not self.config.PREGEN_OFF_HOURS:
                 return
+            self.logger.info("Starting server off-hours for chunk pre-generation")
+            if not await self.start_server(announce=False):
+                return
+        self._pregen_task = asyncio.get_running_loop().create_task(self._run_pregen())
+
+    async def _run_pregen(self):
+        area = self.pregen.area
+        first = self.pregen.next_index
+        started = time.monotonic()
+        self.logger.info(
+            f"Pre-generating {area.dimension} within {area.radius} chunks of "
+            f"({area.center_x}, {area.center_z}), {self.pregen.progress:.1%} done"
+        )
+        try:
+            result = await self.pregen.run(self._pregen_may_run, self._on_pregen_batch)
+        except Exception as e:
+            self.logger.error(f"Chunk pre-generation failed: {e}")
+            return
+        finally:
+            self._pregen_task = None
+
+        chunks = (self.pregen.next_index - first) * area.batch * area.batch
+        elapsed = time.monotonic() - started
+        self.logger.info(
+            f"Chunk pre-generation {result} after {chunks} chunks in {elapsed / 60:.1f} minutes, "
+            f"{self.pregen.progress:.1%} done"
+        )
+        if result == PREGEN_DONE:
+            await self.notify(self.config.DISCORD_PREGEN_DONE.format(chunks=area.total * area.batch * area.batch))
+
+    def _on_pregen_batch(self, chunks: int):
+        PREGEN_CHUNKS.labels(self.name).inc(chunks)
+        PREGEN_PROGRESS.labels(self.name).set(self.pregen.progress)
+
+    async def _stop_pregen(self):
+        task = self._pregen_task
+        if task is None:
+            return
+        self.logger.info("Stopping chunk pre-generation")
+        self.pregen.stop()
+        await asyncio.gather(task, return_exceptions=True)
+
+    def _arm_transition(self, now: datetime):
+        """Arm the next start or shutdown job from the operating calendar"""
+        if self._hold_until is not None and now < self._hold_until:
+            # The operator cancelled the last shutdown; nothing is due before the hold ends
+            now = self._hold_until
+        window = self.calendar.window_at(now)
+        if window is not None:
+            self._arm_shutdown(window, now)
+            return
+
+        window = self.calendar.next_window(now)
+        if window is None:
+            self.logger.warning("No operating windows configured")
+            return
+        self._set_transition(self.timers.call_at(
+            window.start, lambda: self._scheduled_start(window),
+            'start', exclusive=True, preempt=True
+        ))
+        self.logger.info(f"Next server start: {window.start:%Y-%m-%d %H:%M}")
+
+    def _arm_shutdown(self, window: OperatingWindow, now: datetime):
+        if window.open_ended:
+            # 24/7 beyond the calendar horizon: look again once it has rolled forward
+            self._set_transition(self.timers.call_at(
+                now + timedelta(days=1), self._recheck_calendar, 'calendar'
+            ))
+            return
+
+        shutdown_at = max(window.end - self.shutdown_lead, now)
+        self._set_transition(self.timers.call_at(
+            shutdown_at, lambda: self._scheduled_stop(window),
+            'shutdown', exclusive=True, preempt=True
+        ))
+        self.logger.info(f"Shutdown sequence will start at: {shutdown_at:%Y-%m-%d %H:%M}")
+
+    def _set_transition(self, job: Optional[Job]):
+        if self._transition_job is not None:
+            self._transition_job.cancel()
+        self._transition_job = job
+
+    async def _recheck_calendar(self):
+        self._transition_job = None
+        self._arm_transition(self.clock.now())
+
+    async def _scheduled_start(self, window: OperatingWindow):
+        self._transition_job = None
+        self._arm_shutdown(window, self.clock.now())
+        if not await self._check_server_running():
+            await self.start_server()
+
+    async def _scheduled_stop(self, window: OperatingWindow):
+        self._transition_job = None
+        try:
+            if self.suspended:
+                # Already stopped; just stop answering on the game port
+                self.suspended = False
+                await self.wake_listener.close()
+                self.logger.info("Operating window closed while suspended")
+                return
+            await self.stop_server(backup=True)
+        finally:
+            # Never re-arm inside the window that is just closing
+            self._arm_transition(max(self.clock.now(), window.end))
+
+    async def _idle_check(self):
+        """Suspend the server once it has been empty for IDLE_SUSPEND_MINUTES"""
+        if self.suspended or self.shutdown_flag or self.starting_time or not self._is_operating_hours():
+            return
+        if self._is_24h_operation() and not self.config.IDLE_SUSPEND_24H_DAYS:
+            return
+        status = self.last_status
+        if status is None or not status.is_online or status.players:
+            return
+        if time.monotonic() - self._last_player_seen < self.config.IDLE_SUSPEND_MINUTES * 60:
+            return
+        if self._pregen_task is not None or (self.pregen is not None and not self.pregen.done):
+            # Empty hours are what pre-generation runs in
+            return
+        await self.suspend()
+
+    async def suspend(self):
+        """Stop the empty server and answer on its game port until someone tries to join"""
+        self.logger.info(f"No players for {self.config.IDLE_SUSPEND_MINUTES} minutes, suspending server")
+        # stop flushes the world; _halt only returns once the JVM is gone
+        await self.stop_server(countdown=False)
+        if await self._check_server_running():
+            self.logger.error("Server did not stop, staying awake")
+            self.shutdown_flag = False
+            return
+
+        self.suspended = True
+        try:
+            await self.wake_listener.start()
+        except OSError as e:
+            self.logger.error(f"Wake listener failed on port {self.config.GAME_PORT}: {e}, starting server again")
+            await self.wake()
+            return
+        await self.notify(self.config.DISCORD_SERVER_SUSPEND.format(minutes=self.config.IDLE_SUSPEND_MINUTES))
+
+    def _on_wake_login(self, player: str):
+        if self._wake_task is None:
+            self._wake_task = asyncio.get_running_loop().create_task(self._wake_for(player))
+
+    async def _wake_for(self, player: str):
+        try:
+            await self.wake(player)
+        except Exception as e:
+            self.logger.error(f"Waking the server for {player} failed: {e}")
+        finally:
+            self._wake_task = None
+
+    async def wake(self, player: Optional[str] = None):
+        """Leave suspension: free the game port and start the server if the schedule allows it"""
+        if not self.suspended:
+            return
+        self.suspended = False
+        await self.wake_listener.close()
+        if not self._is_operating_hours():
+            return
+        if player:
+            self.logger.info(f"{player} tried to join, waking server")
+            await self.notify(self.config.DISCORD_SERVER_WAKE.format(player=player))
+        await self.start_server()
+
+    def _shutdown_due_within(self, window: timedelta) -> bool:
+        job = self._transition_job
+        return (job is not None and job.name == 'shutdown' and job.at is not None
+                and job.at - self.clock.now() <= window)
+
+    def _restart_due_within(self, window: timedelta) -> bool:
+        job = self._restart_job
+        return job is not None and not job.cancelled and job.at - self.clock.now() <= window
+
+    def _arm_restart(self, now: datetime):
+        """Arm the next daily planned restart so that the relaunch lands on the configured time"""
+        if not self.config.RESTART_TIMES:
+            return
+        lead = timedelta(minutes=max(self.config.RESTART_WARNINGS, default=0))
+        countdowns = [
+            datetime.combine(now.date() + timedelta(days=days), at) - lead
+            for days in (0, 1, 2) for at in self.config.RESTART_TIMES
+        ]
+        at = min(countdown for countdown in countdowns if countdown > now)
+        # Exclusive so start and shutdown jobs preempt it; never preempts them itself
+        self._restart_job = self.timers.call_at(at, self._planned_restart, 'restart', exclusive=True)
+
+    async def _planned_restart(self):
+        self._arm_restart(self.clock.now() + timedelta(seconds=1))
+        if not self._is_operating_hours() or not await self._check_server_running():
+            return
+        if self._shutdown_due_within(timedelta(hours=1)):
+            self.logger.info("Skipping planned restart: shutdown is due within the hour")
+            return
+        await self.restart_server()
+
+    async def _autosave_check(self):
+        """Save once the world has been dirty long enough and the server can take it"""
+        if self.shutdown_flag or self.starting_time or not await self._check_server_running():
+            return
+        if (self._shutdown_due_within(timedelta(minutes=self.config.AUTOSAVE_MAX_DEFER))
+                or self._restart_due_within(timedelta(minutes=self.config.AUTOSAVE_MAX_DEFER))):
+            # stop saves the world anyway
+            return
+
+        tps = self.last_status.tps if self.last_status and self.last_status.is_online else 20.0
+        decision, reason = self.autosave.decide(tps)
+        if decision == SAVE:
+            self._save_deferred = False
+            self.logger.info(f"Auto-save due: {reason}")
+            await self.auto_save()
+        elif decision == DEFER and not self._save_deferred:
+            self._save_deferred = True
+            SAVES_DEFERRED.labels(self.name).inc()
+            self.logger.info(f"Auto-save deferred: {reason}")
+
+    async def _governor_check(self):
+        """Take the next step against sustained memory or CPU pressure"""
+        if self.shutdown_flag or self.starting_time or not await self._check_server_running():
+            return
+        now = time.monotonic()
+        step = self.governor.decide(now)
+        RESOURCE_PRESSURE.labels(self.name).set(self.governor.level)
+        reason = self.governor.reason
+        if step is not None:
+            RESOURCE_ACTIONS.labels(self.name, step).inc()
+        if step == PRESSURE_WARN:
+            self.logger.warning(f"Resource pressure: {reason}")
+            await self.notify(self.config.DISCORD_RESOURCE_WARNING.format(reason=reason))
+        elif step == PRESSURE_SAVE:
+            self.logger.warning(f"Resource pressure persists, forcing a save: {reason}")
+            await self.auto_save(warn=False)
+        elif step == PRESSURE_RESTART:
+            self.logger.warning(f"Resource pressure persists after saving, restart planned: {reason}")
+            self._pressure_restart_since = now
+
+        if self.governor.stage != PRESSURE_RESTART:
+            self._pressure_restart_since = None
+        elif self._pressure_restart_since is not None:
+            await self._pressure_restart(now, reason)
+
+    async def _pressure_restart(self, now: float, reason: str):
+        """Restart for resource pressure once few enough players are online, or the wait ran out"""
+        players = len(self.last_status.players) if self.last_status else 0
+        waited = now - self._pressure_restart_since
+        if players > self.config.GOVERNOR_RESTART_MAX_PLAYERS and waited < self.config.GOVERNOR_RESTART_WAIT * 60:
+            return
+        self._pressure_restart_since = None
+        if (self._shutdown_due_within(timedelta(minutes=self.config.GOVERNOR_RESTART_WAIT))
+                or self._restart_due_within(timedelta(minutes=self.config.GOVERNOR_RESTART_WAIT))):
+            self.logger.info("Pressure restart left to the shutdown or planned restart that is due soon")
+            return
+        await self.notify(self.config.DISCORD_RESOURCE_RESTART.format(reason=reason))
+        await self.restart_server(f"Resource pressure ({reason})")
+
+    async def health_check(self):
+        if self.shutdown_flag:
+            return
+
+        if self.starting_time:
+            # Cleared by start_server itself, including while queued for a start slot
+            self.logger.info("Health Check - Server is currently starting")
+            return
             
+        check_started = time.monotonic()
         process_running = await self._check_server_running()
         server_running = process_running
         should_be_running = self._is_operating_hours()
@@ -231,52 +1118,205 @@ class MinecraftServerScheduler:
             f"Process: {'Running' if process_running else 'Offline'}, "
             f"24/7 Mode: {'Yes' if self._is_24h_operation() else 'No'}"
         )
+        HEALTH_CHECK_DURATION.labels(self.name).observe(time.monotonic() - check_started)
         
         if should_be_running and not server_running:
             self.logger.warning("Server offline during operating hours, attempting restart")
-            await self.discord.send_message(self.config.DISCORD_SERVER_CRASH)
+            SERVER_RESTARTS.labels(self.name).inc()
+            await self.notify(self.config.DISCORD_SERVER_CRASH)
             await self.start_server()
-        elif not should_be_running and server_running and not self._is_24h_operation():
+        elif not should_be_running and server_running:
+            if self._pregen_task is not None:
+                self.logger.info("Server kept up outside operating hours for chunk pre-generation")
+                return
             self.logger.warning("Server running outside operating hours")
             await self.stop_server()
 
     async def _check_server_running(self) -> bool:
-        return self._get_java_process() is not None
+        return self.tracker.is_running()
 
-    async def run(self):
-        os.system(f'title Minecraft Server Scheduler ({self.config.START_TIME} - {self.config.END_TIME})')
+    def _on_server_process(self, proc):
+        """Place a newly tracked JVM and size the governor's thresholds to it"""
+        if self.governor is None:
+            return
+        config = self.config
+        applied, failed = place_process(proc, config.GOVERNOR_CPU_AFFINITY, config.GOVERNOR_PRIORITY,
+                                        config.GOVERNOR_IO_PRIORITY)
+        if applied:
+            self.logger.info(f"Server process placed: {', '.join(applied)}")
+        if failed:
+            self.logger.warning(f"Could not apply to the server process: {', '.join(failed)}")
+        heap = jvm_heap_mb(proc, config.SERVER_HEAP_MB)
+        if heap:
+            self.governor.reset(ResourceThresholds.derive(heap, usable_cores(proc), config))
+        else:
+            self.governor.reset()
+            self.logger.warning("Server heap size unknown (no -Xmx, SERVER_HEAP_MB unset); memory pressure not watched")
+
+    def _on_server_exit(self, proc):
+        # Baselines from the previous run say nothing about the next one
+        self.lag_detector.reset()
+        if self.governor is not None:
+            self.governor.reset()
+            self._pressure_restart_since = None
+        # React to an unexpected exit right away instead of waiting for the next health check
+        if self.shutdown_flag or self.starting_time:
+            return
+        try:
+            asyncio.get_running_loop().create_task(self.health_check())
+        except RuntimeError:
+            pass
+
+    async def publish_status(self):
+        """Collect once and share the snapshot with every monitor window"""
+        status = await self.monitor.collect_status()
+        if self._status_job is not None:
+            self._status_job.reschedule(status.sample_interval)
+        self.last_status = status
+        self.status_bus.publish(status)
+        SERVER_UP.labels(self.name).set(1 if status.is_online else 0)
+        SERVER_TPS.labels(self.name).set(status.tps)
+        SERVER_MEMORY.labels(self.name).set(status.memory_used * 1024 * 1024)
+        SERVER_CPU.labels(self.name).set(status.cpu_usage)
+        SERVER_PLAYERS.labels(self.name).set(len(status.players))
+        SERVER_MSPT.labels(self.name).set(status.mspt)
+        for dimension, mspt in status.dimensions.items():
+            DIMENSION_MSPT.labels(self.name, dimension).set(mspt)
+        # Unloaded dimensions (or a stopped server) must not keep exporting their last value
+        for dimension in self._exported_dimensions - status.dimensions.keys():
+            DIMENSION_MSPT.remove(self.name, dimension)
+        self._exported_dimensions = set(status.dimensions)
+        self.history.record(status)
+        if self.sessions is not None:
+            self.sessions.record(status)
+        if status.players:
+            self.autosave.note_activity()
+            self._last_player_seen = time.monotonic()
+        if status.is_online and self.governor is not None:
+            self.governor.observe(time.monotonic(), status.memory_used, status.cpu_usage, status.tps)
+        if status.is_online and status.mspt:
+            if status.tps < self.config.THREAD_PROFILE_TPS:
+                self._request_thread_profile(f"TPS {status.tps:.1f}")
+            await self._check_lag_spikes(status)
 
-        self.logger.info("Starting server scheduler...")
+    async def _check_lag_spikes(self, status: ServerStatus):
+        report = TickReport(status.mspt, status.tps, status.dimensions)
+        spikes = self.lag_detector.update(report)
+        if spikes:
+            self._request_thread_profile(f"lag spike in {spikes[0].dimension}")
+        for spike in spikes:
+            LAG_SPIKES.labels(self.name, spike.dimension).inc()
+            self.logger.warning(
+                f"Lag spike in {spike.dimension}: {spike.mspt:.1f} ms/tick "
+                f"(baseline {spike.baseline:.1f} ms, overall {spike.overall_mspt:.1f} ms)"
+            )
+            await self.notify(self.config.DISCORD_LAG_SPIKE.format(
+                dimension=spike.dimension, mspt=spike.mspt, baseline=spike.baseline, tps=status.tps
+            ))
+
+    def _request_thread_profile(self, trigger: str):
+        """Find out which JVM threads are busy during a TPS drop, at most once per cooldown"""
+        if not self.config.THREAD_PROFILE_ENABLED or self._thread_profile_task is not None:
+            return
+        now = time.monotonic()
+        if now - self._thread_profile_at < self.config.THREAD_PROFILE_COOLDOWN:
+            return
+        proc = self.tracker.get_process()
+        if proc is None:
+            return
+        self._thread_profile_at = now
+        self._thread_profile_task = asyncio.get_running_loop().create_task(
+            self._profile_threads(proc.pid, trigger)
+        )
+
+    async def _profile_threads(self, pid: int, trigger: str):
+        try:
+            if self._thread_sampler is None or self._thread_sampler.pid != pid:
+                self._thread_sampler = ThreadSampler(pid, self.config.THREAD_PROFILE_MAX_THREADS)
+            report = await self._thread_sampler.profile(
+                self.config.THREAD_PROFILE_SECONDS, self.config.THREAD_PROFILE_TOP
+            )
+            lines = report.summary()
+            self.logger.info(
+                f"Thread profile ({trigger}) - " + '\n'.join(lines),
+                extra={'event': 'thread_profile', 'trigger': trigger,
+                       'threads': [(usage.name, usage.tid, round(usage.cpu_percent, 1)) for usage in report.threads],
+                       'groups': [(name, round(percent, 1)) for name, percent in report.groups]}
+            )
+        except (psutil.NoSuchProcess, psutil.AccessDenied, OSError) as e:
+            self.logger.warning(f"Thread profile failed: {e}")
+        finally:
+            self._thread_profile_task = None
+
+    def _on_log_event(self, event: LogEvent):
+        if event.kind in (PLAYER_JOIN, PLAYER_LEAVE):
+            self.autosave.note_activity()
+            self._last_player_seen = time.monotonic()
+            if event.kind == PLAYER_JOIN and self._pregen_task is not None:
+                self.logger.info("Player joined, pausing chunk pre-generation")
+                self.pregen.stop()
+        elif event.kind == SERVER_DONE:
+            self.logger.info(f"Server reports startup done in {event.data['seconds']}s")
+        elif event.kind == LAG_WARNING:
+            self.logger.warning(f"Server lagging: {event.data['ms']}ms ({event.data['ticks']} ticks) behind")
+            self._request_thread_profile(f"{event.data['ms']}ms behind")
+        elif event.kind == OPERATOR_COMMAND:
+            asyncio.get_running_loop().create_task(self._on_operator_command(event))
+        elif event.kind == SERVER_CRASH:
+            trace = '\n'.join(event.data['trace'][:20])
+            self.logger.error(f"Server crash reported: {event.data['message']}\n{trace}")
+            asyncio.get_running_loop().create_task(
+                self.notify(self.config.DISCORD_SERVER_ERROR.format(message=event.data['message']))
+            )
+
+    async def run(self):
+        self.logger.info(f"Starting server scheduler for {self.name}...")
+        self.logger.info(f"Server directory: {self.config.SERVER_DIR}")
         self.logger.info(f"Operating hours: {self.config.START_TIME} - {self.config.END_TIME}")
         self.logger.info(f"24/7 Operation days: {self.config.TWENTYFOUR_HOUR_DAYS}")
-        self.logger.info(f"Shutdown sequence will start at: {self.shutdown_sequence_start.time()}")
         self.logger.info(f"Warning times: {', '.join(map(str, self.warning_times))} minutes")
         
-        if self._is_operating_hours():
-            self.logger.info("Within operating hours. Starting server...")
-            await self.start_server()
-        else:
-            self.logger.info("Outside operating hours. Waiting for start time...")
-        
-        schedule.every().day.at(self.config.START_TIME.strftime("%H:%M")).do(
-            lambda: asyncio.create_task(self.start_server())
-        )
-        
-        if not self._is_24h_operation():
-            schedule.every().day.at(self.shutdown_sequence_start.time().strftime("%H:%M")).do(
-                lambda: asyncio.create_task(self.stop_server())
-            )
-            
-        schedule.every(self.config.HEALTH_CHECK_INTERVAL).seconds.do(
-            lambda: asyncio.create_task(self.health_check())
-        )
-        
-        await self.schedule_autosaves()
-        
+        log_task = asyncio.get_running_loop().create_task(self.log_tailer.run())
         try:
-            while True:
-                schedule.run_pending()
-                await asyncio.sleep(1)
-        except KeyboardInterrupt:
+            if self._is_operating_hours():
+                self.logger.info("Within operating hours. Starting server...")
+                await self.start_server()
+            else:
+                self.logger.info("Outside operating hours. Waiting for start time...")
+            
+            self._arm_transition(self.clock.now())
+            self._arm_restart(self.clock.now())
+            self.timers.call_every(
+                self.config.AUTOSAVE_CHECK_INTERVAL, self._autosave_check, 'autosave', exclusive=True
+            )
+            if self.config.WORLD_MAINTENANCE_ENABLED:
+                self.timers.call_every(3600, self.world_maintenance, 'maintenance', first_delay=300)
+            if self.pregen is not None:
+                self.timers.call_every(60, self._pregen_check, 'pregen')
+            if self.wake_listener is not None:
+                self.timers.call_every(60, self._idle_check, 'idle')
+            if self.governor is not None:
+                self.timers.call_every(60, self._governor_check, 'governor', exclusive=True)
+            self.timers.call_every(self.config.HEALTH_CHECK_INTERVAL, self.health_check, 'health_check')
+            # Each run reschedules itself from the sampler; the period is only a fallback
+            self._status_job = self.timers.call_every(
+                self.config.MONITOR_MAX_INTERVAL, self.publish_status, 'status', first_delay=0
+            )
+            await self.timers.run()
+        except (KeyboardInterrupt, asyncio.CancelledError):
             self.logger.info("Shutdown requested")
+            self.timers.stop()
             await self.stop_server()
+            raise
+        finally:
+            if self._wake_task is not None:
+                self._wake_task.cancel()
+                await asyncio.gather(self._wake_task, return_exceptions=True)
+            if self.wake_listener is not None:
+                await self.wake_listener.close()
+            self.log_tailer.stop()
+            log_task.cancel()
+            self.status_bus.close()
+            self.history.close()
+            if self.sessions is not None:
+                self.sessions.close()
@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import copy
+import logging
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from timer_scheduler import Clock
+from utils import LoggerSetup
+from server_scheduler import MinecraftServerScheduler, SERVER_RESTARTS
+
+class FakeClock(Clock):
+    """
+    Virtual time for TimerScheduler and MinecraftServerScheduler.
+
+    A wait with a timeout returns at once with the clock moved to its
+    deadline, unless the event was set by whatever ran in the meantime. With
+    one timer loop as the only sleeper, a week of schedule takes well under
+    a second.
+    """
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.start = start or datetime.now()
+        self.elapsed = 0.0
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def advance(self, seconds: float):
+        self.elapsed += max(0.0, seconds)
+
+    async def wait(self, event: asyncio.Event, timeout: Optional[float]) -> bool:
+        # Let tasks started by the previous step run before time moves on
+        for _ in range(3):
+            await asyncio.sleep(0)
+        if event.is_set():
+            return True
+        if timeout is None:
+            await event.wait()
+            return True
+        self.advance(timeout)
+        return False
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(0)
+        self.advance(seconds)
+
+@dataclass
+class ScheduleEvent:
+    at: datetime
+    action: str   # 'start', 'stop' or 'restart'
+    reason: str = ''
+
+class SimulatedScheduler(MinecraftServerScheduler):
+    """
+    The real scheduling logic on a FakeClock; the server itself is only a flag.
+
+    Start, stop and restart complete instantly and are recorded, a stop being
+    dated at the end of its countdown. Health checks keep running, so any
+    restart they trigger shows up as a schedule bug.
+    """
+
+    def __init__(self, config, clock: FakeClock):
+        super().__init__(config, clock=clock)
+        self.running = False
+        self.events: List[ScheduleEvent] = []
+
+    async def start_server(self, announce: bool = True):
+        self.running = True
+        self.shutdown_flag = False
+        self.events.append(ScheduleEvent(self.clock.now(), 'start'))
+        return True
+
+    async def stop_server(self, backup: bool = False, countdown: bool = True):
+        if self.shutdown_flag:
+            return
+        self.shutdown_flag = True
+        self.running = False
+        lead = self.shutdown_lead if countdown else timedelta()
+        self.events.append(ScheduleEvent(self.clock.now() + lead, 'stop', 'backup' if backup else ''))
+
+    async def restart_server(self, reason: str = "Planned restart") -> bool:
+        lead = timedelta(minutes=max(self.config.RESTART_WARNINGS, default=0))
+        self.events.append(ScheduleEvent(self.clock.now() + lead, 'restart', reason))
+        return True
+
+    async def _check_server_running(self) -> bool:
+        return self.running
+
+    async def notify(self, message: str):
+        pass
+
+    def close(self):
+        self.status_bus.close()
+        self.history.close()
+        if self.sessions is not None:
+            self.sessions.close()
+
+async def simulate_schedule(config, days: float = 7, start: Optional[datetime] = None) -> List[ScheduleEvent]:
+    """Run the operating calendar, planned restarts and health checks over `days` of virtual time"""
+    clock = FakeClock(start)
+    sim = SimulatedScheduler(config, clock)
+    try:
+        if sim._is_operating_hours():
+            await sim.start_server()
+        sim._arm_transition(clock.now())
+        sim._arm_restart(clock.now())
+        sim.timers.call_every(config.HEALTH_CHECK_INTERVAL, sim.health_check, 'health_check')
+
+        async def finish():
+            sim.timers.stop()
+        sim.timers.call_later(days * 86400, finish, 'end')
+        await sim.timers.run()
+        return sim.events
+    finally:
+        sim.close()
+
+def check_schedule(events: List[ScheduleEvent], restarts_before: float, restarts_after: float) -> List[str]:
+    """Problems in a simulated run: starts and stops out of turn, or health-check restarts"""
+    problems = []
+    running = None
+    for event in events:
+        if event.action == 'restart':
+            if running is False:
+                problems.append(f"{event.at:%a %H:%M} restart while stopped")
+            continue
+        started = event.action == 'start'
+        if running == started:
+            problems.append(f"{event.at:%a %H:%M} {event.action} while already {'running' if started else 'stopped'}")
+        running = started
+    if restarts_after > restarts_before:
+        problems.append(f"{restarts_after - restarts_before:.0f} health-check restarts")
+    return problems
+
+def restart_count(name: str) -> float:
+    return SERVER_RESTARTS.labels(name).value
+
+def main():
+    from config import ServerConfig
+
+    parser = argparse.ArgumentParser(description="Dry run of a server's operating schedule in virtual time")
+    parser.add_argument('--server', help='Server name when several are configured')
+    parser.add_argument('--days', type=float, default=7, help='Virtual days to simulate')
+    parser.add_argument('--start', help='Virtual start time, YYYY-MM-DD HH:MM (default: now)')
+    args = parser.parse_args()
+
+    config = copy.copy(ServerConfig.find(args.server) if args.server else ServerConfig.servers()[0])
+    start = datetime.strptime(args.start, '%Y-%m-%d %H:%M') if args.start else None
+    with tempfile.TemporaryDirectory(prefix='mc-sim-') as work_dir:
+        # Never touch the live server's status bus, history or Discord channel
+        config.STATUS_BUS_NAME = f"mc_sim_{os.getpid()}"
+        config.HISTORY_DIR = work_dir
+        config.DISCORD_ENABLED = False
+        config.IDLE_SUSPEND_ENABLED = False
+        config.PREGEN_ENABLED = False
+        LoggerSetup.setup(config.log_name('scheduler')).setLevel(logging.WARNING)
+        before = restart_count(config.SERVER_NAME)
+        events = asyncio.run(simulate_schedule(config, args.days, start))
+        problems = check_schedule(events, before, restart_count(config.SERVER_NAME))
+
+    for event in events:
+        print(f"{event.at:%a %Y-%m-%d %H:%M} {event.action}" + (f" ({event.reason})" if event.reason else ''))
+    for problem in problems:
+        print(f"PROBLEM: {problem}")
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
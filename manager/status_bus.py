@@ -0,0 +1,125 @@
+import json
+import struct
+import time
+from dataclasses import asdict
+from multiprocessing import shared_memory
+from typing import Optional
+
+from server_monitor import ServerStatus
+
+# seq (odd while a write is in progress), payload length, publish time
+_HEADER = struct.Struct('<QId')
+DEFAULT_SIZE = 64 * 1024
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        # Python 3.13+: keep the resource tracker from unlinking a segment we do not own
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return shm
+
+class StatusPublisher:
+    """
+    Single writer of ServerStatus snapshots into a named shared-memory region.
+
+    The region is a seqlock: the sequence counter is odd while the payload is
+    being rewritten, so readers never block the writer and simply retry on a
+    torn read.
+    """
+
+    def __init__(self, name: str, size: int = DEFAULT_SIZE):
+        self.name = name
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._owner = True
+        except FileExistsError:
+            # Left behind by a previous run, or still mapped by a viewer
+            self._shm = _attach(name)
+            self._owner = False
+        self._seq = _HEADER.unpack_from(self._shm.buf, 0)[0] & ~1
+        self.capacity = self._shm.size - _HEADER.size
+
+    def publish(self, status: ServerStatus):
+        payload = json.dumps(asdict(status), separators=(',', ':')).encode('utf-8')
+        if len(payload) > self.capacity:
+            raise ValueError(f"Status snapshot too large for bus ({len(payload)} bytes)")
+
+        buf = self._shm.buf
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, self._seq, 0, 0.0)
+        buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, self._seq, len(payload), time.time())
+
+    def close(self):
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+class StatusSubscriber:
+    """
+    Read-only view of the published status; adds no load on the server.
+
+    A snapshot counts as stale (publisher gone) once it is older than twice
+    the sampling interval it announced, and never before stale_after seconds.
+    """
+
+    RETRIES = 10
+
+    def __init__(self, name: str, stale_after: float = 30.0):
+        self.name = name
+        self.stale_after = stale_after
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self.seq = 0
+        self.published_at = 0.0
+
+    def _ensure_attached(self) -> bool:
+        if self._shm is None:
+            try:
+                self._shm = _attach(self.name)
+            except FileNotFoundError:
+                return False
+        return True
+
+    def read(self) -> Optional[ServerStatus]:
+        """Latest snapshot, or None when no live publisher is found"""
+        if not self._ensure_attached():
+            return None
+
+        buf = self._shm.buf
+        for _ in range(self.RETRIES):
+            seq, length, published_at = _HEADER.unpack_from(buf, 0)
+            if seq & 1 or length == 0:
+                time.sleep(0)
+                continue
+            payload = bytes(buf[_HEADER.size:_HEADER.size + length])
+            if _HEADER.unpack_from(buf, 0)[0] != seq:
+                continue
+            break
+        else:
+            return None
+
+        status = ServerStatus(**json.loads(payload))
+        # An idle server is sampled rarely; its last snapshot is still current until the next one is due
+        if time.time() - published_at > max(self.stale_after, 2 * status.sample_interval):
+            # Publisher gone (or restarted into a fresh segment): re-attach next time
+            self.close()
+            return None
+
+        self.seq = seq
+        self.published_at = published_at
+        return status
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
@@ -0,0 +1,254 @@
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from server_monitor import ServerStatus
+
+_FILE_HEADER = struct.Struct('<8sIIQQ')  # magic, record size, capacity, head, count
+_MAGIC = b'MCSHIST1'
+_HEADER_SIZE = 64
+
+# ts, flags, players, tps*100, memory MB, cpu*10
+_RAW = struct.Struct('<IHHHfH')
+# ts, samples, online samples, players min/mean*10/max, tps*100 min/mean/max,
+# cpu*10 min/mean/max, memory min/mean/max
+_ROLLUP = struct.Struct('<IHHHHHHHHHHHfff')
+
+@dataclass
+class HistorySample:
+    timestamp: int
+    is_online: bool
+    players: int
+    tps: float
+    memory_used: float
+    cpu_usage: float
+
+@dataclass
+class HistoryRollup:
+    timestamp: int
+    samples: int
+    online_samples: int
+    players_min: int
+    players_mean: float
+    players_max: int
+    tps_min: float
+    tps_mean: float
+    tps_max: float
+    cpu_min: float
+    cpu_mean: float
+    cpu_max: float
+    memory_min: float
+    memory_mean: float
+    memory_max: float
+
+def _clamp_u16(value: float) -> int:
+    return max(0, min(0xffff, int(round(value))))
+
+class RingFile:
+    """Fixed-width records in a memory-mapped ring, oldest entries overwritten first"""
+
+    def __init__(self, path: str, record: struct.Struct, capacity: int):
+        self.path = path
+        self.record = record
+        self._lock = threading.Lock()
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= _HEADER_SIZE
+        if exists:
+            with open(path, 'rb') as f:
+                magic, record_size, stored_capacity, _, _ = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+            if magic != _MAGIC or record_size != record.size:
+                raise ValueError(f"{path} is not a compatible history file")
+            # The file keeps the capacity it was created with
+            capacity = stored_capacity
+
+        self.capacity = capacity
+        size = _HEADER_SIZE + capacity * record.size
+        if not exists:
+            with open(path, 'wb') as f:
+                f.write(_FILE_HEADER.pack(_MAGIC, record.size, capacity, 0, 0))
+                f.truncate(size)
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), size)
+        _, _, _, self.head, self.count = _FILE_HEADER.unpack_from(self._map, 0)
+
+    def append(self, values: tuple):
+        with self._lock:
+            self.record.pack_into(self._map, _HEADER_SIZE + self.head * self.record.size, *values)
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            _FILE_HEADER.pack_into(self._map, 0, _MAGIC, self.record.size, self.capacity, self.head, self.count)
+
+    def _physical(self, index: int) -> int:
+        return (self.head - self.count + index) % self.capacity
+
+    def _timestamp(self, index: int) -> int:
+        offset = _HEADER_SIZE + self._physical(index) * self.record.size
+        return struct.unpack_from('<I', self._map, offset)[0]
+
+    def _bisect(self, timestamp: int) -> int:
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._timestamp(mid) < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def read_range(self, start: int, end: int, limit: Optional[int] = None) -> List[tuple]:
+        """Records with start <= ts < end; only the matching pages are touched"""
+        with self._lock:
+            first = self._bisect(start)
+            last = self._bisect(end)
+            if limit is not None:
+                last = min(last, first + limit)
+            return [
+                self.record.unpack_from(self._map, _HEADER_SIZE + self._physical(i) * self.record.size)
+                for i in range(first, last)
+            ]
+
+    def last(self) -> Optional[tuple]:
+        with self._lock:
+            if not self.count:
+                return None
+            return self.record.unpack_from(
+                self._map, _HEADER_SIZE + self._physical(self.count - 1) * self.record.size
+            )
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+class _Accumulator:
+    def __init__(self, bucket: int):
+        self.bucket = bucket
+        self.values: List[tuple] = []
+
+    def add(self, sample: tuple):
+        self.values.append(sample)
+
+    def rollup(self) -> tuple:
+        _, flags, players, tps, memory, cpu = zip(*self.values)
+        n = len(self.values)
+        # An offline server reports no TPS; its zeros would drag the tick rate down
+        online_tps = [t for f, t in zip(flags, tps) if f & 1] or [0]
+        return (
+            self.bucket, min(n, 0xffff), sum(f & 1 for f in flags),
+            min(players), _clamp_u16(sum(players) * 10 / n), max(players),
+            min(online_tps), _clamp_u16(sum(online_tps) / len(online_tps)), max(online_tps),
+            min(cpu), _clamp_u16(sum(cpu) / n), max(cpu),
+            min(memory), sum(memory) / n, max(memory),
+        )
+
+class StatusHistory:
+    """
+    Append-only ServerStatus history with 1-minute and 1-hour rollup tiers.
+
+    record() only enqueues; a writer thread packs samples into the raw ring and
+    folds them into the rollup tiers as each bucket closes. The raw ring keeps
+    one sample per sample_interval, so faster adaptive sampling still fits
+    raw_days; the rollups see every sample.
+    """
+
+    TIERS = {'raw': 0, '1m': 60, '1h': 3600}
+
+    def __init__(self, directory: str, sample_interval: float,
+                 raw_days: float = 14, minute_days: float = 30, hour_days: float = 730,
+                 logger=None):
+        os.makedirs(directory, exist_ok=True)
+        self.logger = logger
+        self.sample_interval = max(sample_interval, 1)
+        self.rings = {
+            'raw': RingFile(os.path.join(directory, 'status_raw.ring'), _RAW,
+                            int(raw_days * 86400 / self.sample_interval)),
+            '1m': RingFile(os.path.join(directory, 'status_1m.ring'), _ROLLUP, int(minute_days * 1440)),
+            '1h': RingFile(os.path.join(directory, 'status_1h.ring'), _ROLLUP, int(hour_days * 24)),
+        }
+        self._accumulators = {tier: None for tier in ('1m', '1h')}
+        last = self.rings['raw'].last()
+        self._raw_slot = last[0] // self.sample_interval if last else None
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._writer, name='status-history', daemon=True)
+        self._thread.start()
+
+    def record(self, status: ServerStatus, timestamp: Optional[float] = None):
+        timestamp = timestamp if timestamp is not None else time.time()
+        sample = (
+            int(timestamp),
+            1 if status.is_online else 0,
+            min(len(status.players), 0xffff),
+            _clamp_u16(status.tps * 100),
+            float(status.memory_used),
+            _clamp_u16(status.cpu_usage * 10),
+        )
+        self._queue.put((timestamp, sample))
+
+    def _writer(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            timestamp, sample = item
+            try:
+                slot = timestamp // self.sample_interval
+                if slot != self._raw_slot:
+                    self._raw_slot = slot
+                    self.rings['raw'].append(sample)
+                for tier in ('1m', '1h'):
+                    self._accumulate(tier, sample)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"History write failed: {e}")
+        for tier in ('1m', '1h'):
+            self._close_bucket(tier)
+
+    def _accumulate(self, tier: str, sample: tuple):
+        size = self.TIERS[tier]
+        bucket = sample[0] - sample[0] % size
+        current = self._accumulators[tier]
+        if current is not None and current.bucket != bucket:
+            self._close_bucket(tier)
+            current = None
+        if current is None:
+            current = self._accumulators[tier] = _Accumulator(bucket)
+        current.add(sample)
+
+    def _close_bucket(self, tier: str):
+        current = self._accumulators[tier]
+        if current is not None and current.values:
+            self.rings[tier].append(current.rollup())
+        self._accumulators[tier] = None
+
+    def query(self, start: float, end: float, tier: str = 'raw', limit: Optional[int] = None) -> list:
+        """Samples (raw) or HistoryRollup entries (1m/1h) with start <= t < end"""
+        rows = self.rings[tier].read_range(int(start), int(end), limit)
+        if tier == 'raw':
+            return [
+                HistorySample(ts, bool(flags & 1), players, tps / 100, memory, cpu / 10)
+                for ts, flags, players, tps, memory, cpu in rows
+            ]
+        return [
+            HistoryRollup(
+                ts, n, online, p_min, p_mean / 10, p_max,
+                t_min / 100, t_mean / 100, t_max / 100,
+                c_min / 10, c_mean / 10, c_max / 10,
+                m_min, m_mean, m_max
+            )
+            for (ts, n, online, p_min, p_mean, p_max, t_min, t_mean, t_max,
+                 c_min, c_mean, c_max, m_min, m_mean, m_max) in rows
+        ]
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        for ring in self.rings.values():
+            ring.close()
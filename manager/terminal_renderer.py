@@ -0,0 +1,104 @@
+import re
+import shutil
+import sys
+from typing import List, Optional, Sequence, TextIO
+
+_ANSI_RE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+_SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+CLEAR_SCREEN = '\x1b[2J'
+CLEAR_LINE = '\x1b[K'
+HIDE_CURSOR = '\x1b[?25l'
+SHOW_CURSOR = '\x1b[?25h'
+RESET = '\x1b[0m'
+
+def move_to(row: int, col: int = 1) -> str:
+    return f'\x1b[{row};{col}H'
+
+def visible_len(text: str) -> int:
+    return len(_ANSI_RE.sub('', text))
+
+def truncate(text: str, width: int) -> str:
+    """Cut text to width visible columns, keeping colour codes intact"""
+    if visible_len(text) <= width:
+        return text
+    out = []
+    shown = 0
+    pos = 0
+    for match in _ANSI_RE.finditer(text):
+        chunk = text[pos:match.start()]
+        if shown + len(chunk) >= width:
+            out.append(chunk[:width - shown])
+            return ''.join(out) + RESET
+        out.append(chunk)
+        shown += len(chunk)
+        out.append(match.group())
+        pos = match.end()
+    out.append(text[pos:pos + width - shown])
+    return ''.join(out) + RESET
+
+def sparkline(values: Sequence[float], width: int,
+              low: Optional[float] = None, high: Optional[float] = None) -> str:
+    """Render the last `width` values as a block-character sparkline"""
+    values = list(values)[-width:]
+    if not values:
+        return ''
+    low = min(values) if low is None else low
+    high = max(values) if high is None else high
+    span = high - low
+    if span <= 0:
+        return _SPARK_CHARS[0] * len(values)
+    top = len(_SPARK_CHARS) - 1
+    return ''.join(
+        _SPARK_CHARS[max(0, min(top, int((value - low) / span * top + 0.5)))]
+        for value in values
+    )
+
+class TerminalRenderer:
+    """
+    Differential full-screen renderer.
+
+    The previous frame is kept in memory and only rows whose content changed are
+    rewritten, using cursor addressing instead of clearing the screen. A change
+    in terminal size forces one full redraw.
+    """
+
+    def __init__(self, stream: TextIO = None):
+        self.stream = stream or sys.stdout
+        self._frame: List[str] = []
+        self._size = None
+        self._started = False
+
+    def _terminal_size(self):
+        return shutil.get_terminal_size()
+
+    def render(self, lines: List[str]):
+        size = self._terminal_size()
+        width, height = size.columns, size.lines
+        lines = [truncate(line, width) for line in lines[:height]]
+
+        out = []
+        if not self._started:
+            out.append(HIDE_CURSOR)
+            self._started = True
+        if size != self._size:
+            out.append(CLEAR_SCREEN)
+            self._frame = []
+            self._size = size
+
+        for row, line in enumerate(lines):
+            if row >= len(self._frame) or self._frame[row] != line:
+                out.append(move_to(row + 1) + line + CLEAR_LINE)
+        for row in range(len(lines), len(self._frame)):
+            out.append(move_to(row + 1) + CLEAR_LINE)
+
+        self._frame = lines
+        if out:
+            self.stream.write(''.join(out))
+            self.stream.flush()
+
+    def close(self):
+        if self._started:
+            self.stream.write(move_to(len(self._frame) + 1) + RESET + SHOW_CURSOR + '\n')
+            self.stream.flush()
+            self._started = False
@@ -0,0 +1,62 @@
+import asyncio
+
+from timer_scheduler import TimerScheduler
+
+def test_overlapping_exclusive_interval_job_is_preempted():
+    events = []
+
+    async def scenario():
+        timers = TimerScheduler()
+
+        async def save():
+            events.append('save start')
+            try:
+                await asyncio.sleep(0.5)  # Outlasts several intervals
+                events.append('save done')
+            except asyncio.CancelledError:
+                events.append('save cancelled')
+                raise
+
+        async def shutdown():
+            events.append('shutdown runs')
+
+        runner = asyncio.get_running_loop().create_task(timers.run())
+        save_job = timers.call_every(0.1, save, 'autosave', first_delay=0, exclusive=True)
+        await asyncio.sleep(0.25)
+        timers.call_later(0, shutdown, 'shutdown', exclusive=True, preempt=True)
+        await asyncio.sleep(0.05)
+        save_job.cancel()
+        await asyncio.sleep(0.05)
+        timers.stop()
+        await runner
+
+    asyncio.run(scenario())
+    # The autosave may tick again once the shutdown is done; only the preemption matters here
+    assert events[:3] == ['save start', 'save cancelled', 'shutdown runs']
+
+def test_exclusive_job_does_not_overlap_itself():
+    running = []
+    overlaps = []
+
+    async def scenario():
+        timers = TimerScheduler()
+
+        async def slow():
+            if running:
+                overlaps.append(True)
+            running.append(True)
+            await asyncio.sleep(0.35)
+            running.pop()
+
+        runner = asyncio.get_running_loop().create_task(timers.run())
+        job = timers.call_every(0.1, slow, 'governor', first_delay=0, exclusive=True)
+        await asyncio.sleep(0.3)
+        task = job.task
+        await asyncio.sleep(0.02)
+        assert job.task is task
+        job.cancel()
+        timers.stop()
+        await runner
+
+    asyncio.run(scenario())
+    assert not overlaps
@@ -0,0 +1,27 @@
+import asyncio
+import logging
+
+from wake_listener import WakeListener, query_status, attempt_login
+
+def test_wake_listener_answers_ping_and_reports_login():
+    logins = []
+    results = {}
+
+    async def scenario():
+        listener = WakeListener('127.0.0.1', 0, 'Sleeping - join to wake', 'Starting, reconnect soon',
+                                logins.append, logging.getLogger('test'))
+        await listener.start()
+        try:
+            results['status'] = await query_status('127.0.0.1', listener.port)
+            results['kick'] = await attempt_login('127.0.0.1', listener.port, 'Steve')
+            await asyncio.sleep(0.05)
+        finally:
+            await listener.close()
+        results['listening'] = listener.listening
+
+    asyncio.run(scenario())
+    assert results['status']['description']['text'] == 'Sleeping - join to wake'
+    assert results['status']['players']['online'] == 0
+    assert results['kick'] == 'Starting, reconnect soon'
+    assert logins == ['Steve']
+    assert not results['listening']
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+_NUMBERING = re.compile(r'[\s#-]*\d+$')
+
+def thread_group(name: str) -> str:
+    """Thread name without its pool numbering: "Worker-Main-12" -> "Worker-Main" """
+    return _NUMBERING.sub('', name) or name
+
+@dataclass
+class ThreadUsage:
+    tid: int
+    name: str           # Empty where the platform does not expose thread names
+    cpu_percent: float  # Of one core, over the profile window
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} (tid {self.tid})" if self.name else f"tid {self.tid}"
+
+@dataclass
+class ThreadReport:
+    seconds: float
+    threads: List[ThreadUsage] = field(default_factory=list)       # Busiest first, top N only
+    groups: List[Tuple[str, float]] = field(default_factory=list)  # Per thread group, busiest first
+    total: float = 0.0          # CPU percent of all threads together
+    thread_count: int = 0
+    sample_cost: float = 0.0    # Seconds spent reading thread times
+
+    def summary(self) -> List[str]:
+        lines = [f"JVM threads over {self.seconds:.1f}s: {self.total:.0f}% CPU across {self.thread_count} threads "
+                 f"(sampled in {self.sample_cost * 1000:.1f} ms)"]
+        lines += [f"  {usage.cpu_percent:6.1f}%  {usage.label}" for usage in self.threads]
+        groups = ', '.join(f"{name} {percent:.0f}%" for name, percent in self.groups[:5])
+        if groups:
+            lines.append(f"  by group: {groups}")
+        return lines
+
+class ThreadSampler:
+    """
+    Per-thread CPU time of one process, for finding the thread behind a lag.
+
+    On Linux each thread's utime + stime is read from /proc/<pid>/task/*/stat
+    with one small read per thread, and names come from task/*/comm, read
+    only the first time a thread is seen (the JVM names its native threads,
+    so "Server thread", "C2 CompilerThre" or "Worker-Main-7" show up there).
+    Elsewhere psutil's threads() provides the times, without names. At most
+    max_threads threads are read per sample, so a JVM with a runaway thread
+    pool cannot make sampling itself expensive; the rest are still listed,
+    without a time, so they are neither compared nor mistaken for new ones.
+    """
+
+    def __init__(self, pid: int, max_threads: int = 1024, proc_root: str = '/proc'):
+        self.pid = pid
+        self.max_threads = max_threads
+        self.task_dir = os.path.join(proc_root, str(pid), 'task')
+        self.use_procfs = sys.platform.startswith('linux') and os.path.isdir(self.task_dir)
+        self._ticks = os.sysconf('SC_CLK_TCK') if self.use_procfs else 1
+        self._names: Dict[int, str] = {}
+        self._proc = None if self.use_procfs else psutil.Process(pid)
+
+    def _name(self, tid: int) -> str:
+        name = self._names.get(tid)
+        if name is None:
+            try:
+                with open(os.path.join(self.task_dir, str(tid), 'comm'), encoding='utf-8', errors='replace') as f:
+                    name = f.read().strip()
+            except OSError:
+                name = ''
+            self._names[tid] = name
+        return name
+
+    def _read_procfs(self) -> Dict[int, Optional[float]]:
+        try:
+            # Lowest (longest-lived) ids first, so truncation reads the same threads every time
+            tids = sorted(int(entry) for entry in os.listdir(self.task_dir))
+        except FileNotFoundError:
+            raise psutil.NoSuchProcess(self.pid)
+        times: Dict[int, Optional[float]] = dict.fromkeys(tids[self.max_threads:])
+        for tid in tids[:self.max_threads]:
+            try:
+                fd = os.open(os.path.join(self.task_dir, str(tid), 'stat'), os.O_RDONLY)
+                try:
+                    stat = os.read(fd, 1024)
+                finally:
+                    os.close(fd)
+            except OSError:
+                continue  # Thread exited between listdir and open
+            # Fields after the parenthesised name; utime and stime are the 14th and 15th overall
+            fields = stat[stat.rfind(b')') + 2:].split()
+            times[tid] = (int(fields[11]) + int(fields[12])) / self._ticks
+        return times
+
+    def sample(self) -> Dict[int, Optional[float]]:
+        """CPU seconds used so far by each thread; None for threads beyond max_threads"""
+        if self.use_procfs:
+            times = self._read_procfs()
+            for tid in times.keys() - self._names.keys():
+                if times[tid] is not None:
+                    self._name(tid)
+        else:
+            # psutil reads every thread's times in one call anyway
+            times = {thread.id: thread.user_time + thread.system_time for thread in self._proc.threads()}
+        # Forget names of threads that are gone; their ids may be reused
+        for tid in self._names.keys() - times.keys():
+            del self._names[tid]
+        return times
+
+    def compare(self, before: Dict[int, Optional[float]], after: Dict[int, Optional[float]], seconds: float,
+                top: int = 8) -> ThreadReport:
+        usage = []
+        for tid, cpu in after.items():
+            if tid in before:
+                if cpu is None or before[tid] is None:
+                    continue  # Not read in both samples
+                delta = cpu - before[tid]
+            elif cpu is None:
+                continue
+            else:
+                # Not even listed before, so it was started during the window and counts from zero
+                delta = cpu
+            if delta > 0:
+                usage.append(ThreadUsage(tid, self._names.get(tid, ''), delta / seconds * 100))
+        usage.sort(key=lambda item: item.cpu_percent, reverse=True)
+        groups: Dict[str, float] = {}
+        for item in usage:
+            group = thread_group(item.name) if item.name else 'unnamed'
+            groups[group] = groups.get(group, 0.0) + item.cpu_percent
+        return ThreadReport(
+            seconds=seconds,
+            threads=usage[:top],
+            groups=sorted(groups.items(), key=lambda item: item[1], reverse=True),
+            total=sum(item.cpu_percent for item in usage),
+            thread_count=len(after)
+        )
+
+    async def profile(self, seconds: float = 2.0, top: int = 8) -> ThreadReport:
+        """Thread CPU over the next `seconds`, read off the event loop"""
+        loop = asyncio.get_running_loop()
+
+        def timed_sample() -> Tuple[Dict[int, Optional[float]], float, float]:
+            started = time.perf_counter()
+            times = self.sample()
+            return times, started, time.perf_counter() - started
+
+        before, started, cost_before = await loop.run_in_executor(None, timed_sample)
+        await asyncio.sleep(seconds)
+        after, ended, cost_after = await loop.run_in_executor(None, timed_sample)
+        report = self.compare(before, after, max(ended - started, 1e-3), top)
+        report.sample_cost = cost_before + cost_after
+        return report
@@ -0,0 +1,138 @@
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# "Dim minecraft:overworld (minecraft:overworld): Mean tick time: 0.523 ms. Mean TPS: 20.000"
+# "Dim  0 (overworld) : Mean tick time: 1.234 ms. Mean TPS: 20.000"
+# "Overall: Mean tick time: 1.234 ms. Mean TPS: 20.000"
+_TPS_LINE_RE = re.compile(
+    r'^\s*(?:Dim\s+(?P<dim>.+?)|(?P<overall>Overall))\s*:\s*'
+    r'Mean tick time:\s*(?P<mspt>[\d.,]+)\s*ms\.?\s*Mean TPS:\s*(?P<tps>[\d.,]+)',
+    re.IGNORECASE
+)
+_DIM_ALIAS_RE = re.compile(r'^(?P<id>\S+)\s*\((?P<alias>[^)]*)\)$')
+_COLOR_RE = re.compile(r'§.')
+
+@dataclass
+class TickReport:
+    mspt: float = 0.0
+    tps: float = 0.0
+    dimensions: Dict[str, float] = field(default_factory=dict)  # dimension -> mean tick ms
+
+@dataclass
+class LagSpike:
+    dimension: str
+    mspt: float
+    baseline: float
+    overall_mspt: float
+
+def _number(text: str) -> float:
+    return float(text.replace(',', '.'))
+
+def _dimension_name(raw: str) -> str:
+    raw = raw.strip()
+    match = _DIM_ALIAS_RE.match(raw)
+    if match:
+        # Old numeric ids carry the readable name in parentheses
+        return match.group('alias') if match.group('id').lstrip('-').isdigit() else match.group('id')
+    return raw
+
+def parse_forge_tps(response: Optional[str]) -> Optional[TickReport]:
+    """Parse `forge tps`; None when the response has no usable Overall line"""
+    if not response:
+        return None
+    report = TickReport()
+    found_overall = False
+    for line in _COLOR_RE.sub('', response).splitlines():
+        match = _TPS_LINE_RE.match(line)
+        if not match:
+            continue
+        try:
+            mspt = _number(match.group('mspt'))
+            tps = _number(match.group('tps'))
+        except ValueError:
+            continue
+        if match.group('overall'):
+            report.mspt, report.tps = mspt, tps
+            found_overall = True
+        else:
+            report.dimensions[_dimension_name(match.group('dim'))] = mspt
+
+    if not found_overall and report.dimensions:
+        # Some versions omit Overall; the tick loop runs all dimensions back to back
+        report.mspt = sum(report.dimensions.values())
+        report.tps = min(20.0, 1000.0 / report.mspt) if report.mspt else 20.0
+        found_overall = True
+    return report if found_overall else None
+
+def parse_player_list(response: Optional[str]) -> Optional[List[str]]:
+    """Parse `list`; None when the response is not a player list"""
+    if not response:
+        return None
+    text = _COLOR_RE.sub('', response)
+    marker = text.find('online:')
+    if marker < 0:
+        return None
+    names = re.split(r'[,\n]', text[marker + len('online:'):])
+    return [name.strip() for name in names if name.strip()]
+
+class LagSpikeDetector:
+    """
+    Per-dimension EWMA of mean tick time.
+
+    A spike is a sample above both the absolute threshold (ms per tick) and
+    `ratio` times that dimension's baseline. When only the overall figure spikes,
+    the dimension that rose most above its own baseline is blamed.
+    """
+
+    def __init__(self, threshold_ms: float = 50.0, ratio: float = 1.5,
+                 alpha: float = 0.2, cooldown: float = 300.0):
+        self.threshold_ms = threshold_ms
+        self.ratio = ratio
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.baselines: Dict[str, float] = {}
+        self._last_alert: Dict[str, float] = {}
+
+    def _is_spike(self, key: str, mspt: float) -> bool:
+        baseline = self.baselines.get(key)
+        return (baseline is not None and
+                mspt >= self.threshold_ms and
+                mspt >= baseline * self.ratio)
+
+    def _update(self, key: str, mspt: float):
+        baseline = self.baselines.get(key)
+        self.baselines[key] = mspt if baseline is None else baseline + self.alpha * (mspt - baseline)
+
+    def _cooled_down(self, key: str, now: float) -> bool:
+        if now - self._last_alert.get(key, float('-inf')) < self.cooldown:
+            return False
+        self._last_alert[key] = now
+        return True
+
+    def update(self, report: TickReport, now: Optional[float] = None) -> List[LagSpike]:
+        now = time.monotonic() if now is None else now
+        spikes = []
+
+        for dimension, mspt in report.dimensions.items():
+            if self._is_spike(dimension, mspt) and self._cooled_down(dimension, now):
+                spikes.append(LagSpike(dimension, mspt, self.baselines[dimension], report.mspt))
+
+        if not spikes and self._is_spike('overall', report.mspt) and report.dimensions:
+            culprit = max(
+                report.dimensions,
+                key=lambda dim: report.dimensions[dim] - self.baselines.get(dim, report.dimensions[dim])
+            )
+            if self._cooled_down(culprit, now):
+                baseline = self.baselines.get(culprit, report.dimensions[culprit])
+                spikes.append(LagSpike(culprit, report.dimensions[culprit], baseline, report.mspt))
+
+        for dimension, mspt in report.dimensions.items():
+            self._update(dimension, mspt)
+        self._update('overall', report.mspt)
+        return spikes
+
+    def reset(self):
+        self.baselines.clear()
+        self._last_alert.clear()
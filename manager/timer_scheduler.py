@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+class Clock:
+    """Wall and monotonic time source, replaceable for simulation"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    async def wait(self, event: asyncio.Event, timeout: Optional[float]) -> bool:
+        """Wait for event or timeout; True if the event fired"""
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+class Job:
+    def __init__(self, scheduler: 'TimerScheduler', name: str,
+                 callback: Callable[[], Awaitable], deadline: float,
+                 at: Optional[datetime] = None,
+                 interval: Optional[float] = None,
+                 exclusive: bool = False,
+                 preempt: bool = False):
+        self.scheduler = scheduler
+        self.name = name
+        self.callback = callback
+        self.deadline = deadline
+        self.at = at
+        self.interval = interval
+        self.exclusive = exclusive
+        self.preempt = preempt
+        self.cancelled = False
+        self.task: Optional[asyncio.Task] = None
+        self.seq = 0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def cancel(self):
+        """Remove the job from the schedule and abort it if it is running"""
+        self.cancelled = True
+        if self.running:
+            self.task.cancel()
+        self.scheduler._wake()
+
+    def reschedule(self, delay: float, interval: Optional[float] = None):
+        """Move the next run to `delay` seconds from now, optionally changing the period"""
+        if self.cancelled:
+            return
+        if interval is not None:
+            self.interval = interval
+        self.deadline = self.scheduler.clock.monotonic() + max(0.0, delay)
+        self.scheduler._push(self)
+
+    def __repr__(self):
+        when = self.at.strftime('%Y-%m-%d %H:%M:%S') if self.at else f"every {self.interval}s"
+        return f"<Job {self.name} ({when})>"
+
+class TimerScheduler:
+    """
+    Deadline heap on the monotonic clock.
+
+    The run loop sleeps until the earliest deadline (or until a job is added or
+    cancelled), so there is no periodic polling. Wall-clock jobs are re-anchored
+    on every wakeup and at least every WALL_CLOCK_RESYNC seconds, which keeps
+    them correct across clock adjustments, DST changes and long uptimes.
+
+    Exclusive jobs never overlap: a new exclusive job is skipped while another
+    one runs, unless it is marked preempt, in which case the running one is
+    cancelled first.
+    """
+
+    WALL_CLOCK_RESYNC = 900
+
+    def __init__(self, clock: Optional[Clock] = None, logger=None):
+        self.clock = clock or Clock()
+        self.logger = logger
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._exclusive: Optional[Job] = None
+        self._stopped = False
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _push(self, job: Job):
+        job.seq = next(self._seq)
+        heapq.heappush(self._heap, (job.deadline, job.seq, job))
+        self._wake()
+
+    def call_at(self, when: datetime, callback: Callable[[], Awaitable], name: str,
+                exclusive: bool = False, preempt: bool = False) -> Job:
+        delay = max(0.0, (when - self.clock.now()).total_seconds())
+        job = Job(self, name, callback, self.clock.monotonic() + delay,
+                  at=when, exclusive=exclusive, preempt=preempt)
+        self._push(job)
+        return job
+
+    def call_later(self, delay: float, callback: Callable[[], Awaitable], name: str,
+                   exclusive: bool = False, preempt: bool = False) -> Job:
+        job = Job(self, name, callback, self.clock.monotonic() + max(0.0, delay),
+                  exclusive=exclusive, preempt=preempt)
+        self._push(job)
+        return job
+
+    def call_every(self, interval: float, callback: Callable[[], Awaitable], name: str,
+                   first_delay: Optional[float] = None, exclusive: bool = False) -> Job:
+        delay = interval if first_delay is None else first_delay
+        job = Job(self, name, callback, self.clock.monotonic() + delay,
+                  interval=interval, exclusive=exclusive)
+        self._push(job)
+        return job
+
+    def pending(self) -> List[Job]:
+        jobs = {entry[2] for entry in self._heap if self._is_live(entry)}
+        return sorted(jobs, key=lambda job: job.deadline)
+
+    @staticmethod
+    def _is_live(entry: tuple) -> bool:
+        _, seq, job = entry
+        return not job.cancelled and seq == job.seq
+
+    def _resync_wall_clock(self):
+        now = self.clock.now()
+        mono = self.clock.monotonic()
+        changed = False
+        for job in self.pending():
+            if job.at is None:
+                continue
+            deadline = mono + max(0.0, (job.at - now).total_seconds())
+            if abs(deadline - job.deadline) > 0.5:
+                job.deadline = deadline
+                job.seq = next(self._seq)
+                changed = True
+        if changed:
+            self._heap = [(job.deadline, job.seq, job) for job in self.pending()]
+            heapq.heapify(self._heap)
+
+    def _next_deadline(self) -> Optional[float]:
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def run(self):
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+        while not self._stopped:
+            deadline = self._next_deadline()
+            if deadline is None:
+                timeout = None
+            else:
+                timeout = deadline - self.clock.monotonic()
+
+            if timeout is None or timeout > 0:
+                if timeout is not None:
+                    timeout = min(timeout, self.WALL_CLOCK_RESYNC)
+                self._wakeup.clear()
+                await self.clock.wait(self._wakeup, timeout)
+                self._resync_wall_clock()
+                continue
+
+            _, _, job = heapq.heappop(self._heap)
+            if job.interval is not None:
+                mono = self.clock.monotonic()
+                while job.deadline <= mono:
+                    job.deadline += job.interval
+                self._push(job)
+
+            if job.running:
+                # Exclusive or not, a job never overlaps itself; its task stays the one to cancel
+                if self.logger:
+                    self.logger.warning(f"Skipping {job.name}: previous run still in progress")
+                continue
+            job.task = asyncio.get_running_loop().create_task(self._execute(job))
+
+    def stop(self):
+        self._stopped = True
+        for job in self.pending():
+            job.cancel()
+        self._wake()
+
+    async def _execute(self, job: Job):
+        if job.exclusive:
+            current = self._exclusive
+            if current is not None and current.running:
+                if not job.preempt:
+                    if self.logger:
+                        self.logger.info(f"Skipping {job.name}: {current.name} in progress")
+                    return
+                if self.logger:
+                    self.logger.info(f"{job.name} preempts {current.name}")
+                current.task.cancel()
+                await asyncio.gather(current.task, return_exceptions=True)
+            self._exclusive = job
+
+        try:
+            await job.callback()
+        except asyncio.CancelledError:
+            if self.logger:
+                self.logger.info(f"Job {job.name} cancelled")
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Job {job.name} failed: {e}")
+        finally:
+            # A job never overlaps itself, so this is the run that took the slot
+            if self._exclusive is job:
+                self._exclusive = None
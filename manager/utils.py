@@ -1,116 +1,253 @@
+import asyncio
+import atexit
 import logging
-import os
-from datetime import datetime
-import mcrcon
-import requests
-from typing import Optional
+import queue
+import threading
+import time
+from logging.handlers import QueueListener
+from typing import Dict, Optional
+
+from rcon_client import AsyncRconClient, RconError
+from discord_dispatcher import DiscordDispatcher
+from metrics import REGISTRY
+from config import ServerConfig
+from log_handlers import DailyRotatingFileHandler, JsonLinesFormatter, NonBlockingQueueHandler, PerLoggerHandler
+
+RCON_LATENCY = REGISTRY.histogram(
+    'minecraft_rcon_command_duration_seconds', 'RCON command round-trip time', ['endpoint', 'command']
+)
+RCON_ERRORS = REGISTRY.counter(
+    'minecraft_rcon_command_errors', 'RCON commands that failed or timed out', ['endpoint', 'command']
+)
+LOG_DROPPED = REGISTRY.counter(
+    'minecraft_manager_log_records_dropped', 'Log records dropped because the log writer fell behind'
+)
 
 class LoggerSetup:
-    @staticmethod
-    def setup(name):
-        logger = logging.getLogger(name)
-        logger.setLevel(logging.INFO)
-        
+    """
+    One logging pipeline for the whole process.
+
+    Loggers only put records on a bounded queue. A single QueueListener
+    thread writes them to the console, to a daily rotating file per logger
+    and, with LOG_JSON, to a JSON-lines twin of that file, so a slow disk or
+    console never holds up the event loop. setup() can be called any number
+    of times for the same name; the handler is attached once.
+    """
+    _lock = threading.Lock()
+    _queue: Optional[queue.Queue] = None
+    _listener: Optional[QueueListener] = None
+    _file_prefix = ''
+
+    @classmethod
+    def set_file_prefix(cls, prefix: str):
+        """
+        Prefix this process's log file names. Two processes must never append to
+        the same file: the first to roll it over would compress and delete it
+        under the other.
+        """
+        cls._file_prefix = prefix
+
+    @classmethod
+    def _start(cls):
         formatter = logging.Formatter(
             '%(asctime)s [%(levelname)s] %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
-        
-        os.makedirs('logs', exist_ok=True)
-        
-        handlers = [
-            logging.StreamHandler(),
-            logging.FileHandler(
-                f'logs/{name}_{datetime.now():%Y%m%d}.log',
-                encoding='utf-8'
+
+        def file_handler(name: str, suffix: str, file_formatter: logging.Formatter) -> logging.Handler:
+            handler = DailyRotatingFileHandler(
+                ServerConfig.LOG_DIR, cls._file_prefix + name, suffix,
+                max_bytes=ServerConfig.LOG_MAX_BYTES,
+                retention_days=ServerConfig.LOG_RETENTION_DAYS,
+                compress=ServerConfig.LOG_COMPRESS
             )
-        ]
-        
-        for handler in handlers:
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-            
-        return logger
+            handler.setFormatter(file_formatter)
+            return handler
+
+        console = logging.StreamHandler()
+        console.setFormatter(formatter)
+        handlers = [console, PerLoggerHandler(lambda name: file_handler(name, '.log', formatter))]
+        if ServerConfig.LOG_JSON:
+            json_formatter = JsonLinesFormatter()
+            handlers.append(PerLoggerHandler(lambda name: file_handler(name, '.jsonl', json_formatter)))
+
+        cls._queue = queue.Queue(ServerConfig.LOG_QUEUE_SIZE)
+        cls._listener = QueueListener(cls._queue, *handlers, respect_handler_level=True)
+        cls._listener.start()
+        atexit.register(cls.shutdown)
+
+    @classmethod
+    def setup(cls, name):
+        with cls._lock:
+            logger = logging.getLogger(name)
+            if logger.handlers:
+                # Already configured by another component sharing the name
+                return logger
+            if cls._listener is None:
+                cls._start()
+            logger.setLevel(ServerConfig.LOG_LEVEL)
+            logger.addHandler(NonBlockingQueueHandler(cls._queue, on_drop=LOG_DROPPED.inc))
+            # A handler configured on the root logger must not print everything twice
+            logger.propagate = False
+            return logger
+
+    @classmethod
+    def shutdown(cls):
+        """Write out everything still queued and close the files"""
+        with cls._lock:
+            listener, cls._listener = cls._listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
 
 class RconManager:
-    _instance = None
+    """
+    One RCON session per server endpoint.
+
+    Every session's asyncio client lives on a shared private I/O loop thread, so
+    one authenticated socket per server serves both coroutine callers
+    (scheduler) and blocking callers (monitor).
+    """
+    _instances: Dict[tuple, 'RconManager'] = {}
+    _instances_lock = threading.Lock()
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _loop_lock = threading.Lock()
     
-    def __init__(self, host, password, port):
-        if not RconManager._instance:
-            self.host = host
-            self.password = password
-            self.port = port
-            self.rcon = None
-            self.connected = False
-            self.logger = LoggerSetup.setup('rcon')
-            RconManager._instance = self
+    def __init__(self, host, password, port, timeout=5.0):
+        self.host = host
+        self.password = password
+        self.port = port
+        self.timeout = timeout
+        self.endpoint = f"{host}:{port}"
+        self.logger = LoggerSetup.setup('rcon')
+        self.client = AsyncRconClient(
+            host, password, port,
+            timeout=timeout,
+            logger=self.logger
+        )
             
     @classmethod
-    def get_instance(cls, host=None, password=None, port=None):
-        if not cls._instance:
+    def get_instance(cls, host=None, password=None, port=None, timeout=5.0):
+        with cls._instances_lock:
+            if host is None and port is None and len(cls._instances) == 1:
+                return next(iter(cls._instances.values()))
             if not all([host, password, port]):
                 raise ValueError("RCON connection parameters required")
-            return cls(host, password, port)
-        return cls._instance
-        
-    async def _connect(self):
+            instance = cls._instances.get((host, port))
+            if instance is None:
+                instance = cls._instances[(host, port)] = cls(host, password, port, timeout)
+            return instance
+
+    @property
+    def connected(self) -> bool:
+        return self.client.connected
+
+    @classmethod
+    def _get_loop(cls) -> asyncio.AbstractEventLoop:
+        with cls._loop_lock:
+            if cls._loop is None:
+                cls._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=cls._loop.run_forever,
+                    name='rcon-io',
+                    daemon=True
+                ).start()
+            return cls._loop
+
+    async def _execute(self, command: str, timeout: Optional[float]) -> Optional[str]:
+        name = command.split(' ', 1)[0]
+        started = time.monotonic()
         try:
-            self.rcon = mcrcon.MCRcon(self.host, self.password, self.port)
-            self.rcon.connect()
-            self.connected = True
-            self.logger.info("RCON connection established")
-        except Exception as e:
-            self.logger.error(f"RCON connection failed: {e}")
-            self.rcon = None
-            self.connected = False
+            response = await self.client.command(command, timeout)
+            latency = time.monotonic() - started
+            RCON_LATENCY.labels(self.endpoint, name).observe(latency)
+            self.logger.debug("RCON %s on %s took %.1f ms", name, self.endpoint, latency * 1000,
+                              extra={'endpoint': self.endpoint, 'command': name, 'latency': latency})
+            return response
+        except RconError as e:
+            RCON_ERRORS.labels(self.endpoint, name).inc()
+            self.logger.error(f"RCON command failed ({self.endpoint}): {e}",
+                              extra={'endpoint': self.endpoint, 'command': name,
+                                     'latency': time.monotonic() - started})
+        return None
                 
-    async def send_command(self, command: str) -> Optional[str]:
-        if not self.connected:
-            await self._connect()
-            
+    async def send_command(self, command: str, timeout: Optional[float] = None) -> Optional[str]:
+        future = asyncio.run_coroutine_threadsafe(
+            self._execute(command, timeout), self._get_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    async def _probe(self, timeout: float) -> bool:
+        self.client.reset_backoff()
         try:
-            if self.connected and self.rcon:
-                return self.rcon.command(command)
-        except Exception as e:
-            self.logger.error(f"RCON command failed: {e}")
-            self.connected = False
-            self.rcon = None
-        return None
+            await self.client.command("list", timeout)
+            return True
+        except RconError:
+            return False
+
+    async def probe(self, timeout: float = 2.0) -> bool:
+        """Quiet readiness check that bypasses the reconnect backoff"""
+        future = asyncio.run_coroutine_threadsafe(self._probe(timeout), self._get_loop())
+        return await asyncio.wrap_future(future)
+
+    def command(self, command: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Blocking facade for callers without an event loop"""
+        future = asyncio.run_coroutine_threadsafe(
+            self._execute(command, timeout), self._get_loop()
+        )
+        return future.result()
 
 class DiscordWebhook:
-    _instance = None
+    """One dispatcher per webhook URL, shared by every server posting to it"""
+    _instances: Dict[str, 'DiscordWebhook'] = {}
     
     def __init__(self, config):
-        if not DiscordWebhook._instance:
-            self.config = config
-            self.webhook_url = f"https://discord.com/api/webhooks/{config.WEBHOOK_ID}/{config.WEBHOOK_TOKEN}"
-            self.logger = LoggerSetup.setup('discord')
-            DiscordWebhook._instance = self
+        self.config = config
+        self.webhook_url = self.url_for(config)
+        self.logger = LoggerSetup.setup('discord')
+        self.dispatcher = DiscordDispatcher(
+            self.webhook_url,
+            self.logger,
+            queue_size=config.DISCORD_QUEUE_SIZE,
+            coalesce_window=config.DISCORD_COALESCE_SECONDS,
+            timeout=config.DISCORD_TIMEOUT
+        )
+
+    @staticmethod
+    def url_for(config) -> str:
+        url = (
+            config.WEBHOOK_URL or
+            f"https://discord.com/api/webhooks/{config.WEBHOOK_ID}/{config.WEBHOOK_TOKEN}"
+        )
+        if config.THREAD_ID:
+            url = f"{url}?thread_id={config.THREAD_ID}"
+        return url
             
     @classmethod
     def get_instance(cls, config=None):
-        if not cls._instance:
-            if not config:
-                raise ValueError("Config required for Discord webhook initialization")
-            return cls(config)
-        return cls._instance
+        if config is None:
+            if len(cls._instances) == 1:
+                return next(iter(cls._instances.values()))
+            raise ValueError("Config required for Discord webhook initialization")
+        url = cls.url_for(config)
+        instance = cls._instances.get(url)
+        if instance is None:
+            instance = cls._instances[url] = cls(config)
+        return instance
+
+    @classmethod
+    def instances(cls) -> list:
+        return list(cls._instances.values())
         
     async def send_message(self, message: str):
-        """Discord webhook 메시지 전송"""
+        """Discord webhook 메시지 전송 (큐에 넣고 바로 반환)"""
         if not self.config.DISCORD_ENABLED:
             return
+        self.dispatcher.submit(message)
 
-        try:
-            webhook_data = {"content": message}
-            url = self.webhook_url
-
-            if self.config.THREAD_ID:
-                url = f"{url}?thread_id={self.config.THREAD_ID}"
-
-            response = requests.post(url, json=webhook_data)
-            if response.status_code != 204:
-                self.logger.error(f"Discord webhook send failed: {response.status_code}")
-            else:
-                self.logger.info(f"Discord webhook sent: {message}")
-        except Exception as e:
-            self.logger.error(f"Error sending Discord webhook: {e}")
\ No newline at end of file
+    def stats(self) -> dict:
+        return self.dispatcher.stats()
+
+    async def close(self, timeout: float = 10.0):
+        await self.dispatcher.close(timeout)
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import struct
+from typing import Callable, Optional, Tuple
+
+# Handshake next-state values
+STATUS = 1
+LOGIN = 2
+TRANSFER = 3
+
+MAX_PACKET = 4096   # Handshake, status and login start packets are all tiny
+READ_TIMEOUT = 5
+
+class ProtocolError(Exception):
+    pass
+
+async def read_varint(reader: asyncio.StreamReader) -> int:
+    value = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value - (1 << 32) if value & (1 << 31) else value
+    raise ProtocolError("VarInt too long")
+
+def encode_varint(value: int) -> bytes:
+    value &= 0xffffffff
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _unpack_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    for shift in range(0, 35, 7):
+        if pos >= len(data):
+            raise ProtocolError("Truncated VarInt")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return (value - (1 << 32) if value & (1 << 31) else value), pos
+    raise ProtocolError("VarInt too long")
+
+def _unpack_string(data: bytes, pos: int) -> Tuple[str, int]:
+    length, pos = _unpack_varint(data, pos)
+    if length < 0 or pos + length > len(data):
+        raise ProtocolError("Truncated string")
+    return data[pos:pos + length].decode('utf-8', 'replace'), pos + length
+
+def encode_string(value: str) -> bytes:
+    raw = value.encode('utf-8')
+    return encode_varint(len(raw)) + raw
+
+def encode_packet(packet_id: int, payload: bytes = b'') -> bytes:
+    body = encode_varint(packet_id) + payload
+    return encode_varint(len(body)) + body
+
+async def read_packet(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    length = await read_varint(reader)
+    if not 0 < length <= MAX_PACKET:
+        raise ProtocolError(f"Bad packet length {length}")
+    body = await reader.readexactly(length)
+    packet_id, pos = _unpack_varint(body, 0)
+    return packet_id, body[pos:]
+
+async def read_packet_any(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """read_packet without the size limit, for responses from a real server"""
+    length = await read_varint(reader)
+    body = await reader.readexactly(length)
+    packet_id, pos = _unpack_varint(body, 0)
+    return packet_id, body[pos:]
+
+class WakeListener:
+    """
+    Stand-in for a suspended server on its game port.
+
+    Answers server-list pings with a "sleeping" MOTD and turns away login
+    attempts with a reconnect message, reporting the player through on_login
+    so the server can be started. Only the handshake, status and login-start
+    packets are understood; anything else just closes the connection.
+    """
+
+    def __init__(self, host: str, port: int, motd: str, kick_message: str,
+                 on_login: Callable[[str], None], logger, max_players: int = 20):
+        self.host = host
+        self.port = port
+        self.motd = motd
+        self.kick_message = kick_message
+        self.on_login = on_login
+        self.logger = logger
+        self.max_players = max_players
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def listening(self) -> bool:
+        return self._server is not None
+
+    async def start(self):
+        if self._server is None:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            # Port 0 (tests) binds any free port
+            self.port = self._server.sockets[0].getsockname()[1]
+            self.logger.info(f"Wake listener on {self.host}:{self.port}")
+
+    async def close(self):
+        """Release the port; returns once new connections are refused"""
+        server, self._server = self._server, None
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    def _status(self, protocol: int) -> bytes:
+        return encode_string(json.dumps({
+            # Echo the client's protocol so the list shows the MOTD rather than "incompatible"
+            'version': {'name': 'Sleeping', 'protocol': protocol},
+            'players': {'max': self.max_players, 'online': 0},
+            'description': {'text': self.motd}
+        }))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info('peername')
+        try:
+            packet_id, data = await asyncio.wait_for(read_packet(reader), READ_TIMEOUT)
+            if packet_id != 0:
+                return
+            protocol, pos = _unpack_varint(data, 0)
+            _, pos = _unpack_string(data, pos)
+            pos += 2  # Port
+            next_state, _ = _unpack_varint(data, pos)
+
+            if next_state == STATUS:
+                await self._answer_status(reader, writer, protocol)
+            elif next_state in (LOGIN, TRANSFER):
+                packet_id, data = await asyncio.wait_for(read_packet(reader), READ_TIMEOUT)
+                name = _unpack_string(data, 0)[0] if packet_id == 0 else '?'
+                writer.write(encode_packet(0, encode_string(json.dumps({'text': self.kick_message}))))
+                await writer.drain()
+                self.logger.info(f"Login attempt by {name} from {peer[0] if peer else '?'}")
+                self.on_login(name)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ProtocolError,
+                ConnectionError, IndexError) as e:
+            self.logger.debug(f"Wake listener connection from {peer} dropped: {e}")
+        finally:
+            writer.close()
+
+    async def _answer_status(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, protocol: int):
+        while True:
+            packet_id, data = await asyncio.wait_for(read_packet(reader), READ_TIMEOUT)
+            if packet_id == 0:
+                writer.write(encode_packet(0, self._status(protocol)))
+            elif packet_id == 1:
+                writer.write(encode_packet(1, data[:8]))
+                await writer.drain()
+                return
+            else:
+                return
+            await writer.drain()
+
+async def _handshake(host: str, port: int, next_state: int, protocol: int = 767):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode_packet(0, encode_varint(protocol) + encode_string(host)
+                               + struct.pack('>H', port) + encode_varint(next_state)))
+    return reader, writer
+
+async def query_status(host: str, port: int, timeout: float = 5) -> dict:
+    """Server-list ping as a client would send it; returns the status JSON"""
+    reader, writer = await asyncio.wait_for(_handshake(host, port, STATUS), timeout)
+    try:
+        writer.write(encode_packet(0))
+        packet_id, data = await asyncio.wait_for(read_packet_any(reader), timeout)
+        writer.write(encode_packet(1, struct.pack('>q', 1)))
+        await writer.drain()
+        return json.loads(_unpack_string(data, 0)[0])
+    finally:
+        writer.close()
+
+async def attempt_login(host: str, port: int, name: str, timeout: float = 5) -> Optional[str]:
+    """Login start as a client would send it; returns the disconnect message, if any"""
+    reader, writer = await asyncio.wait_for(_handshake(host, port, LOGIN), timeout)
+    try:
+        writer.write(encode_packet(0, encode_string(name) + bytes(16)))
+        packet_id, data = await asyncio.wait_for(read_packet_any(reader), timeout)
+        if packet_id != 0:
+            return None
+        return json.loads(_unpack_string(data, 0)[0]).get('text')
+    finally:
+        writer.close()